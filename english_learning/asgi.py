@@ -2,6 +2,10 @@
 ASGI config for english_learning project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+HTTP goes to Django; the speaking test's streaming transcription WebSocket
+is served by speaking.streaming.
+In production this runs under gunicorn with uvicorn workers (see Procfile),
+so gunicorn.conf.py's per-worker hooks still apply.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/6.0/howto/deployment/asgi/
@@ -13,4 +17,25 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'english_learning.settings')
 
-application = get_asgi_application()
+# Thread pools are sized at import, so plan them before any app loads numpy/torch
+from speaking.resource_governor import governor  # noqa: E402
+governor.configure_environment()
+
+django_application = get_asgi_application()
+
+# Imported after Django is set up
+from speaking.pronunciation_engine import warm_up_serving_process  # noqa: E402
+from speaking.streaming import STREAM_PATH, speaking_stream  # noqa: E402
+
+warm_up_serving_process()
+
+
+async def application(scope, receive, send):
+    if scope['type'] == 'websocket':
+        if scope['path'] == STREAM_PATH:
+            await speaking_stream(scope, receive, send)
+        else:
+            await receive()
+            await send({'type': 'websocket.close', 'code': 4404})
+        return
+    await django_application(scope, receive, send)
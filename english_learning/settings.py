@@ -90,6 +90,8 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Several run_scoring_worker processes may share this file
+        'OPTIONS': {'timeout': 20},
     }
 }
 
@@ -135,6 +137,45 @@ VOSK_MODEL_PATH = str( BASE_DIR/"speaking"/"model"/"vosk-model-small-en-us-0.15"
 
 REFERENCE_AUDIO_PATH = BASE_DIR/"speaking"/"reference_audio"/"reference.wav"
 
+# CPU budget for speech inference, split between the web workers on a host
+# (see speaking/resource_governor.py and gunicorn.conf.py)
+INFERENCE_CORE_BUDGET = int(os.environ.get('INFERENCE_CORE_BUDGET', 0)) or os.cpu_count()
+INFERENCE_WORKERS = int(os.environ.get('WEB_CONCURRENCY', 1))
+INFERENCE_INTEROP_THREADS = int(os.environ.get('INFERENCE_INTEROP_THREADS', 1))
+INFERENCE_PIN_CPUS = os.environ.get('INFERENCE_PIN_CPUS', '') == '1'
+
+# Workers whose RSS passes this after a scoring job are recycled (0 disables)
+SCORING_MEMORY_CEILING_MB = int(os.environ.get('SCORING_MEMORY_CEILING_MB', 4096))
+
+# Score speaking sessions on run_scoring_worker nodes instead of in the request;
+# process_results waits this many seconds for a worker, then returns queued=true
+# and the page polls (keep it well under gunicorn's 30 s worker timeout)
+SPEAKING_SCORING_QUEUE = os.environ.get('SPEAKING_SCORING_QUEUE', '') == '1'
+SPEAKING_SCORING_WAIT = int(os.environ.get('SPEAKING_SCORING_WAIT', 3))
+
+# Scoring nodes without MEDIA_ROOT read recordings from `manage.py serve_recordings`
+# on the web node, through a local read-through cache
+RECORDING_STORE_URL = os.environ.get('RECORDING_STORE_URL', '')
+RECORDING_STORE_TOKEN = os.environ.get('RECORDING_STORE_TOKEN', '')
+RECORDING_CACHE_DIR = os.environ.get('RECORDING_CACHE_DIR', os.path.join(BASE_DIR, 'recording_cache'))
+RECORDING_CACHE_MB = int(os.environ.get('RECORDING_CACHE_MB', 1024))
+
+# Load Q1 references and run one transcription when a web or scoring worker starts (see /readyz)
+SPEAKING_WARM_UP = os.environ.get('SPEAKING_WARM_UP', '1') == '1'
+
+# Memory-mapped word list for the writing graders' spelling checks (`manage.py build_lexicon`)
+WRITING_LEXICON_PATH = os.environ.get('WRITING_LEXICON_PATH', os.path.join(BASE_DIR, 'lexicon', 'en.lex'))
+# Delete index for "did you mean" suggestions, built from the lexicon (`manage.py build_suggestion_index`)
+WRITING_SUGGESTION_INDEX_PATH = os.environ.get(
+    'WRITING_SUGGESTION_INDEX_PATH', os.path.join(BASE_DIR, 'lexicon', 'en.symspell')
+)
+
+# Grading results kept per worker for repeated answers (0 disables; see writing/grading_cache.py)
+WRITING_GRADING_CACHE_SIZE = int(os.environ.get('WRITING_GRADING_CACHE_SIZE', 10000))
+
+# Threads per worker for the expensive writing graders when a test is submitted (0 grades inline)
+WRITING_GRADING_THREADS = int(os.environ.get('WRITING_GRADING_THREADS', 2))
+
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
 
 CAPTCHA_IGNORE_CASE = True
@@ -19,6 +19,7 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 from django.shortcuts import redirect
+from speaking.health import healthz, readyz
 
 def admin_redirect(request):
     if request.user.is_authenticated and not request.user.is_staff:
@@ -34,6 +35,8 @@ urlpatterns = [
     path('speaking/', include('speaking.urls')),
     path('writing/', include('writing.urls')),
     path('captcha/', include('captcha.urls')), 
+    path('healthz', healthz, name='healthz'),
+    path('readyz', readyz, name='readyz'),
       # If you're using captcha
 ]
 
@@ -13,4 +13,12 @@ from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'english_learning.settings')
 
+# Thread pools are sized at import, so plan them before any app loads numpy/torch
+from speaking.resource_governor import governor  # noqa: E402
+governor.configure_environment()
+
 application = get_wsgi_application()
+
+# Serving processes only; manage.py commands never import this module
+from speaking.pronunciation_engine import warm_up_serving_process  # noqa: E402
+warm_up_serving_process()
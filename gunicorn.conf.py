@@ -0,0 +1,28 @@
+"""
+Gunicorn settings, loaded automatically from the working directory.
+
+Each worker runs its own Whisper pipeline, so workers are given a slot that
+speaking.resource_governor turns into a share of INFERENCE_CORE_BUDGET
+(and, with INFERENCE_PIN_CPUS=1, a block of cores of its own). Workers may
+recycle themselves once they outgrow SCORING_MEMORY_CEILING_MB.
+"""
+import os
+
+# The hooks below read Django settings before wsgi.py has run
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'english_learning.settings')
+
+
+def pre_fork(server, worker):
+    # Runs in the arbiter: reuse the lowest slot no live worker holds,
+    # so a restarted worker takes over its predecessor's cores
+    taken = {getattr(w, 'cpu_slot', None) for w in server.WORKERS.values()}
+    worker.cpu_slot = next(slot for slot in range(len(taken) + 1) if slot not in taken)
+
+
+def post_fork(server, worker):
+    # Runs in the worker, before the app is loaded unless preload_app is set
+    from speaking.memory_watchdog import memory_watchdog
+    from speaking.resource_governor import governor
+
+    governor.configure_worker(server.num_workers, worker.cpu_slot)
+    memory_watchdog.enable_recycling()
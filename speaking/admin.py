@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import TestSession, Student
+from django.db.models import Prefetch
+from .models import TestSession, Student, SpeakingRecording, SuspiciousActivity, ScoringJob, ScoringWorker
 
 class TestSessionInline(admin.TabularInline):
     """Shows a student's test history inside their profile page"""
@@ -30,6 +31,15 @@ class StudentAdmin(admin.ModelAdmin):
     test_count.short_description = 'Tests Taken'
 
 
+class SpeakingRecordingInline(admin.TabularInline):
+    """Stored answers of a test session"""
+    model = SpeakingRecording
+    extra = 0
+    fields = ['question', 'word_num', 'path', 'duration', 'transcript', 'score', 'scored_at', 'scoring_ms']
+    readonly_fields = fields
+    can_delete = False
+
+
 @admin.register(TestSession)
 class TestSessionAdmin(admin.ModelAdmin):
     """
@@ -54,6 +64,13 @@ class TestSessionAdmin(admin.ModelAdmin):
     search_fields = ('id', 'user__username', 'user__email')
     
     ordering = ('id',)
+    inlines = [SpeakingRecordingInline]
+
+    def get_queryset(self, request):
+        # Q1 word recordings for mispronounced_words in one query per page
+        return super().get_queryset(request).select_related('user').prefetch_related(
+            Prefetch('recordings', queryset=SpeakingRecording.objects.filter(question=1), to_attr='q1_recordings')
+        )
 
     def get_username(self, obj):
         """Get username from the Django user field"""
@@ -95,19 +112,19 @@ class TestSessionAdmin(admin.ModelAdmin):
         """List words that were mispronounced in Q1"""
         expected = ['comfortable', 'vegetable', 'often', 'engineer', 'laboratory']
         mispronounced = []
+        recordings = getattr(obj, 'q1_recordings', None)
+        if recordings is None:
+            recordings = obj.recordings.filter(question=1)
         
-        for i, word in enumerate(expected, 1):
-            # Check if word was recorded and score is low
-            word_field = f'q1_word{i}_recording'
-            recording = getattr(obj, word_field, '')
+        # Only words they attempted; unscored words default to 20
+        for recording in recordings:
+            if not 1 <= recording.word_num <= len(expected):
+                continue
+            score = recording.score if recording.score is not None else 20
             
-            if recording:  # If they attempted the word
-                score_field = f'q1_word{i}_score'
-                score = getattr(obj, score_field, 20)  # Default to 20 if not set
-                
-                # If score is less than 15 out of 20 (75%), mark as mispronounced
-                if score < 15:
-                    mispronounced.append(word)
+            # If score is less than 15 out of 20 (75%), mark as mispronounced
+            if score < 15:
+                mispronounced.append(expected[recording.word_num - 1])
         
         return ", ".join(mispronounced) if mispronounced else "None"
     mispronounced_words.short_description = 'Mispronounced'
@@ -119,4 +136,31 @@ class TestSessionAdmin(admin.ModelAdmin):
         elif obj.q5_score > 0:
             return f"⚠️ {obj.q5_score:.0f}%"
         return "❌ Wrong"
-    grammar_status.short_description = 'Grammar'
\ No newline at end of file
+    grammar_status.short_description = 'Grammar'
+
+
+@admin.register(SuspiciousActivity)
+class SuspiciousActivityAdmin(admin.ModelAdmin):
+    """Proctoring events and suspected duplicate submissions"""
+    list_display = ('timestamp', 'user', 'activity_type', 'question', 'count', 'session_key')
+    list_filter = ('activity_type', 'timestamp')
+    search_fields = ('user__username', 'session_key')
+    list_select_related = ('user',)
+
+
+@admin.register(ScoringJob)
+class ScoringJobAdmin(admin.ModelAdmin):
+    """Sessions queued for run_scoring_worker nodes"""
+    list_display = ('test_session', 'state', 'worker', 'attempts', 'lease_expires_at', 'scoring_ms', 'created_at')
+    list_filter = ('state', 'worker')
+    readonly_fields = ('created_at', 'started_at', 'finished_at')
+
+
+@admin.register(ScoringWorker)
+class ScoringWorkerAdmin(admin.ModelAdmin):
+    """Scoring worker processes and their throughput"""
+    list_display = ('name', 'last_heartbeat_at', 'stopped_at', 'jobs_done', 'jobs_failed', 'get_jobs_per_minute')
+
+    def get_jobs_per_minute(self, obj):
+        return f"{obj.jobs_per_minute:.2f}"
+    get_jobs_per_minute.short_description = 'Jobs/min'
@@ -0,0 +1,258 @@
+"""
+In-process decoding of browser Opus recordings (WebM or Ogg).
+
+MediaRecorder produces Opus in a WebM container, which libsndfile cannot
+read. Instead of shelling out to ffmpeg for every clip, the Opus packets are
+demuxed from WebM here and re-wrapped as Ogg Opus pages (no re-encoding),
+which soundfile/libsndfile decodes in-process.
+"""
+import io
+import struct
+import zlib
+import soundfile as sf
+
+# EBML element IDs used by the demuxer
+EBML_SEGMENT = 0x18538067
+EBML_CLUSTER = 0x1F43B675
+EBML_TRACKS = 0x1654AE6B
+EBML_TRACK_ENTRY = 0xAE
+EBML_TRACK_NUMBER = 0xD7
+EBML_CODEC_ID = 0x86
+EBML_CODEC_PRIVATE = 0x63A2
+EBML_AUDIO = 0xE1
+EBML_CHANNELS = 0x9F
+EBML_BLOCK_GROUP = 0xA0
+EBML_BLOCK = 0xA1
+EBML_SIMPLE_BLOCK = 0xA3
+
+# Master elements are descended into rather than skipped. Browsers write
+# Segment and Cluster with "unknown" sizes, which a flat scan handles.
+EBML_MASTERS = {EBML_SEGMENT, EBML_CLUSTER, EBML_TRACKS, EBML_TRACK_ENTRY, EBML_AUDIO, EBML_BLOCK_GROUP}
+
+OGG_SERIAL = 0x5350454B
+
+_BIT_REVERSE = bytes(int(f'{i:08b}'[::-1], 2) for i in range(256))
+
+
+class AudioDecodeError(ValueError):
+    pass
+
+
+def _read_vint(data, pos):
+    """EBML variable-length integer; returns (value, length), value None if unknown"""
+    first = data[pos]
+    length = 1
+    mask = 0x80
+    while length <= 8 and not first & mask:
+        mask >>= 1
+        length += 1
+    if length > 8 or pos + length > len(data):
+        raise AudioDecodeError('Invalid EBML length')
+    value = first & (mask - 1)
+    for b in data[pos + 1:pos + length]:
+        value = (value << 8) | b
+    if value == (1 << (7 * length)) - 1:
+        return None, length
+    return value, length
+
+
+def _read_id(data, pos):
+    first = data[pos]
+    length = 1
+    mask = 0x80
+    while length <= 4 and not first & mask:
+        mask >>= 1
+        length += 1
+    if length > 4 or pos + length > len(data):
+        raise AudioDecodeError('Invalid EBML id')
+    return int.from_bytes(data[pos:pos + length], 'big'), length
+
+
+def _block_frames(block):
+    """Split a (Simple)Block payload into (track, frames), handling all lacing modes"""
+    track, n = _read_vint(block, 0)
+    flags = block[n + 2]
+    pos = n + 3
+    lacing = (flags >> 1) & 3
+    if lacing == 0:
+        return track, [block[pos:]]
+
+    count = block[pos] + 1
+    pos += 1
+    sizes = []
+    if lacing == 1:  # Xiph
+        for _ in range(count - 1):
+            size = 0
+            while block[pos] == 255:
+                size += 255
+                pos += 1
+            size += block[pos]
+            pos += 1
+            sizes.append(size)
+    elif lacing == 3:  # EBML
+        size, length = _read_vint(block, pos)
+        pos += length
+        sizes.append(size)
+        for _ in range(count - 2):
+            raw, length = _read_vint(block, pos)
+            pos += length
+            size += raw - ((1 << (7 * length - 1)) - 1)
+            sizes.append(size)
+    else:  # fixed
+        sizes = [(len(block) - pos) // count] * (count - 1)
+
+    frames = []
+    for size in sizes:
+        frames.append(block[pos:pos + size])
+        pos += size
+    frames.append(block[pos:])
+    return track, frames
+
+
+def demux_webm(data):
+    """Return the Opus track of a WebM file as {'codec_private', 'channels', 'packets'}"""
+    tracks = {}
+    current = None
+    blocks = []
+    pos = 0
+    end = len(data)
+
+    while pos < end:
+        try:
+            element_id, id_len = _read_id(data, pos)
+            size, size_len = _read_vint(data, pos + id_len)
+        except (AudioDecodeError, IndexError):
+            break  # truncated tail, e.g. a prefix of a chunked upload
+        body = pos + id_len + size_len
+
+        if element_id in EBML_MASTERS:
+            if element_id == EBML_TRACK_ENTRY:
+                current = {}
+                tracks[len(tracks)] = current
+            pos = body
+            continue
+        if size is None or body + size > end:
+            break
+
+        payload = data[body:body + size]
+        if element_id in (EBML_SIMPLE_BLOCK, EBML_BLOCK):
+            blocks.append(payload)
+        elif current is not None:
+            if element_id == EBML_TRACK_NUMBER:
+                current['number'] = int.from_bytes(payload, 'big')
+            elif element_id == EBML_CODEC_ID:
+                current['codec'] = payload.decode('ascii', 'ignore')
+            elif element_id == EBML_CODEC_PRIVATE:
+                current['codec_private'] = bytes(payload)
+            elif element_id == EBML_CHANNELS:
+                current['channels'] = int.from_bytes(payload, 'big')
+        pos = body + size
+
+    track = next((t for t in tracks.values() if t.get('codec') == 'A_OPUS'), None)
+    if track is None:
+        raise AudioDecodeError('No Opus track in WebM')
+
+    packets = []
+    for block in blocks:
+        try:
+            number, frames = _block_frames(block)
+        except (AudioDecodeError, IndexError):
+            continue
+        if number == track.get('number', number):
+            packets.extend(bytes(f) for f in frames if f)
+
+    return {
+        'codec_private': track.get('codec_private'),
+        'channels': track.get('channels', 1),
+        'packets': packets,
+    }
+
+
+def opus_packet_samples(packet):
+    """Number of 48 kHz samples in an Opus packet, from its TOC byte"""
+    toc = packet[0]
+    config = toc >> 3
+    if config < 12:
+        frame = (480, 960, 1920, 2880)[config % 4]
+    elif config < 16:
+        frame = (480, 960)[config % 2]
+    else:
+        frame = (120, 240, 480, 960)[config % 4]
+    code = toc & 3
+    if code == 0:
+        count = 1
+    elif code < 3:
+        count = 2
+    else:
+        count = packet[1] & 0x3F if len(packet) > 1 else 0
+    return frame * count
+
+
+def ogg_crc(data):
+    """
+    Ogg page checksum (CRC-32, poly 0x04C11DB7, not reflected). Computed with
+    zlib's reflected CRC over bit-reversed bytes, so it runs in C.
+    """
+    raw = ~zlib.crc32(data.translate(_BIT_REVERSE), 0xFFFFFFFF) & 0xFFFFFFFF
+    return int(f'{raw:032b}'[::-1], 2)
+
+
+def _ogg_page(seq, granule, packets, header_type=0):
+    lacing = bytearray()
+    for packet in packets:
+        lacing.extend(b'\xff' * (len(packet) // 255))
+        lacing.append(len(packet) % 255)
+    page = bytearray(struct.pack('<4sBBqIIIB', b'OggS', 0, header_type, granule, OGG_SERIAL, seq, 0, len(lacing)))
+    page += lacing
+    for packet in packets:
+        page += packet
+    page[22:26] = struct.pack('<I', ogg_crc(bytes(page)))
+    return bytes(page)
+
+
+def webm_to_ogg(data):
+    """Re-wrap the Opus packets of a WebM recording as an Ogg Opus stream"""
+    track = demux_webm(data)
+    if not track['packets']:
+        raise AudioDecodeError('WebM contains no audio')
+
+    head = track['codec_private']
+    if not head or not head.startswith(b'OpusHead'):
+        head = b'OpusHead' + struct.pack('<BBHIhB', 1, track['channels'], 312, 48000, 0, 0)
+    vendor = b'english_learning'
+    tags = b'OpusTags' + struct.pack('<I', len(vendor)) + vendor + struct.pack('<I', 0)
+
+    pages = [_ogg_page(0, 0, [head], header_type=0x02), _ogg_page(1, 0, [tags])]
+    seq = 2
+    granule = 0
+    page_packets = []
+    page_lacing = 0
+    packets = track['packets']
+    for i, packet in enumerate(packets):
+        page_packets.append(packet)
+        page_lacing += len(packet) // 255 + 1
+        granule += opus_packet_samples(packet)
+        last = i == len(packets) - 1
+        if last or page_lacing + len(packets[i + 1]) // 255 + 1 > 255 or len(page_packets) >= 50:
+            pages.append(_ogg_page(seq, granule, page_packets, header_type=0x04 if last else 0))
+            seq += 1
+            page_packets = []
+            page_lacing = 0
+    return b''.join(pages)
+
+
+def decode_bytes(data):
+    """
+    Decode WAV/FLAC/Ogg/WebM-Opus bytes in-process to a mono float32 buffer
+    at the stream's native sample rate. Raises AudioDecodeError for anything
+    else so callers can fall back to librosa/audioread.
+    """
+    if data[:4] == b'\x1a\x45\xdf\xa3':
+        data = webm_to_ogg(data)
+    elif data[:4] not in (b'RIFF', b'OggS', b'fLaC'):
+        raise AudioDecodeError('Unsupported container')
+    try:
+        y, sr = sf.read(io.BytesIO(data), dtype='float32', always_2d=True)
+    except Exception as e:
+        raise AudioDecodeError(str(e))
+    return y.mean(axis=1), sr
@@ -0,0 +1,176 @@
+"""
+Fast quality pre-screen for uploaded speaking recordings
+"""
+import os
+import struct
+import tempfile
+import time
+import numpy as np
+from .audio_codec import AudioDecodeError, decode_bytes
+
+
+class AudioQualityChecker:
+    def __init__(self):
+        self.min_sample_rate = 16000
+        self.min_word_duration = 0.3      # seconds, Q1 single words
+        self.min_sentence_duration = 1.0  # seconds, Q2-Q5
+        self.max_duration = 60
+        self.silent_peak = 0.01           # ~ -40 dBFS
+        self.quiet_rms = 0.003
+        self.clip_level = 0.999
+        self.max_clip_ratio = 0.01
+        self.min_snr_db = 10
+        self.frame_ms = 20
+
+    def probe_header(self, data):
+        """Identify the container from its magic bytes and read WAV header fields"""
+        if data[:4] == b'RIFF' and data[8:12] == b'WAVE':
+            return self._probe_wav(data)
+        if data[:4] == b'\x1a\x45\xdf\xa3':
+            return {'format': 'webm'}
+        if data[:4] == b'OggS':
+            return {'format': 'ogg'}
+        if data[:4] == b'fLaC':
+            return {'format': 'flac'}
+        return {'format': 'unknown'}
+
+    def _probe_wav(self, data):
+        info = {'format': 'wav', 'truncated': False}
+        pos = 12
+        while pos + 8 <= len(data):
+            chunk_id, size = struct.unpack('<4sI', data[pos:pos + 8])
+            body = pos + 8
+            if chunk_id == b'fmt ' and size >= 16 and body + 16 <= len(data):
+                _, channels, sample_rate, _, _, bits = struct.unpack('<HHIIHH', data[body:body + 16])
+                info.update(channels=channels, sample_rate=sample_rate, bits=bits)
+            elif chunk_id == b'data':
+                # Streaming writers leave the size as 0 or 0xFFFFFFFF
+                if 0 < size < 0xFFFFFFFF:
+                    info['truncated'] = body + size > len(data)
+                info['data_offset'] = body
+                return info
+            pos = body + size + (size & 1)
+        info['truncated'] = True  # no data chunk
+        return info
+
+    def decode(self, data, fmt):
+        """Decode to a mono float32 buffer at the native sample rate"""
+        if fmt in ('wav', 'flac', 'ogg', 'webm'):
+            try:
+                return decode_bytes(data)
+            except AudioDecodeError:
+                if fmt in ('wav', 'flac'):
+                    raise
+
+        # Anything the in-process decoder cannot read goes through librosa/audioread
+        import librosa
+        with tempfile.NamedTemporaryFile(suffix=f'.{fmt}', delete=False) as tmp:
+            tmp.write(data)
+        try:
+            y, sr = librosa.load(tmp.name, sr=None, mono=True)
+        finally:
+            os.unlink(tmp.name)
+        return y.astype(np.float32, copy=False), sr
+
+    def measure(self, y, sr):
+        """Level, clipping and SNR metrics computed with NumPy"""
+        if len(y) == 0:
+            return {'duration': 0.0, 'peak': 0.0, 'rms': 0.0, 'clip_ratio': 0.0, 'snr_db': 0.0}
+
+        abs_y = np.abs(y)
+        frame = max(1, int(sr * self.frame_ms / 1000))
+        n_frames = len(y) // frame
+        if n_frames >= 2:
+            energy = np.mean(y[:n_frames * frame].reshape(n_frames, frame) ** 2, axis=1)
+            noise = np.percentile(energy, 10)
+            signal = np.percentile(energy, 90)
+            snr_db = 10 * np.log10((signal + 1e-12) / (noise + 1e-12))
+        else:
+            snr_db = 0.0
+
+        return {
+            'duration': round(len(y) / sr, 3),
+            'peak': round(float(abs_y.max()), 4),
+            'rms': round(float(np.sqrt(np.mean(y ** 2))), 4),
+            'clip_ratio': round(float(np.mean(abs_y >= self.clip_level)), 4),
+            'snr_db': round(float(snr_db), 1),
+        }
+
+    def check(self, data, is_word=False, decoded=None):
+        """
+        Validate an uploaded recording. Returns a report with ``ok`` (False when
+        the clip should be re-recorded), blocking ``issues``, non-blocking
+        ``warnings`` and the raw ``metrics``. ``decoded`` is an optional
+        ``(y, sr)`` pair when the caller has already decoded the bytes.
+        """
+        return self.check_decoded(data, is_word, decoded)[0]
+
+    def check_decoded(self, data, is_word=False, decoded=None):
+        """Like check(), but returns ``(report, (y, sr))``; the pair is None if the clip was never decoded"""
+        start = time.perf_counter()
+        issues = []
+        warnings = []
+        metrics = {'bytes': len(data)}
+
+        def report():
+            metrics['elapsed_ms'] = round((time.perf_counter() - start) * 1000, 2)
+            return {'ok': not issues, 'issues': issues, 'warnings': warnings, 'metrics': metrics}, decoded
+
+        if len(data) < 44:
+            issues.append({'code': 'empty', 'message': 'No audio was received. Please record again.'})
+            return report()
+
+        header = self.probe_header(data)
+        metrics.update(header)
+        if header['format'] == 'unknown':
+            issues.append({'code': 'unsupported_format', 'message': 'Unsupported audio format. Please record again in the browser.'})
+            return report()
+        if header.get('truncated'):
+            issues.append({'code': 'truncated', 'message': 'The recording upload was cut off. Please record again.'})
+            return report()
+        if header.get('sample_rate') and header['sample_rate'] < self.min_sample_rate:
+            issues.append({'code': 'low_sample_rate', 'message': f"Recording quality is too low ({header['sample_rate']} Hz). Please use a different microphone."})
+            return report()
+
+        try:
+            if decoded is None:
+                decoded = self.decode(data, header['format'])
+            y, sr = decoded
+        except Exception as e:
+            print(f"Audio pre-screen decode error: {e}")
+            issues.append({'code': 'unreadable', 'message': 'The recording could not be read. Please record again.'})
+            return report()
+
+        metrics['sample_rate'] = sr
+        metrics.update(self.measure(y, sr))
+
+        min_duration = self.min_word_duration if is_word else self.min_sentence_duration
+        if metrics['duration'] < min_duration:
+            issues.append({'code': 'too_short', 'message': 'The recording is too short. Please speak the full answer.'})
+        elif metrics['duration'] > self.max_duration:
+            issues.append({'code': 'too_long', 'message': 'The recording is too long. Please keep your answer under a minute.'})
+
+        if metrics['peak'] < self.silent_peak:
+            issues.append({'code': 'silent', 'message': 'No speech was detected. Check your microphone and record again.'})
+        elif metrics['rms'] < self.quiet_rms:
+            warnings.append({'code': 'too_quiet', 'message': 'Your voice is very quiet. Speak closer to the microphone.'})
+
+        if metrics['clip_ratio'] > self.max_clip_ratio:
+            warnings.append({'code': 'clipped', 'message': 'Your recording is distorted. Speak a little further from the microphone.'})
+        if not issues and metrics['snr_db'] < self.min_snr_db:
+            warnings.append({'code': 'noisy', 'message': 'There is a lot of background noise. Try a quieter place.'})
+
+        return report()
+
+    def check_upload(self, uploaded_file, is_word=False):
+        """
+        Run check() on a Django UploadedFile and rewind it for saving. Returns
+        ``(report, (y, sr))`` so the decoded audio can be reused when storing.
+        """
+        data = uploaded_file.read()
+        uploaded_file.seek(0)
+        return self.check_decoded(data, is_word=is_word)
+
+
+# Create singleton instance
+audio_quality_checker = AudioQualityChecker()
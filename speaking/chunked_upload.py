@@ -0,0 +1,243 @@
+"""
+Resumable chunked recording uploads with decoding that starts before commit.
+
+Uploads that are never committed (the streamed transcript was used instead,
+the student re-recorded or closed the tab) are cancelled by the page when it
+can, and otherwise removed by sweep_stale_uploads().
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+import numpy as np
+from django.conf import settings
+from django.utils import timezone
+from .audio_quality import audio_quality_checker
+from .models import RecordingUpload
+
+MAX_UPLOAD_BYTES = 20 * 1024 * 1024
+
+# Uncommitted uploads older than this are abandoned
+STALE_UPLOAD_AGE = timedelta(hours=2)
+SWEEP_INTERVAL_SECONDS = 600
+
+# Decoders kept per process, least recently used first; an evicted one is
+# rebuilt from the partial file if its upload carries on
+MAX_DECODERS = 32
+
+# Background decoding of compressed uploads while chunks are still arriving
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='upload-decode')
+_decoders = OrderedDict()
+_decoders_lock = threading.Lock()
+_last_sweep = 0
+
+
+def partial_path(upload_id):
+    """Where the bytes of an uncommitted upload are appended"""
+    return os.path.join(settings.MEDIA_ROOT, 'recordings', 'partial', f'{upload_id}.part')
+
+
+class IncrementalDecoder:
+    """
+    Decodes an upload as its chunks arrive. 16-bit PCM WAV is converted frame
+    by frame as bytes come in; other containers (the browser's WebM/Opus) are
+    re-decoded in the background from the prefix received so far, so commit
+    only pays for a decode if bytes arrived after the last background pass.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.mode = None          # 'pcm' or 'container'
+        self.format = None
+        self.head = b''
+        self.pending = b''
+        self.blocks = []
+        self.channels = 1
+        self.sample_rate = None
+        self.received = 0
+        self.buffer = None
+        self.decoded_bytes = 0
+        self.future = None
+        self.dirty = False
+
+    def feed(self, chunk):
+        with self.lock:
+            self.received += len(chunk)
+            if self.mode is None:
+                self.head += chunk
+                if not self._detect():
+                    return
+                chunk = self.head[self.data_offset:] if self.mode == 'pcm' else b''
+                self.head = b''
+
+            if self.mode == 'pcm':
+                self._feed_pcm(chunk)
+            else:
+                self._schedule()
+
+    def _detect(self):
+        if len(self.head) < 12:
+            return False
+        header = audio_quality_checker.probe_header(self.head)
+        self.format = header['format']
+        if self.format == 'wav' and 'data_offset' not in header and len(self.head) < 4096:
+            return False  # wait for the data chunk header
+        if self.format == 'wav' and header.get('bits') == 16 and 'data_offset' in header:
+            self.mode = 'pcm'
+            self.channels = header.get('channels') or 1
+            self.sample_rate = header.get('sample_rate')
+            self.data_offset = header['data_offset']
+        else:
+            self.mode = 'container'
+        return True
+
+    def _feed_pcm(self, chunk):
+        data = self.pending + chunk
+        frame_bytes = 2 * self.channels
+        usable = len(data) - len(data) % frame_bytes
+        if usable:
+            samples = np.frombuffer(data[:usable], dtype='<i2').astype(np.float32) / 32768.0
+            self.blocks.append(samples.reshape(-1, self.channels).mean(axis=1))
+        self.pending = data[usable:]
+
+    def _schedule(self):
+        if self.future is not None and not self.future.done():
+            self.dirty = True
+            return
+        self.future = _executor.submit(self._refresh)
+
+    def _refresh(self):
+        while True:
+            with self.lock:
+                self.dirty = False
+                received = self.received
+            try:
+                with open(self.path, 'rb') as f:
+                    data = f.read(received)
+                y, sr = audio_quality_checker.decode(data, self.format)
+                with self.lock:
+                    self.buffer, self.sample_rate, self.decoded_bytes = y, sr, len(data)
+            except Exception:
+                pass  # a prefix cut mid-frame may not decode yet
+            with self.lock:
+                if not self.dirty:
+                    return
+
+    def finish(self):
+        """Return the fully decoded ``(y, sr)``, or None if it cannot be decoded"""
+        future = self.future
+        if future is not None:
+            future.result()
+
+        with self.lock:
+            if self.mode == 'pcm':
+                y = np.concatenate(self.blocks) if self.blocks else np.zeros(0, dtype=np.float32)
+                return y, self.sample_rate
+            if self.buffer is not None and self.decoded_bytes == self.received:
+                return self.buffer, self.sample_rate
+            fmt = self.format
+
+        try:
+            with open(self.path, 'rb') as f:
+                data = f.read(self.received)
+            return audio_quality_checker.decode(data, fmt or audio_quality_checker.probe_header(data)['format'])
+        except Exception as e:
+            print(f"Chunked upload decode error: {e}")
+            return None
+
+
+def get_decoder(upload_id, received_bytes=0):
+    """
+    Decoder for an upload in this process. Chunks may have been handled by
+    another worker, so a new decoder first catches up from the partial file.
+    """
+    with _decoders_lock:
+        decoder = _decoders.get(upload_id)
+        if decoder is not None and decoder.received == received_bytes:
+            _decoders.move_to_end(upload_id)
+            return decoder
+        decoder = IncrementalDecoder(partial_path(upload_id))
+        _decoders[upload_id] = decoder
+        while len(_decoders) > MAX_DECODERS:
+            _decoders.popitem(last=False)
+
+    if received_bytes:
+        with open(decoder.path, 'rb') as f:
+            decoder.feed(f.read(received_bytes))
+    return decoder
+
+
+def pop_decoder(upload_id, received_bytes=0):
+    decoder = get_decoder(upload_id, received_bytes)
+    with _decoders_lock:
+        _decoders.pop(upload_id, None)
+    return decoder
+
+
+def read_upload(upload):
+    """
+    The committed bytes of an upload. A chunk that lost the race for its
+    offset may have written past them, so only ``received_bytes`` are read.
+    """
+    with open(partial_path(upload.upload_id), 'rb') as f:
+        return f.read(upload.received_bytes)
+
+
+def discard_upload(upload):
+    """Delete an uncommitted upload: its decoder, partial file and row"""
+    with _decoders_lock:
+        _decoders.pop(upload.upload_id, None)
+    try:
+        os.remove(partial_path(upload.upload_id))
+    except FileNotFoundError:
+        pass
+    upload.delete()
+
+
+def sweep_stale_uploads(max_age=STALE_UPLOAD_AGE):
+    """
+    Discard uncommitted uploads older than ``max_age``, and partial files no
+    upload row points at. Returns how many uploads and files were removed.
+    """
+    cutoff = timezone.now() - max_age
+    uploads = 0
+    for upload in RecordingUpload.objects.filter(committed_at__isnull=True, created_at__lt=cutoff):
+        discard_upload(upload)
+        uploads += 1
+
+    files = 0
+    directory = os.path.dirname(partial_path('x'))
+    try:
+        names = os.listdir(directory)
+    except FileNotFoundError:
+        names = []
+    for name in names:
+        path = os.path.join(directory, name)
+        upload_id = name[:-len('.part')] if name.endswith('.part') else None
+        try:
+            if os.path.getmtime(path) >= cutoff.timestamp():
+                continue
+            if upload_id and RecordingUpload.objects.filter(upload_id=upload_id, committed_at__isnull=True).exists():
+                continue
+            os.remove(path)
+            files += 1
+        except FileNotFoundError:
+            pass
+    return uploads, files
+
+
+def maybe_sweep_stale_uploads():
+    """Run the sweep from request handling at most every SWEEP_INTERVAL_SECONDS per process"""
+    global _last_sweep
+    now = time.monotonic()
+    if _last_sweep and now - _last_sweep < SWEEP_INTERVAL_SECONDS:
+        return
+    _last_sweep = now
+    try:
+        uploads, files = sweep_stale_uploads()
+        if uploads or files:
+            print(f"🧹 Removed {uploads} abandoned uploads and {files} partial files")
+    except Exception as e:
+        print(f"⚠️ Upload sweep failed: {e}")
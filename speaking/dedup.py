@@ -0,0 +1,104 @@
+"""
+Content-addressed storage for speaking recordings.
+
+Uploads are hashed on ingestion; identical bytes are stored once and shared
+through a reference-counted RecordingBlob. The same take submitted for two
+different answers in one session is flagged as a SuspiciousActivity.
+"""
+import hashlib
+from django.core.files.base import ContentFile
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from .models import RecordingBlob, SpeakingRecording, SuspiciousActivity
+from .storage import recording_storage
+
+# Attempts to register a new blob while identical uploads race for the hash
+MAX_STORE_ATTEMPTS = 3
+
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def _acquire(digest):
+    """Take a reference on an existing blob; returns its storage name or None"""
+    blob = RecordingBlob.objects.filter(content_hash=digest).first()
+    if blob is None or not recording_storage.exists(blob.path[len('recordings/'):]):
+        return None
+    # A blob whose last reference was just dropped is about to be deleted
+    if not RecordingBlob.objects.filter(pk=blob.pk, ref_count__gt=0).update(ref_count=F('ref_count') + 1):
+        return None
+    return blob.path[len('recordings/'):]
+
+
+def store_recording(name, data):
+    """
+    Store upload bytes once per content hash. Returns ``(saved_name, digest)``
+    with saved_name relative to MEDIA_ROOT/recordings, like recording_storage.
+    """
+    digest = content_hash(data)
+    saved_name = _acquire(digest)
+    if saved_name:
+        return saved_name, digest
+
+    saved_name = recording_storage.save(name, ContentFile(data))
+    size = recording_storage.size(saved_name)
+    for _ in range(MAX_STORE_ATTEMPTS):
+        try:
+            with transaction.atomic():
+                RecordingBlob.objects.filter(content_hash=digest, ref_count=0).delete()
+                RecordingBlob.objects.create(
+                    content_hash=digest,
+                    path=f'recordings/{saved_name}',
+                    size=size,
+                    ref_count=1
+                )
+            return saved_name, digest
+        except IntegrityError:
+            # An identical upload won the race; share its file instead
+            existing = _acquire(digest)
+            if existing:
+                recording_storage.delete(saved_name)
+                return existing, digest
+            # Its blob was released (or its file is gone) meanwhile; try to take the hash again
+
+    # Never keep a file no blob counts references to
+    recording_storage.delete(saved_name)
+    raise RuntimeError(f'Could not store recording {digest[:12]}; please try again')
+
+
+def release_recording(path):
+    """Drop one reference to a stored file and delete it once unreferenced"""
+    blob = RecordingBlob.objects.filter(path=path).first()
+    if blob is None:
+        return  # files stored before deduplication are left alone
+    with transaction.atomic():
+        RecordingBlob.objects.filter(pk=blob.pk, ref_count__gt=0).update(ref_count=F('ref_count') - 1)
+        deleted, _ = RecordingBlob.objects.filter(pk=blob.pk, ref_count=0).delete()
+    if deleted and not SpeakingRecording.objects.filter(path=path).exists():
+        recording_storage.delete(path[len('recordings/'):])
+
+
+def attach_recording(test_session, question, word_num, saved_name, digest, duration=None, **fields):
+    """
+    Point an answer at a stored file, release the file it replaces and flag
+    the same take being reused for another answer in the session.
+    """
+    path = f'recordings/{saved_name}'
+    recording, previous_path = SpeakingRecording.attach(
+        test_session, question, word_num, path, content_hash=digest, duration=duration, **fields
+    )
+    # store_recording took a reference for this row, so the old one goes even if unchanged
+    if previous_path:
+        release_recording(previous_path)
+
+    duplicates = test_session.recordings.filter(content_hash=digest).exclude(pk=recording.pk)
+    if digest and duplicates.exists():
+        SuspiciousActivity.objects.create(
+            user=test_session.user,
+            session_key=test_session.session_id,
+            activity_type='duplicate_recording',
+            question=question,
+            test_type='speaking'
+        )
+    return recording
@@ -0,0 +1,60 @@
+"""
+Persisted MFCC/delta feature arrays for speaking recordings.
+
+Features are stored once per recording as float16 .npy files under
+MEDIA_ROOT/features, mirroring the recording's shard directories, and are
+opened with memory mapping so rescoring (DTW only) never decodes audio.
+"""
+import os
+import numpy as np
+from django.conf import settings
+
+FEATURE_DTYPE = np.float16
+
+
+class FeatureStore:
+    def __init__(self, root=None):
+        self.root = root or settings.MEDIA_ROOT
+
+    def path_for(self, recording_path):
+        """features/<shard>/<stem>.npy for recordings/<shard>/<name>, relative to MEDIA_ROOT"""
+        name = recording_path[len('recordings/'):] if recording_path.startswith('recordings/') else os.path.basename(recording_path)
+        return f'features/{os.path.splitext(name)[0]}.npy'
+
+    def full_path(self, features_path):
+        return os.path.join(self.root, features_path)
+
+    def save(self, recording_path, features):
+        """Write the feature matrix next to the recording and return its relative path"""
+        features_path = self.path_for(recording_path)
+        full_path = self.full_path(features_path)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+
+        # Write-then-rename so readers never map a partially written file
+        tmp_path = f'{full_path}.tmp'
+        with open(tmp_path, 'wb') as f:
+            np.save(f, np.ascontiguousarray(features, dtype=FEATURE_DTYPE))
+        os.replace(tmp_path, full_path)
+        return features_path
+
+    def load(self, features_path):
+        """Memory-map a stored feature matrix, or return None if it is missing"""
+        if not features_path:
+            return None
+        try:
+            return np.load(self.full_path(features_path), mmap_mode='r')
+        except (OSError, ValueError):
+            return None
+
+    def size(self, features_path):
+        try:
+            return os.path.getsize(self.full_path(features_path))
+        except OSError:
+            return 0
+
+    def delete(self, features_path):
+        if features_path and os.path.exists(self.full_path(features_path)):
+            os.remove(self.full_path(features_path))
+
+
+feature_store = FeatureStore()
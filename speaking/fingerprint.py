@@ -0,0 +1,160 @@
+"""
+Acoustic fingerprints for detecting replayed or shared recordings.
+
+Each clip is reduced to spectral-peak landmarks: pairs of prominent
+time-frequency peaks hashed as (f1, f2, dt). The hashes survive being played
+through a speaker and re-recorded, unlike a content hash. They are stored in
+an inverted index (RecordingFingerprint, indexed by prompt and hash), so a
+new clip is matched against every earlier clip for the same prompt with one
+indexed lookup per clip instead of a scan.
+"""
+from collections import Counter, defaultdict
+import numpy as np
+from scipy.ndimage import maximum_filter
+from .audio_codec import decode_bytes
+from .models import RecordingFingerprint, SpeakingRecording, SuspiciousActivity
+
+WINDOW_SECONDS = 0.064      # 1024 samples at 16 kHz; bin width is 15.6 Hz at any rate
+MAX_FREQ = 4000             # speech band; the mic path distorts little below this
+PEAK_NEIGHBOURHOOD = (7, 15)  # frames x bins a peak must dominate
+PEAKS_PER_SECOND = 20
+FAN_OUT = 6                 # targets paired with each anchor peak
+MAX_DT = 63                 # frames (~2 s) between anchor and target
+
+# A match needs this many hashes agreeing on one time offset...
+MIN_ALIGNED = 8
+# ...covering at least this share of the new clip's hashes
+MIN_ALIGNED_RATIO = 0.1
+
+# Hashes per IN (...) lookup, well below SQLite's bound-parameter limit
+LOOKUP_CHUNK = 500
+
+
+def landmarks(y, sr):
+    """Return ``[(hash, frame), ...]`` for a mono buffer at any sample rate"""
+    n_fft = int(round(sr * WINDOW_SECONDS))
+    hop = n_fft // 2
+    if len(y) < n_fft * 4:
+        return []
+
+    frames = np.lib.stride_tricks.sliding_window_view(y, n_fft)[::hop] * np.hanning(n_fft)
+    max_bin = int(MAX_FREQ * n_fft / sr)
+    spec = np.log(np.abs(np.fft.rfft(frames, axis=1))[:, 1:max_bin + 1] + 1e-6)
+
+    # Local maxima that stand out from the clip's own background level
+    is_peak = (maximum_filter(spec, size=PEAK_NEIGHBOURHOOD) == spec) & (spec > np.median(spec) + 2.0)
+    times, bins = np.nonzero(is_peak)
+    if len(times) < 2:
+        return []
+
+    # Keep the strongest peaks so hash density doesn't depend on the mic gain
+    limit = max(2, int(len(y) / sr * PEAKS_PER_SECOND))
+    if len(times) > limit:
+        keep = np.argsort(spec[times, bins])[-limit:]
+        times, bins = times[keep], bins[keep]
+    order = np.lexsort((bins, times))
+    times, bins = times[order], bins[order] // 2  # 31 Hz bins tolerate small pitch/rate drift
+
+    hashes = []
+    for i in range(len(times)):
+        paired = 0
+        for j in range(i + 1, len(times)):
+            dt = times[j] - times[i]
+            if dt > MAX_DT:
+                break
+            if dt < 1:
+                continue
+            hashes.append((int(bins[i]) << 14 | int(bins[j]) << 6 | int(dt), int(times[i])))
+            paired += 1
+            if paired >= FAN_OUT:
+                break
+    return hashes
+
+
+def best_matches(hashes, postings):
+    """
+    Score candidate clips from index rows ``(clip_id, hash, frame)``. A true
+    replay has many hashes agreeing on a single time offset; different
+    speakers reading the same prompt only share scattered hashes.
+    """
+    query = defaultdict(list)
+    for h, frame in hashes:
+        query[h].append(frame)
+
+    votes = Counter()
+    for clip_id, h, frame in postings:
+        for query_frame in query.get(h, ()):
+            votes[(clip_id, frame - query_frame)] += 1
+
+    best = {}
+    for (clip_id, _), count in votes.items():
+        best[clip_id] = max(best.get(clip_id, 0), count)
+
+    needed = max(MIN_ALIGNED, int(len(hashes) * MIN_ALIGNED_RATIO))
+    return sorted(
+        ((clip_id, count) for clip_id, count in best.items() if count >= needed),
+        key=lambda item: -item[1]
+    )
+
+
+def index_recording(recording, decoded=None, data=None):
+    """
+    Fingerprint a newly attached recording, match it against earlier clips
+    of the same prompt from other students, log matches as
+    SuspiciousActivity and add the clip to the index. Returns the matches
+    as ``[(recording_id, aligned_hashes), ...]``.
+    """
+    try:
+        y, sr = decoded if decoded is not None else decode_bytes(data)
+        hashes = landmarks(y, sr)
+    except Exception as e:
+        print(f"Fingerprinting skipped: {e}")
+        return []
+
+    # A re-recorded answer replaces its old fingerprints
+    RecordingFingerprint.objects.filter(recording=recording).delete()
+    if not hashes:
+        return []
+
+    test_session = recording.test_session
+    candidates = RecordingFingerprint.objects.filter(
+        question=recording.question, word_num=recording.word_num
+    ).exclude(recording__test_session=test_session)
+    if test_session.user_id:
+        candidates = candidates.exclude(recording__test_session__user_id=test_session.user_id)
+
+    unique = sorted({h for h, _ in hashes})
+    postings = []
+    for i in range(0, len(unique), LOOKUP_CHUNK):
+        postings.extend(candidates.filter(hash__in=unique[i:i + LOOKUP_CHUNK]).values_list(
+            'recording_id', 'hash', 'offset'
+        ))
+    matches = best_matches(hashes, postings)
+
+    RecordingFingerprint.objects.bulk_create([
+        RecordingFingerprint(
+            recording=recording, question=recording.question, word_num=recording.word_num,
+            hash=h, offset=frame
+        ) for h, frame in hashes
+    ])
+
+    if matches:
+        print(f"⚠️ Recording {recording.pk} matches earlier recordings {matches}")
+        matched = SpeakingRecording.objects.filter(pk__in=[pk for pk, _ in matches]).select_related('test_session')
+        activities = [SuspiciousActivity(
+            user=test_session.user,
+            session_key=test_session.session_id,
+            activity_type='replayed_recording',
+            question=recording.question,
+            test_type='speaking'
+        )]
+        for other in matched:
+            activities.append(SuspiciousActivity(
+                user=other.test_session.user,
+                session_key=other.test_session.session_id,
+                activity_type='shared_recording',
+                question=other.question,
+                test_type='speaking'
+            ))
+        SuspiciousActivity.objects.bulk_create(activities)
+    return matches
@@ -0,0 +1,143 @@
+"""
+Prosody and fluency feature extraction for speaking recordings
+"""
+import numpy as np
+from scipy.signal import find_peaks
+
+try:
+    import parselmouth
+    PARSELMOUTH_AVAILABLE = True
+except (ImportError, ModuleNotFoundError) as e:
+    PARSELMOUTH_AVAILABLE = False
+    print(f"⚠️ parselmouth not available: {e}")
+    print("⚠️ Fluency will fall back to transcript-only scoring")
+
+
+class FluencyAnalyzer:
+    def __init__(self):
+        self.time_step = 0.01
+        self.pitch_floor = 75
+        self.pitch_ceiling = 500
+        self.silence_db = 25          # dB below the loudest frames counted as silence
+        self.min_dip_db = 2           # intensity dip separating two syllable nuclei
+        self.min_pause = 0.25         # seconds
+        self.long_pause = 0.5         # seconds
+        self.target_rate = (2.5, 5.5)  # syllables per second for read-aloud speech
+
+    def analyze(self, y, sr):
+        """
+        Compute pitch, intensity, pause and speech-rate statistics from an
+        already decoded mono buffer. One pitch and one intensity track are
+        computed and every statistic is derived from those two contours.
+        """
+        if not PARSELMOUTH_AVAILABLE or y is None or len(y) < sr * 0.1:
+            return {}
+
+        try:
+            sound = parselmouth.Sound(np.asarray(y, dtype=np.float64), sampling_frequency=sr)
+            pitch = sound.to_pitch(
+                time_step=self.time_step,
+                pitch_floor=self.pitch_floor,
+                pitch_ceiling=self.pitch_ceiling
+            )
+            intensity = sound.to_intensity(minimum_pitch=self.pitch_floor, time_step=self.time_step)
+        except Exception as e:
+            print(f"Fluency analysis error: {e}")
+            return {}
+
+        db = intensity.values[0]
+        times = intensity.xs()
+        if len(db) < 3:
+            return {}
+
+        f0 = pitch.selected_array['frequency']
+        voiced_f0 = f0[f0 > 0]
+        voiced = np.interp(times, pitch.xs(), (f0 > 0).astype(float)) > 0.5
+
+        # Speech/silence split relative to the loudest frames
+        threshold = np.percentile(db, 99) - self.silence_db
+        speech = db > threshold
+        speech_idx = np.flatnonzero(speech)
+        if len(speech_idx) == 0:
+            return {}
+
+        frame = times[1] - times[0] if len(times) > 1 else self.time_step
+        start, end = speech_idx[0], speech_idx[-1]
+        speaking_time = (end - start + 1) * frame
+        phonation_time = speech[start:end + 1].sum() * frame
+
+        # Internal pauses (leading and trailing silence are ignored)
+        pauses = []
+        run = 0
+        for is_speech in speech[start:end + 1]:
+            if is_speech:
+                if run * frame >= self.min_pause:
+                    pauses.append(run * frame)
+                run = 0
+            else:
+                run += 1
+        pauses = np.array(pauses)
+
+        # Syllable nuclei: voiced intensity peaks above the silence threshold
+        peaks, _ = find_peaks(
+            db,
+            height=threshold,
+            prominence=self.min_dip_db,
+            distance=max(1, int(0.05 / frame))
+        )
+        nuclei = int(np.sum(voiced[peaks])) if len(peaks) else 0
+
+        if len(voiced_f0) > 1:
+            semitones = 12 * np.log2(voiced_f0 / np.median(voiced_f0))
+            pitch_std_st = float(np.std(semitones))
+        else:
+            pitch_std_st = 0.0
+
+        return {
+            'duration': round(float(sound.duration), 3),
+            'speaking_time': round(float(speaking_time), 3),
+            'phonation_time': round(float(phonation_time), 3),
+            'pitch_mean': round(float(np.mean(voiced_f0)), 2) if len(voiced_f0) else 0.0,
+            'pitch_std_semitones': round(pitch_std_st, 3),
+            'voiced_ratio': round(float(np.mean(voiced[start:end + 1])), 3),
+            'intensity_mean': round(float(np.mean(db[speech])), 2),
+            'intensity_std': round(float(np.std(db[speech])), 2),
+            'syllable_count': nuclei,
+            'speech_rate': round(nuclei / speaking_time, 3) if speaking_time > 0 else 0.0,
+            'articulation_rate': round(nuclei / phonation_time, 3) if phonation_time > 0 else 0.0,
+            'pause_count': int(len(pauses)),
+            'long_pause_count': int(np.sum(pauses >= self.long_pause)) if len(pauses) else 0,
+            'mean_pause': round(float(np.mean(pauses)), 3) if len(pauses) else 0.0,
+            'pause_ratio': round(float(pauses.sum() / speaking_time), 3) if speaking_time > 0 else 0.0,
+        }
+
+    def fluency_factor(self, features):
+        """
+        Map prosody features to a 0-1 multiplier for the per-word fluency marks.
+        Missing features give 1.0 so scoring matches the transcript-only rules.
+        """
+        if not features or not features.get('syllable_count'):
+            return 1.0
+
+        low, high = self.target_rate
+        rate = features.get('speech_rate', 0)
+        if rate < low:
+            factor = max(0.5, 1 - (low - rate) * 0.25)
+        elif rate > high:
+            factor = max(0.5, 1 - (rate - high) * 0.25)
+        else:
+            factor = 1.0
+
+        # Hesitations inside the utterance
+        factor -= min(0.4, features.get('long_pause_count', 0) * 0.1)
+        factor -= min(0.2, max(0, features.get('pause_ratio', 0) - 0.2))
+
+        # Flat, monotone delivery
+        if features.get('pitch_std_semitones', 0) < 1.0:
+            factor -= 0.1
+
+        return round(max(0.0, min(1.0, factor)), 3)
+
+
+# Create singleton instance
+fluency_analyzer = FluencyAnalyzer()
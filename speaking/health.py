@@ -0,0 +1,105 @@
+"""
+Liveness and readiness probes for load balancers and orchestration.
+
+/healthz only says the process is serving requests. /readyz says whether
+this worker can score a test: warm-up has run a transcription, the Q1
+reference features are loaded and the database answers. It returns 503
+until then, so traffic is only routed to warmed workers.
+
+LanguageTool only grades speaking Q5, so an outage is reported under
+"degraded" without taking the worker (and every other test) out of
+rotation. Its probe is a live check, so the result is reused for a minute.
+"""
+import time
+from django.db import connection
+from django.http import JsonResponse
+from .pronunciation_engine import pronunciation_engine, grammar_tool, model_status
+from .scoring_queue import queue_depth
+from .singleflight import scoring_flight
+
+
+def _probe(check):
+    """Run one dependency check and time it"""
+    started = time.perf_counter()
+    try:
+        detail = check()
+        ok = True
+    except Exception as e:
+        detail, ok = str(e), False
+    result = {'ok': ok, 'ms': round((time.perf_counter() - started) * 1000, 1)}
+    if detail is not None:
+        result['detail'] = detail
+    return result
+
+
+def _database():
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT 1')
+        cursor.fetchone()
+
+
+def _language_tool():
+    grammar_tool.check('This is a test.')
+
+
+LANGUAGE_TOOL_PROBE_SECONDS = 60
+_language_tool_probe = {'at': None, 'result': None}
+def _language_tool_status():
+    """The LanguageTool probe, re-run at most once a minute per process"""
+    now = time.monotonic()
+    if _language_tool_probe['at'] is None or now - _language_tool_probe['at'] >= LANGUAGE_TOOL_PROBE_SECONDS:
+        _language_tool_probe['result'] = _probe(_language_tool)
+        _language_tool_probe['at'] = now
+    return _language_tool_probe['result']
+
+
+ASR_RETRY_SECONDS = 60
+_asr_retry = {'at': None}
+def _asr_error(warm_up):
+    """
+    The warm-up's ASR error. While the model is failing, only the ASR check
+    is retried, and at most once a minute, rather than a full warm-up per probe.
+    """
+    now = time.monotonic()
+    if warm_up['asr_error'] and (_asr_retry['at'] is None or now - _asr_retry['at'] >= ASR_RETRY_SECONDS):
+        _asr_retry['at'] = now
+        warm_up['asr_error'] = pronunciation_engine.check_asr()
+    return warm_up['asr_error']
+
+
+def healthz(request):
+    return JsonResponse({'status': 'ok'})
+
+
+def readyz(request):
+    warm_up = pronunciation_engine.last_warm_up
+    if warm_up is None:
+        # SPEAKING_WARM_UP is off: the first probe warms this worker instead of a student
+        warm_up = pronunciation_engine.warm_up()
+        _asr_retry['at'] = time.monotonic()
+    asr_error = _asr_error(warm_up)
+
+    database = _probe(_database)
+    checks = {
+        'asr_model': {'ok': not asr_error, 'error': asr_error, **model_status},
+        'reference_features': {'ok': pronunciation_engine.references_loaded()},
+        'database': database,
+    }
+    language_tool = _language_tool_status()
+    degraded = [] if language_tool['ok'] else ['language_tool']
+    queue = {'in_process': scoring_flight.in_flight()}
+    if database['ok']:
+        queue['queued'] = _probe(queue_depth).get('detail')
+
+    ready = all(check['ok'] for check in checks.values())
+    return JsonResponse(
+        {
+            'status': 'ready' if ready else 'not ready',
+            'checks': checks,
+            'warm_up': warm_up,
+            'degraded': degraded,
+            'language_tool': language_tool,
+            'scoring_queue': queue,
+        },
+        status=200 if ready else 503
+    )
@@ -0,0 +1,110 @@
+import glob
+import io
+import os
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+TARGET_SR = 16000
+
+
+class Command(BaseCommand):
+    help = "Compare upload size and decode throughput of WebM/Opus recordings against WAV"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'paths', nargs='*',
+            help='WebM-Opus recordings to benchmark (defaults to the WebM files under media/recordings)'
+        )
+        parser.add_argument('--repeat', type=int, default=3, help='Runs per clip')
+        parser.add_argument('--no-fallback', action='store_true', help='Skip the librosa/audioread decode')
+
+    def handle(self, *args, **options):
+        import librosa
+        import soundfile as sf
+        from speaking.audio_codec import decode_bytes, webm_to_ogg
+
+        paths = options['paths'] or sorted(
+            glob.glob(os.path.join(settings.MEDIA_ROOT, 'recordings', '**', '*'), recursive=True)
+        )
+        clips = []
+        for path in paths:
+            if os.path.isfile(path):
+                with open(path, 'rb') as f:
+                    data = f.read()
+                if data[:4] == b'\x1a\x45\xdf\xa3':
+                    clips.append((path, data))
+        if not clips:
+            self.stderr.write("No WebM recordings found")
+            return
+
+        repeat = max(1, options['repeat'])
+        sizes = {'webm': 0, 'ogg': 0, 'wav': 0}
+        times = {'webm': 0.0, 'wav': 0.0, 'fallback': 0.0}
+        audio_seconds = 0.0
+
+        for path, data in clips:
+            ogg = webm_to_ogg(data)
+            y, sr = decode_bytes(data)
+            y = librosa.resample(y, orig_sr=sr, target_sr=TARGET_SR)
+            wav = io.BytesIO()
+            sf.write(wav, y, TARGET_SR, format='WAV', subtype='PCM_16')
+            wav = wav.getvalue()
+
+            sizes['webm'] += len(data)
+            sizes['ogg'] += len(ogg)
+            sizes['wav'] += len(wav)
+            audio_seconds += len(y) / TARGET_SR
+
+            for _ in range(repeat):
+                t0 = time.perf_counter()
+                y, sr = decode_bytes(data)
+                librosa.resample(y, orig_sr=sr, target_sr=TARGET_SR)
+                t1 = time.perf_counter()
+                sf.read(io.BytesIO(wav), dtype='float32')
+                t2 = time.perf_counter()
+                times['webm'] += t1 - t0
+                times['wav'] += t2 - t1
+
+            if not options['no_fallback']:
+                with tempfile.NamedTemporaryFile(suffix='.webm', delete=False) as tmp:
+                    tmp.write(data)
+                try:
+                    t0 = time.perf_counter()
+                    librosa.load(tmp.name, sr=TARGET_SR, mono=True)
+                    times['fallback'] += (time.perf_counter() - t0) * repeat
+                except Exception as e:
+                    self.stderr.write(f"librosa fallback failed for {os.path.basename(path)}: {e}")
+                    options['no_fallback'] = True
+                finally:
+                    os.unlink(tmp.name)
+
+        runs = len(clips) * repeat
+        self.stdout.write(f"{len(clips)} clips, {audio_seconds:.1f} s of audio, {repeat} runs each")
+        self.stdout.write("")
+        self.stdout.write(f"{'format':<28}{'total KB':>10}{'kbit/s':>9}{'vs WAV':>8}")
+        for label, key in (('WebM-Opus (upload)', 'webm'), ('Ogg Opus (stored)', 'ogg'),
+                           ('WAV PCM16 16 kHz', 'wav')):
+            self.stdout.write(
+                f"{label:<28}{sizes[key] / 1024:>10.1f}"
+                f"{sizes[key] * 8 / audio_seconds / 1000:>9.1f}"
+                f"{sizes[key] / sizes['wav'] * 100:>7.1f}%"
+            )
+
+        self.stdout.write("")
+        self.stdout.write(f"{'decode to 16 kHz':<28}{'ms/clip':>10}{'clips/s':>9}{'x real-time':>13}")
+        rows = [('WebM-Opus, in-process', 'webm'), ('WAV PCM16', 'wav')]
+        if not options['no_fallback']:
+            rows.append(('WebM-Opus, librosa/audioread', 'fallback'))
+        for label, key in rows:
+            per_clip = times[key] / runs
+            self.stdout.write(
+                f"{label:<28}{per_clip * 1000:>10.2f}"
+                f"{1 / per_clip if per_clip else 0:>9.0f}"
+                f"{audio_seconds * repeat / times[key] if times[key] else 0:>13.0f}"
+            )
+
+        saved = 100 - sizes['webm'] / sizes['wav'] * 100
+        self.stdout.write(self.style.SUCCESS(f"Opus uploads are {saved:.0f}% smaller than 16 kHz WAV"))
@@ -0,0 +1,68 @@
+import glob
+import os
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = "Benchmark the per-clip cost of prosody/fluency analysis against decode + MFCC"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'paths', nargs='*',
+            help='Audio files to benchmark (defaults to speaking/reference_audio/*.wav)'
+        )
+        parser.add_argument('--repeat', type=int, default=5, help='Runs per clip')
+
+    def handle(self, *args, **options):
+        from speaking.fluency import fluency_analyzer, PARSELMOUTH_AVAILABLE
+        from speaking.pronunciation_engine import pronunciation_engine
+
+        paths = options['paths'] or sorted(
+            glob.glob(os.path.join(settings.BASE_DIR, 'speaking', 'reference_audio', '*.wav'))
+        )
+        if not paths:
+            self.stderr.write("No audio files found")
+            return
+        if not PARSELMOUTH_AVAILABLE:
+            self.stderr.write("parselmouth is not installed; fluency analysis is a no-op")
+
+        repeat = max(1, options['repeat'])
+        sr = pronunciation_engine.sample_rate
+        totals = {'decode': 0.0, 'mfcc': 0.0, 'fluency': 0.0}
+        audio_seconds = 0.0
+
+        self.stdout.write(f"{'clip':<16}{'secs':>7}{'decode ms':>11}{'mfcc ms':>10}{'fluency ms':>12}")
+        for path in paths:
+            clip = {'decode': 0.0, 'mfcc': 0.0, 'fluency': 0.0}
+            for _ in range(repeat):
+                t0 = time.perf_counter()
+                y = pronunciation_engine.load_audio(path)
+                t1 = time.perf_counter()
+                pronunciation_engine.extract_mfcc(y)
+                t2 = time.perf_counter()
+                fluency_analyzer.analyze(y, sr)
+                t3 = time.perf_counter()
+                clip['decode'] += t1 - t0
+                clip['mfcc'] += t2 - t1
+                clip['fluency'] += t3 - t2
+
+            for key in totals:
+                totals[key] += clip[key]
+            audio_seconds += len(y) / sr
+            self.stdout.write(
+                f"{os.path.basename(path):<16}{len(y) / sr:>7.2f}"
+                f"{clip['decode'] / repeat * 1000:>11.1f}"
+                f"{clip['mfcc'] / repeat * 1000:>10.1f}"
+                f"{clip['fluency'] / repeat * 1000:>12.1f}"
+            )
+
+        runs = len(paths) * repeat
+        baseline = totals['decode'] + totals['mfcc']
+        added = totals['fluency'] / baseline * 100 if baseline else 0
+        self.stdout.write("")
+        self.stdout.write(f"Mean fluency cost per clip: {totals['fluency'] / runs * 1000:.1f} ms")
+        self.stdout.write(f"Real-time factor: {totals['fluency'] / repeat / audio_seconds:.4f}")
+        self.stdout.write(self.style.SUCCESS(f"Added cost vs decode + MFCC: {added:.1f}%"))
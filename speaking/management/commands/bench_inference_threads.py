@@ -0,0 +1,105 @@
+import glob
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Decoded clips per worker; numpy and torch are only imported once the governor has run
+_clips = {}
+
+
+def _init_worker(workers, threads):
+    """Load Django and the ASR pipeline in a spawned worker limited to ``threads``"""
+    from speaking.resource_governor import governor
+    governor.configure_environment(workers=workers, core_budget=workers * threads)
+
+    import django
+    django.setup()
+    import speaking.pronunciation_engine  # noqa: F401
+
+
+def _transcribe(path):
+    """Transcribe one clip (decoded once per worker) and return its latency in seconds"""
+    from speaking.pronunciation_engine import pronunciation_engine
+
+    if path not in _clips:
+        _clips[path] = pronunciation_engine.load_audio(path)
+    started = time.perf_counter()
+    pronunciation_engine.transcribe_audio(_clips[path])
+    return time.perf_counter() - started
+
+
+class Command(BaseCommand):
+    help = "Measure transcription throughput and latency for several worker x thread splits of the CPU"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'paths', nargs='*',
+            help='Audio files to transcribe (defaults to speaking/reference_audio/*.wav)'
+        )
+        parser.add_argument(
+            '--configs', default='',
+            help='Comma-separated WORKERSxTHREADS splits, e.g. "1x8,2x4,4x2,8x1" (defaults to the cores here)'
+        )
+        parser.add_argument('--requests', type=int, default=32, help='Transcriptions per configuration')
+
+    def _default_configs(self):
+        from speaking.resource_governor import available_cpus
+        cores = len(available_cpus())
+        configs, workers = [], 1
+        while workers <= cores:
+            configs.append((workers, cores // workers))
+            workers *= 2
+        # Each worker using every core, as without the governor
+        if cores > 1:
+            configs.append((min(4, cores), cores))
+        return configs
+
+    def handle(self, *args, **options):
+        import numpy as np
+
+        paths = options['paths'] or sorted(
+            glob.glob(os.path.join(settings.BASE_DIR, 'speaking', 'reference_audio', '*.wav'))
+        )
+        if not paths:
+            raise CommandError("No audio files found")
+
+        if options['configs']:
+            try:
+                configs = [tuple(int(n) for n in item.lower().split('x')) for item in options['configs'].split(',')]
+            except ValueError:
+                raise CommandError('Configs look like "2x4,4x2"')
+        else:
+            configs = self._default_configs()
+
+        requests = max(1, options['requests'])
+        jobs = [paths[i % len(paths)] for i in range(requests)]
+
+        self.stdout.write(f"{requests} transcriptions of {len(paths)} clips per configuration")
+        self.stdout.write(f"{'workers':>8}{'threads':>9}{'cores':>7}{'clips/s':>10}{'p50 ms':>9}{'p99 ms':>9}")
+        for workers, threads in configs:
+            executor = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_worker,
+                initargs=(workers, threads)
+            )
+            try:
+                # Model loading and the first (slow) inference are not timed
+                list(executor.map(_transcribe, [paths[0]] * workers))
+                started = time.perf_counter()
+                latencies = list(executor.map(_transcribe, jobs))
+                elapsed = time.perf_counter() - started
+            finally:
+                executor.shutdown()
+
+            latencies = np.array(latencies) * 1000
+            self.stdout.write(
+                f"{workers:>8}{threads:>9}{workers * threads:>7}{requests / elapsed:>10.2f}"
+                f"{np.percentile(latencies, 50):>9.0f}{np.percentile(latencies, 99):>9.0f}"
+            )
+
+        self.stdout.write(self.style.SUCCESS("Done"))
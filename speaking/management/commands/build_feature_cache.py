@@ -0,0 +1,89 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from speaking.feature_store import feature_store
+from speaking.models import SpeakingRecording
+from speaking.recording_store import recording_store
+
+
+class Command(BaseCommand):
+    help = "Store MFCC/delta features for Q1 word recordings and report their footprint and DTW rescoring cost"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=200, help='Recordings per batch')
+        parser.add_argument('--rebuild', action='store_true', help='Re-extract features that are already stored')
+        parser.add_argument(
+            '--rescore', action='store_true',
+            help='Time DTW rescoring from the stored arrays and count changed scores (nothing is written)'
+        )
+
+    def handle(self, *args, **options):
+        from speaking.pronunciation_engine import pronunciation_engine
+
+        batch_size = max(1, options['batch_size'])
+        stats = {'clips': 0, 'extracted': 0, 'missing': 0, 'bytes': 0, 'float32_bytes': 0, 'frames': 0,
+                 'extract_s': 0.0, 'rescored': 0, 'changed': 0, 'rescore_s': 0.0}
+        last_pk = 0
+
+        while True:
+            # Keyset pagination keeps each batch query cheap on large tables
+            batch = list(
+                SpeakingRecording.objects.filter(pk__gt=last_pk, question=1).order_by('pk')[:batch_size]
+            )
+            if not batch:
+                break
+            last_pk = batch[-1].pk
+
+            for recording in batch:
+                features = None if options['rebuild'] else feature_store.load(recording.features_path)
+                if features is None:
+                    t0 = time.perf_counter()
+                    data = recording_store.get(recording.path)
+                    if data is None:
+                        stats['missing'] += 1
+                        continue
+                    features = pronunciation_engine.extract_mfcc(data)
+                    if features is None:
+                        stats['missing'] += 1
+                        continue
+                    features_path = feature_store.save(recording.path, features)
+                    stats['extract_s'] += time.perf_counter() - t0
+                    stats['extracted'] += 1
+                    SpeakingRecording.objects.filter(pk=recording.pk).update(features_path=features_path)
+                    recording.features_path = features_path
+                    features = feature_store.load(features_path)
+
+                stats['clips'] += 1
+                stats['bytes'] += feature_store.size(recording.features_path)
+                stats['float32_bytes'] += features.size * 4
+                stats['frames'] += features.shape[0]
+
+                if options['rescore'] and recording.score:
+                    # Only words that were transcribed correctly have a DTW component
+                    t0 = time.perf_counter()
+                    raw = pronunciation_engine.score_q1_features(features, recording.word_num)
+                    stats['rescore_s'] += time.perf_counter() - t0
+                    stats['rescored'] += 1
+                    if abs(10 + round(raw / 10, 1) - recording.score) > 0.05:
+                        stats['changed'] += 1
+
+            self.stdout.write(f"Processed {stats['clips']} clips, {stats['extracted']} extracted (last id {last_pk})")
+
+        if not stats['clips']:
+            self.stdout.write(self.style.WARNING(f"No features stored ({stats['missing']} recordings missing)"))
+            return
+
+        clips = stats['clips']
+        self.stdout.write("")
+        self.stdout.write(f"Clips with features:      {clips} ({stats['missing']} missing)")
+        self.stdout.write(f"Mean frames per clip:     {stats['frames'] / clips:.0f}")
+        self.stdout.write(f"Mean stored size per clip: {stats['bytes'] / clips / 1024:.1f} KB "
+                          f"(float32 would be {stats['float32_bytes'] / clips / 1024:.1f} KB)")
+        self.stdout.write(f"Total feature store:      {stats['bytes'] / 1e6:.2f} MB")
+        if stats['extracted']:
+            self.stdout.write(f"Decode + MFCC per clip:   {stats['extract_s'] / stats['extracted'] * 1000:.1f} ms")
+        if stats['rescored']:
+            self.stdout.write(f"DTW rescore per clip:     {stats['rescore_s'] / stats['rescored'] * 1000:.1f} ms")
+            self.stdout.write(f"Scores that would change: {stats['changed']} of {stats['rescored']}")
+        self.stdout.write(self.style.SUCCESS("Done"))
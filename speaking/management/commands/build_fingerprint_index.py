@@ -0,0 +1,49 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from speaking.fingerprint import index_recording
+from speaking.models import SpeakingRecording
+from speaking.recording_store import recording_store
+
+
+class Command(BaseCommand):
+    help = "Fingerprint recordings that are not in the replay-detection index yet"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=200, help='Recordings per batch')
+
+    def handle(self, *args, **options):
+        batch_size = max(1, options['batch_size'])
+        stats = {'indexed': 0, 'missing': 0, 'matched': 0}
+        last_pk = 0
+        started = time.perf_counter()
+
+        while True:
+            # Keyset pagination keeps each batch query cheap on large tables
+            batch = list(
+                SpeakingRecording.objects.filter(pk__gt=last_pk, fingerprints__isnull=True)
+                .select_related('test_session').order_by('pk')[:batch_size]
+            )
+            if not batch:
+                break
+            last_pk = batch[-1].pk
+
+            for recording in batch:
+                data = recording_store.get(recording.path)
+                if data is None:
+                    stats['missing'] += 1
+                    continue
+                matches = index_recording(recording, data=data)
+                stats['indexed'] += 1
+                stats['matched'] += bool(matches)
+
+            elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f"Indexed {stats['indexed']} recordings, {stats['matched']} matched earlier clips "
+                f"({stats['indexed'] / elapsed if elapsed else 0:.1f}/s, last id {last_pk})"
+            )
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Done: {stats['indexed']} indexed, {stats['matched']} matched, {stats['missing']} missing"
+        ))
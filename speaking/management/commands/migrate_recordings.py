@@ -0,0 +1,89 @@
+import os
+
+from django.conf import settings
+from django.core.files import File
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from speaking.models import SpeakingRecording, RecordingUpload, RecordingBlob
+from speaking.storage import recording_storage
+
+
+class Command(BaseCommand):
+    help = "Move flat media/recordings files into the sharded, compressed recording storage"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=200, help='Recordings per transaction')
+        parser.add_argument('--dry-run', action='store_true', help='Report what would change without writing')
+        parser.add_argument('--keep-originals', action='store_true', help='Do not delete the flat files afterwards')
+
+    def handle(self, *args, **options):
+        batch_size = max(1, options['batch_size'])
+        dry_run = options['dry_run']
+        stats = {'recordings': 0, 'files': 0, 'missing': 0, 'bytes_before': 0, 'bytes_after': 0}
+        last_pk = 0
+        moved_paths = set()
+
+        while True:
+            # Keyset pagination keeps each batch query cheap on large tables
+            batch = list(
+                SpeakingRecording.objects.filter(pk__gt=last_pk).order_by('pk')[:batch_size]
+            )
+            if not batch:
+                break
+            last_pk = batch[-1].pk
+
+            moved = []
+            with transaction.atomic():
+                for recording in batch:
+                    self.migrate_recording(recording, stats, dry_run, moved, moved_paths)
+                    stats['recordings'] += 1
+
+            # Old files are only removed once the new paths are committed
+            if not dry_run and not options['keep_originals']:
+                for old_path in moved:
+                    os.remove(old_path)
+
+            self.stdout.write(
+                f"Processed {stats['recordings']} recordings, {stats['files']} files migrated "
+                f"(last id {last_pk})"
+            )
+
+        saved = stats['bytes_before'] - stats['bytes_after']
+        self.stdout.write(self.style.SUCCESS(
+            f"Done: {stats['files']} files migrated, {stats['missing']} missing, "
+            f"{stats['bytes_before'] / 1e6:.1f} MB -> {stats['bytes_after'] / 1e6:.1f} MB "
+            f"({saved / 1e6:.1f} MB saved)"
+        ))
+
+    def migrate_recording(self, recording, stats, dry_run, moved, moved_paths):
+        path = recording.path
+        # Deduplicated files are shared; the first row to move one moves them all
+        if path in moved_paths:
+            return
+        if not path.startswith('recordings/'):
+            return
+        name = path[len('recordings/'):]
+        if recording_storage.is_sharded(name):
+            return
+
+        full_path = os.path.join(settings.MEDIA_ROOT, path)
+        if not os.path.exists(full_path):
+            stats['missing'] += 1
+            return
+
+        stats['files'] += 1
+        moved_paths.add(path)
+        stats['bytes_before'] += os.path.getsize(full_path)
+        if dry_run:
+            return
+
+        with open(full_path, 'rb') as f:
+            new_name = recording_storage.save(name, File(f))
+        new_path = f'recordings/{new_name}'
+        stats['bytes_after'] += recording_storage.size(new_name)
+        moved.append(full_path)
+
+        SpeakingRecording.objects.filter(path=path).update(path=new_path)
+        RecordingUpload.objects.filter(recording_path=path).update(recording_path=new_path)
+        RecordingBlob.objects.filter(path=path).update(path=new_path)
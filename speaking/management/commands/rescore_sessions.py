@@ -0,0 +1,143 @@
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+
+def _init_worker(workers):
+    """Set up Django in a spawned worker; each worker loads its own ASR model"""
+    from speaking.resource_governor import governor
+    # Share the host's inference cores between the workers instead of each taking all of them
+    governor.configure_environment(workers=workers)
+
+    import django
+    django.setup()
+    import speaking.pronunciation_engine  # noqa: F401
+
+
+def _rescore_session(pk, reuse_cached):
+    """Score one session in a worker and return a picklable result"""
+    from speaking.memory_watchdog import memory_watchdog
+    from speaking.models import SpeakingRecording, TestSession
+    from speaking.views import score_recordings
+
+    started = time.perf_counter()
+    try:
+        test_session = TestSession.objects.get(pk=pk)
+        with memory_watchdog.job(f'Rescoring session {pk}'):
+            scores, word_feedback, scored = score_recordings(test_session, reuse_cached=reuse_cached)
+        # Keep newly extracted feature arrays so later versions are cheaper
+        SpeakingRecording.objects.bulk_update(scored, ['features_path'])
+    except Exception as e:
+        return {'pk': pk, 'error': str(e)}
+    return {
+        'pk': pk,
+        'scores': scores,
+        'word_feedback': word_feedback,
+        'scoring_ms': int((time.perf_counter() - started) * 1000),
+    }
+
+
+class Command(BaseCommand):
+    help = "Re-score completed speaking sessions in parallel into a new score version"
+
+    def add_arguments(self, parser):
+        parser.add_argument('version', help='Name of the score version to write, e.g. "2026-10-dtw"')
+        parser.add_argument('--workers', type=int, default=max(1, (os.cpu_count() or 2) // 2),
+                            help='Worker processes, each with its own model (0 runs in this process)')
+        parser.add_argument('--batch-size', type=int, default=50, help='Sessions per batch')
+        parser.add_argument('--limit', type=int, default=0, help='Stop after this many sessions')
+        parser.add_argument('--retranscribe', action='store_true',
+                            help='Ignore stored transcripts and features, e.g. after an ASR model change')
+
+    def handle(self, *args, **options):
+        # Imported here: spawned workers import this module before Django is set up
+        from speaking.models import TestSession, SpeakingScore
+
+        version = options['version']
+        if len(version) > SpeakingScore._meta.get_field('version').max_length:
+            raise CommandError('Version name is too long')
+
+        batch_size = max(1, options['batch_size'])
+        reuse_cached = not options['retranscribe']
+
+        # Sessions that already have this version are the checkpoint: a rerun resumes after them
+        pending = TestSession.objects.filter(completed_at__isnull=False).exclude(score_versions__version=version)
+        total = pending.count()
+        if options['limit']:
+            total = min(total, options['limit'])
+        if not total:
+            self.stdout.write(self.style.SUCCESS(f"Nothing to rescore for version {version}"))
+            return
+        self.stdout.write(f"Rescoring {total} sessions into version {version} with {options['workers']} workers")
+
+        executor = None
+        if options['workers'] > 0:
+            # Spawned (not forked) workers don't inherit DB connections or torch state
+            connections.close_all()
+            executor = ProcessPoolExecutor(
+                max_workers=options['workers'],
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_worker,
+                initargs=(options['workers'],)
+            )
+
+        done = failed = 0
+        last_pk = 0
+        started = time.perf_counter()
+        try:
+            while done + failed < total:
+                # Keyset pagination keeps each batch query cheap on large tables
+                pks = list(
+                    pending.filter(pk__gt=last_pk).order_by('pk')
+                    .values_list('pk', flat=True)[:min(batch_size, total - done - failed)]
+                )
+                if not pks:
+                    break
+                last_pk = pks[-1]
+
+                if executor is not None:
+                    results = list(executor.map(_rescore_session, pks, [reuse_cached] * len(pks)))
+                else:
+                    results = [_rescore_session(pk, reuse_cached) for pk in pks]
+
+                rows = []
+                for result in results:
+                    if 'error' in result:
+                        failed += 1
+                        self.stderr.write(f"Session {result['pk']} failed: {result['error']}")
+                        continue
+                    scores = result['scores']
+                    rows.append(SpeakingScore(
+                        test_session_id=result['pk'],
+                        version=version,
+                        q1_score=scores.get('q1', 0),
+                        q2_score=scores.get('q2', 0),
+                        q3_score=scores.get('q3', 0),
+                        q4_score=scores.get('q4', 0),
+                        q5_score=scores.get('q5', 0),
+                        word_feedback=result['word_feedback'],
+                        scoring_ms=result['scoring_ms'],
+                    ))
+                SpeakingScore.objects.bulk_create(rows, ignore_conflicts=True)
+                done += len(rows)
+
+                elapsed = time.perf_counter() - started
+                rate = (done + failed) / elapsed if elapsed else 0
+                eta = (total - done - failed) / rate if rate else 0
+                self.stdout.write(
+                    f"{done + failed}/{total} sessions ({failed} failed), "
+                    f"{rate:.2f} sessions/s, ETA {eta / 60:.1f} min (last id {last_pk})"
+                )
+        finally:
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Done: {done} sessions rescored into {version}, {failed} failed, "
+            f"{elapsed:.1f} s ({done / elapsed if elapsed else 0:.2f} sessions/s)"
+        ))
@@ -0,0 +1,124 @@
+import signal
+import threading
+import time
+import traceback
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+
+class Command(BaseCommand):
+    help = "Pull queued speaking sessions from the database and score them (run on any number of nodes)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--name', default='', help='Worker name (defaults to host:pid)')
+        parser.add_argument('--lease', type=int, default=120, help='Lease length in seconds')
+        parser.add_argument('--heartbeat', type=int, default=20, help='Seconds between lease renewals')
+        parser.add_argument('--poll', type=float, default=2.0, help='Seconds to wait when the queue is empty')
+        parser.add_argument('--max-jobs', type=int, default=0, help='Exit after this many jobs')
+        parser.add_argument('--burst', action='store_true', help='Exit once the queue is empty')
+
+    def handle(self, *args, **options):
+        from speaking import scoring_queue
+        from speaking.memory_watchdog import memory_watchdog
+
+        lease = max(10, options['lease'])
+        interval = max(1, min(options['heartbeat'], lease // 3))
+
+        # Only load the models once it's clear the database is reachable
+        worker = scoring_queue.register_worker(options['name'] or None)
+        from speaking.pronunciation_engine import warm_up_serving_process
+        warm_up_serving_process()
+        self.stdout.write(f"Scoring worker {worker.name} ready (lease {lease} s, heartbeat {interval} s)")
+
+        stopping = threading.Event()
+
+        def stop(signum, frame):
+            self.stdout.write("Stopping after the current job")
+            stopping.set()
+        signal.signal(signal.SIGTERM, stop)
+        signal.signal(signal.SIGINT, stop)
+
+        handled = 0
+        try:
+            while not stopping.is_set():
+                requeued = scoring_queue.requeue_expired()
+                if requeued:
+                    self.stdout.write(f"Re-queued {requeued} jobs with expired leases")
+
+                job = scoring_queue.claim_job(worker.name, lease)
+                if job is None:
+                    scoring_queue.worker_heartbeat(worker)
+                    if options['burst']:
+                        break
+                    stopping.wait(options['poll'])
+                    continue
+
+                ok, busy = self._run_job(job, worker, lease, interval)
+                scoring_queue.worker_heartbeat(worker, done=int(ok), failed=int(not ok), busy_seconds=busy)
+                handled += 1
+
+                if options['max_jobs'] and handled >= options['max_jobs']:
+                    break
+                if memory_watchdog.over_ceiling():
+                    # Leave between jobs; the process supervisor starts a fresh worker
+                    self.stdout.write(self.style.WARNING("RSS is above the ceiling; exiting for a restart"))
+                    break
+        finally:
+            scoring_queue.worker_heartbeat(worker, stopped=True)
+
+        worker.refresh_from_db()
+        self.stdout.write(self.style.SUCCESS(
+            f"{worker.name}: {worker.jobs_done} done, {worker.jobs_failed} failed, "
+            f"{worker.jobs_per_minute:.2f} jobs/min"
+        ))
+
+    def _run_job(self, job, worker, lease, interval):
+        """Score one leased job while a thread renews its lease; returns (ok, seconds)"""
+        from speaking import scoring_queue
+        from speaking.models import TestSession
+        from speaking.singleflight import claim_processing, release_processing
+        from speaking.views import _is_scored, _score_test_session
+
+        done = threading.Event()
+
+        def heartbeat():
+            try:
+                while not done.wait(interval):
+                    if not scoring_queue.renew_lease(job, worker.name, lease):
+                        self.stderr.write(f"Lost the lease on job {job.pk}")
+                        return
+            finally:
+                connection.close()
+
+        renewer = threading.Thread(target=heartbeat, daemon=True)
+        renewer.start()
+
+        test_session = job.test_session
+        started = time.perf_counter()
+        try:
+            if not _is_scored(test_session):
+                # The lease already makes this worker the only one on the session,
+                # so any processing claim left by a dead worker is taken over
+                claim_processing(test_session.session_id, stale_after=0)
+                test_session.refresh_from_db()
+                try:
+                    _score_test_session(test_session)
+                except Exception:
+                    release_processing(test_session.session_id, TestSession.PROCESSING_FAILED)
+                    raise
+        except Exception as e:
+            traceback.print_exc()
+            requeued = scoring_queue.fail_job(job, worker.name, str(e))
+            self.stderr.write(f"Job {job.pk} (session {test_session.pk}) failed: {e}"
+                              f"{' - re-queued' if requeued else ''}")
+            return False, time.perf_counter() - started
+        finally:
+            done.set()
+            renewer.join()
+
+        elapsed = time.perf_counter() - started
+        if not scoring_queue.finish_job(job, worker.name, int(elapsed * 1000)):
+            self.stderr.write(f"Job {job.pk} finished after its lease expired; the result is kept")
+        self.stdout.write(f"Scored session {test_session.pk} in {elapsed:.1f} s (attempt {job.attempts})")
+        return True, elapsed
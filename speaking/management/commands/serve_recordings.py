@@ -0,0 +1,38 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from speaking.recording_store import LocalRecordingStore, RecordingStoreServer, is_loopback
+
+
+class Command(BaseCommand):
+    help = "Serve MEDIA_ROOT/recordings over HTTP to scoring nodes configured with RECORDING_STORE_URL"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--host', default='127.0.0.1',
+            help='Address to listen on (anything but loopback requires RECORDING_STORE_TOKEN)'
+        )
+        parser.add_argument('--port', type=int, default=8765, help='Port to listen on')
+        parser.add_argument('--verbose', action='store_true', help='Log every request')
+
+    def handle(self, *args, **options):
+        if not settings.RECORDING_STORE_TOKEN:
+            if not is_loopback(options['host']):
+                raise CommandError(
+                    f"Refusing to serve recordings on {options['host']} without auth; set RECORDING_STORE_TOKEN"
+                )
+            self.stderr.write(self.style.WARNING("RECORDING_STORE_TOKEN is not set; serving to localhost only"))
+
+        server = RecordingStoreServer(
+            (options['host'], options['port']),
+            LocalRecordingStore(settings.MEDIA_ROOT),
+            token=settings.RECORDING_STORE_TOKEN,
+            verbose=options['verbose']
+        )
+        self.stdout.write(f"Serving {settings.MEDIA_ROOT}/recordings on {options['host']}:{options['port']}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
@@ -0,0 +1,19 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from speaking.chunked_upload import STALE_UPLOAD_AGE, sweep_stale_uploads
+
+
+class Command(BaseCommand):
+    help = "Delete chunked recording uploads that were never committed, with their partial files"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--max-age-minutes', type=int, default=int(STALE_UPLOAD_AGE.total_seconds() // 60),
+            help='Uncommitted uploads older than this are removed'
+        )
+
+    def handle(self, *args, **options):
+        uploads, files = sweep_stale_uploads(timedelta(minutes=options['max_age_minutes']))
+        self.stdout.write(self.style.SUCCESS(f"Removed {uploads} abandoned uploads and {files} stray partial files"))
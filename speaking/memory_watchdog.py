@@ -0,0 +1,110 @@
+"""
+Resident memory tracking for processes that hold the speech models.
+
+Workers grow over many scoring runs (librosa caches, torch allocator
+fragmentation, transformer caches) until the OOM killer ends one mid-exam.
+Each scoring job samples the process RSS before and after every stage,
+logs where the growth happened and keeps a bounded history for the
+diagnostics endpoint. Once RSS passes SCORING_MEMORY_CEILING_MB the worker
+is recycled: under gunicorn it gets SIGTERM, which lets the current request
+finish before the arbiter replaces the process.
+"""
+import os
+import signal
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import psutil
+
+MB = 1024 * 1024
+
+
+class MemoryWatchdog:
+    def __init__(self, history_size=200):
+        self.process = psutil.Process()
+        self.history = deque(maxlen=history_size)
+        self.recycle_enabled = False
+        self.recycle_requested = False
+        self._local = threading.local()
+
+    @property
+    def ceiling_mb(self):
+        from django.conf import settings
+        return getattr(settings, 'SCORING_MEMORY_CEILING_MB', 0)
+
+    def rss_mb(self):
+        return self.process.memory_info().rss / MB
+
+    def enable_recycling(self):
+        """Called in forked gunicorn workers; elsewhere crossing the ceiling is only logged"""
+        self.recycle_enabled = True
+
+    @contextmanager
+    def job(self, label):
+        """Track one scoring job; stages inside it are attributed to it"""
+        stages = {}
+        self._local.stages = stages
+        started_at = time.time()
+        start_rss = self.rss_mb()
+        try:
+            yield
+        finally:
+            self._local.stages = None
+            rss = self.rss_mb()
+            entry = {
+                'job': label,
+                'at': started_at,
+                'seconds': round(time.time() - started_at, 2),
+                'rss_mb': round(rss, 1),
+                'growth_mb': round(rss - start_rss, 1),
+                'stages': {name: round(growth, 1) for name, growth in stages.items()},
+            }
+            self.history.append(entry)
+
+            breakdown = ', '.join(f"{name} {growth:+.1f}" for name, growth in entry['stages'].items())
+            print(f"🧠 {label}: RSS {rss:.0f} MB ({entry['growth_mb']:+.1f} MB; {breakdown or 'no stages'})")
+            self.check_ceiling(rss)
+
+    @contextmanager
+    def stage(self, name):
+        """Attribute RSS growth of the enclosed block to ``name`` in the current job"""
+        stages = getattr(self._local, 'stages', None)
+        if stages is None:
+            yield
+            return
+        before = self.rss_mb()
+        try:
+            yield
+        finally:
+            stages[name] = stages.get(name, 0.0) + self.rss_mb() - before
+
+    def over_ceiling(self, rss=None):
+        ceiling = self.ceiling_mb
+        return bool(ceiling) and (rss if rss is not None else self.rss_mb()) > ceiling
+
+    def check_ceiling(self, rss=None):
+        if self.recycle_requested or not self.over_ceiling(rss):
+            return
+        self.recycle_requested = True
+        if not self.recycle_enabled:
+            print(f"⚠️ RSS is above the {self.ceiling_mb} MB ceiling; restart this process when convenient")
+            return
+        print(f"♻️ RSS is above the {self.ceiling_mb} MB ceiling; recycling worker {os.getpid()}")
+        # Gunicorn workers treat SIGTERM as a graceful exit after the current request
+        os.kill(os.getpid(), signal.SIGTERM)
+
+    def report(self):
+        return {
+            'pid': os.getpid(),
+            'rss_mb': round(self.rss_mb(), 1),
+            'ceiling_mb': self.ceiling_mb,
+            'recycle_enabled': self.recycle_enabled,
+            'recycle_requested': self.recycle_requested,
+            'history': list(self.history),
+        }
+
+
+# Shared by all requests in this process
+memory_watchdog = MemoryWatchdog()
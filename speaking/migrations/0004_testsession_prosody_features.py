@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-19 10:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("speaking", "0003_suspiciousactivity"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="testsession",
+            name="prosody_features",
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 6.0.1 on 2026-10-19 11:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("speaking", "0004_testsession_prosody_features"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="testsession",
+            name="processing_state",
+            field=models.CharField(
+                blank=True,
+                choices=[
+                    ("processing", "Processing"),
+                    ("done", "Done"),
+                    ("failed", "Failed"),
+                ],
+                max_length=20,
+            ),
+        ),
+        migrations.AddField(
+            model_name="testsession",
+            name="processing_started_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
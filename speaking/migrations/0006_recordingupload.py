@@ -0,0 +1,43 @@
+# Generated by Django 6.0.1 on 2026-10-19 11:47
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("speaking", "0005_testsession_processing_state"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RecordingUpload",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("upload_id", models.CharField(max_length=64, unique=True)),
+                ("question", models.IntegerField()),
+                ("word_num", models.IntegerField(blank=True, null=True)),
+                ("received_bytes", models.BigIntegerField(default=0)),
+                ("recording_path", models.CharField(blank=True, max_length=500)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("committed_at", models.DateTimeField(blank=True, null=True)),
+                (
+                    "test_session",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="uploads",
+                        to="speaking.testsession",
+                    ),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-19 12:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("speaking", "0006_recordingupload"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="testsession",
+            name="transcripts",
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 6.0.1 on 2026-10-19 14:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("speaking", "0007_testsession_transcripts"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SpeakingRecording",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("question", models.PositiveSmallIntegerField()),
+                ("word_num", models.PositiveSmallIntegerField(default=0)),
+                ("path", models.CharField(max_length=500)),
+                ("content_hash", models.CharField(blank=True, max_length=64)),
+                ("duration", models.FloatField(blank=True, null=True)),
+                ("transcript", models.TextField(blank=True)),
+                ("prosody", models.JSONField(blank=True, default=dict)),
+                ("features_path", models.CharField(blank=True, max_length=500)),
+                ("score", models.FloatField(blank=True, null=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("scored_at", models.DateTimeField(blank=True, null=True)),
+                ("scoring_ms", models.IntegerField(blank=True, null=True)),
+                (
+                    "test_session",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="recordings",
+                        to="speaking.testsession",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["question", "word_num"],
+                "indexes": [
+                    models.Index(
+                        fields=["content_hash"], name="speaking_recording_hash_idx"
+                    ),
+                    models.Index(fields=["path"], name="speaking_recording_path_idx"),
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("test_session", "question", "word_num"),
+                        name="speaking_recording_unique_answer",
+                    )
+                ],
+            },
+        ),
+    ]
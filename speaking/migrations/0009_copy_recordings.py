@@ -0,0 +1,79 @@
+from django.db import migrations
+
+BATCH_SIZE = 500
+
+
+def copy_recordings(apps, schema_editor):
+    """Create a SpeakingRecording row for every filled q*_recording column"""
+    TestSession = apps.get_model("speaking", "TestSession")
+    SpeakingRecording = apps.get_model("speaking", "SpeakingRecording")
+
+    rows = []
+    for test_session in TestSession.objects.order_by("pk").iterator(chunk_size=BATCH_SIZE):
+        scored = test_session.completed_at is not None
+
+        for w in range(1, 6):
+            path = getattr(test_session, f"q1_word{w}_recording")
+            if path:
+                rows.append(SpeakingRecording(
+                    test_session_id=test_session.pk,
+                    question=1,
+                    word_num=w,
+                    path=path,
+                    score=getattr(test_session, f"q1_word{w}_score") if scored else None,
+                    scored_at=test_session.completed_at,
+                ))
+
+        for q in range(2, 6):
+            path = getattr(test_session, f"q{q}_recording")
+            if not path:
+                continue
+            streamed = (test_session.transcripts or {}).get(f"q{q}") or {}
+            rows.append(SpeakingRecording(
+                test_session_id=test_session.pk,
+                question=q,
+                path=path,
+                transcript=streamed.get("text", "") if streamed.get("path") == path else "",
+                prosody=(test_session.prosody_features or {}).get(f"q{q}") or {},
+                score=getattr(test_session, f"q{q}_score") if scored else None,
+                scored_at=test_session.completed_at,
+            ))
+
+        if len(rows) >= BATCH_SIZE:
+            SpeakingRecording.objects.bulk_create(rows)
+            rows = []
+
+    SpeakingRecording.objects.bulk_create(rows)
+
+
+def restore_columns(apps, schema_editor):
+    TestSession = apps.get_model("speaking", "TestSession")
+    SpeakingRecording = apps.get_model("speaking", "SpeakingRecording")
+
+    sessions = {}
+    for recording in SpeakingRecording.objects.order_by("test_session_id").iterator(chunk_size=BATCH_SIZE):
+        changes = sessions.setdefault(recording.test_session_id, {"transcripts": {}, "prosody_features": {}})
+        if recording.question == 1:
+            changes[f"q1_word{recording.word_num}_recording"] = recording.path
+            changes[f"q1_word{recording.word_num}_score"] = recording.score or 0
+        else:
+            key = f"q{recording.question}"
+            changes[f"{key}_recording"] = recording.path
+            if recording.transcript:
+                changes["transcripts"][key] = {"path": recording.path, "text": recording.transcript}
+            if recording.prosody:
+                changes["prosody_features"][key] = recording.prosody
+
+    for pk, changes in sessions.items():
+        TestSession.objects.filter(pk=pk).update(**changes)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("speaking", "0008_speakingrecording"),
+    ]
+
+    operations = [
+        migrations.RunPython(copy_recordings, restore_columns),
+    ]
@@ -0,0 +1,77 @@
+# Generated by Django 6.0.1 on 2026-10-19 14:05
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("speaking", "0009_copy_recordings"),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name="testsession",
+            name="q1_word1_recording",
+        ),
+        migrations.RemoveField(
+            model_name="testsession",
+            name="q1_word2_recording",
+        ),
+        migrations.RemoveField(
+            model_name="testsession",
+            name="q1_word3_recording",
+        ),
+        migrations.RemoveField(
+            model_name="testsession",
+            name="q1_word4_recording",
+        ),
+        migrations.RemoveField(
+            model_name="testsession",
+            name="q1_word5_recording",
+        ),
+        migrations.RemoveField(
+            model_name="testsession",
+            name="q1_word1_score",
+        ),
+        migrations.RemoveField(
+            model_name="testsession",
+            name="q1_word2_score",
+        ),
+        migrations.RemoveField(
+            model_name="testsession",
+            name="q1_word3_score",
+        ),
+        migrations.RemoveField(
+            model_name="testsession",
+            name="q1_word4_score",
+        ),
+        migrations.RemoveField(
+            model_name="testsession",
+            name="q1_word5_score",
+        ),
+        migrations.RemoveField(
+            model_name="testsession",
+            name="q2_recording",
+        ),
+        migrations.RemoveField(
+            model_name="testsession",
+            name="q3_recording",
+        ),
+        migrations.RemoveField(
+            model_name="testsession",
+            name="q4_recording",
+        ),
+        migrations.RemoveField(
+            model_name="testsession",
+            name="q5_recording",
+        ),
+        migrations.RemoveField(
+            model_name="testsession",
+            name="prosody_features",
+        ),
+        migrations.RemoveField(
+            model_name="testsession",
+            name="transcripts",
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 6.0.1 on 2026-10-19 15:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("speaking", "0010_remove_testsession_recording_columns"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SpeakingScore",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("version", models.CharField(max_length=50)),
+                ("q1_score", models.FloatField(default=0)),
+                ("q2_score", models.FloatField(default=0)),
+                ("q3_score", models.FloatField(default=0)),
+                ("q4_score", models.FloatField(default=0)),
+                ("q5_score", models.FloatField(default=0)),
+                ("word_feedback", models.JSONField(blank=True, default=dict)),
+                ("scoring_ms", models.IntegerField(blank=True, null=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "test_session",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="score_versions",
+                        to="speaking.testsession",
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("version", "test_session"),
+                        name="speaking_score_unique_version",
+                    )
+                ],
+            },
+        ),
+    ]
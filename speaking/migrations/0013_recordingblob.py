@@ -0,0 +1,50 @@
+# Generated by Django 6.0.1 on 2026-10-19 16:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("speaking", "0012_speakingresult"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RecordingBlob",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("content_hash", models.CharField(max_length=64, unique=True)),
+                ("path", models.CharField(db_index=True, max_length=500)),
+                ("size", models.BigIntegerField(default=0)),
+                ("ref_count", models.PositiveIntegerField(default=0)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name="suspiciousactivity",
+            name="activity_type",
+            field=models.CharField(
+                choices=[
+                    ("tab_switch", "Tab Switch"),
+                    ("fullscreen_exit", "Fullscreen Exit"),
+                    ("window_blur", "Window Blur"),
+                    ("too_fast", "Answered Too Fast"),
+                    ("away_from_keyboard", "Away from Keyboard"),
+                    ("right_click", "Right Click Attempt"),
+                    ("copy_attempt", "Copy Attempt"),
+                    ("dev_tools", "Developer Tools Attempt"),
+                    ("duplicate_recording", "Duplicate Recording"),
+                ],
+                max_length=50,
+            ),
+        ),
+    ]
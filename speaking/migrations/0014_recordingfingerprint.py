@@ -0,0 +1,68 @@
+# Generated by Django 6.0.1 on 2026-10-19 17:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("speaking", "0013_recordingblob"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RecordingFingerprint",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("question", models.PositiveSmallIntegerField()),
+                ("word_num", models.PositiveSmallIntegerField(default=0)),
+                ("hash", models.IntegerField()),
+                ("offset", models.IntegerField()),
+                (
+                    "recording",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="fingerprints",
+                        to="speaking.speakingrecording",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["question", "word_num", "hash"],
+                        name="speaking_fingerprint_idx",
+                    )
+                ],
+            },
+        ),
+        migrations.AlterField(
+            model_name="suspiciousactivity",
+            name="activity_type",
+            field=models.CharField(
+                choices=[
+                    ("tab_switch", "Tab Switch"),
+                    ("fullscreen_exit", "Fullscreen Exit"),
+                    ("window_blur", "Window Blur"),
+                    ("too_fast", "Answered Too Fast"),
+                    ("away_from_keyboard", "Away from Keyboard"),
+                    ("right_click", "Right Click Attempt"),
+                    ("copy_attempt", "Copy Attempt"),
+                    ("dev_tools", "Developer Tools Attempt"),
+                    ("duplicate_recording", "Duplicate Recording"),
+                    ("replayed_recording", "Replayed Recording"),
+                    ("shared_recording", "Recording Replayed by Another Student"),
+                ],
+                max_length=50,
+            ),
+        ),
+    ]
@@ -22,6 +22,15 @@ class Student(models.Model):
 
 
 class TestSession(models.Model):
+    PROCESSING = 'processing'
+    PROCESSING_DONE = 'done'
+    PROCESSING_FAILED = 'failed'
+    PROCESSING_STATES = [
+        (PROCESSING, 'Processing'),
+        (PROCESSING_DONE, 'Done'),
+        (PROCESSING_FAILED, 'Failed'),
+    ]
+
     session_id = models.CharField(max_length=100, unique=True)
 
     # 🔗 Link to Django authenticated user
@@ -45,33 +54,17 @@ class TestSession(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     completed_at = models.DateTimeField(null=True, blank=True)
 
-    # Q1 recordings
-    q1_word1_recording = models.CharField(max_length=500, blank=True)
-    q1_word2_recording = models.CharField(max_length=500, blank=True)
-    q1_word3_recording = models.CharField(max_length=500, blank=True)
-    q1_word4_recording = models.CharField(max_length=500, blank=True)
-    q1_word5_recording = models.CharField(max_length=500, blank=True)
-
-    # Q1 individual scores
-    q1_word1_score = models.FloatField(default=0)
-    q1_word2_score = models.FloatField(default=0)
-    q1_word3_score = models.FloatField(default=0)
-    q1_word4_score = models.FloatField(default=0)
-    q1_word5_score = models.FloatField(default=0)
-
-    # Main question scores
+    # Scoring lock (see speaking/singleflight.py)
+    processing_state = models.CharField(max_length=20, choices=PROCESSING_STATES, blank=True)
+    processing_started_at = models.DateTimeField(null=True, blank=True)
+
+    # Main question scores; per-recording scores live on SpeakingRecording
     q1_score = models.FloatField(default=0)
     q2_score = models.FloatField(default=0)
     q3_score = models.FloatField(default=0)
     q4_score = models.FloatField(default=0)
     q5_score = models.FloatField(default=0)
 
-    # Audio recordings
-    q2_recording = models.CharField(max_length=500, blank=True)
-    q3_recording = models.CharField(max_length=500, blank=True)
-    q4_recording = models.CharField(max_length=500, blank=True)
-    q5_recording = models.CharField(max_length=500, blank=True)
-
     def get_average_score(self):
         scores = [
             self.q1_score,
@@ -96,6 +89,279 @@ class TestSession(models.Model):
         return f"Session {self.session_id} - {student_name}"
 
 
+class SpeakingRecording(models.Model):
+    """
+    One stored answer: a Q1 word (word_num 1-5) or a Q2-Q5 recording
+    (word_num 0). Re-recording replaces the row's audio and clears its score.
+    """
+    test_session = models.ForeignKey(
+        TestSession,
+        on_delete=models.CASCADE,
+        related_name="recordings"
+    )
+    question = models.PositiveSmallIntegerField()
+    word_num = models.PositiveSmallIntegerField(default=0)
+    path = models.CharField(max_length=500)
+    content_hash = models.CharField(max_length=64, blank=True)
+    duration = models.FloatField(null=True, blank=True)
+
+    # Transcript from streaming ASR or a previous scoring run; reused when present
+    transcript = models.TextField(blank=True)
+    # Prosody/fluency features (see speaking/fluency.py)
+    prosody = models.JSONField(default=dict, blank=True)
+    # Stored acoustic feature arrays, relative to MEDIA_ROOT
+    features_path = models.CharField(max_length=500, blank=True)
+
+    score = models.FloatField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    scored_at = models.DateTimeField(null=True, blank=True)
+    scoring_ms = models.IntegerField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['question', 'word_num']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['test_session', 'question', 'word_num'],
+                name='speaking_recording_unique_answer'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['content_hash'], name='speaking_recording_hash_idx'),
+            models.Index(fields=['path'], name='speaking_recording_path_idx'),
+        ]
+
+    @classmethod
+    def attach(cls, test_session, question, word_num, path, content_hash='', duration=None, **fields):
+        """
+        Point an answer at a newly stored file and return ``(recording,
+        previous_path)``. Only the columns that change are written, and a
+        previous score is cleared so it is rescored. Transcript, prosody and
+        features already computed for identical audio are reused.
+        """
+        word_num = word_num or 0
+        previous_path = cls.objects.filter(
+            test_session=test_session, question=question, word_num=word_num
+        ).values_list('path', flat=True).first()
+
+        defaults = {
+            'path': path,
+            'content_hash': content_hash,
+            'duration': duration,
+            'transcript': '',
+            'prosody': {},
+            'features_path': '',
+            'score': None,
+            'scored_at': None,
+            'scoring_ms': None,
+        }
+        if content_hash:
+            donor = cls.objects.filter(content_hash=content_hash).exclude(transcript='').values(
+                'transcript', 'prosody', 'features_path'
+            ).first()
+            if donor:
+                defaults.update(donor)
+        defaults.update(fields)
+
+        recording, _ = cls.objects.update_or_create(
+            test_session=test_session,
+            question=question,
+            word_num=word_num,
+            defaults=defaults
+        )
+        return recording, previous_path
+
+    def __str__(self):
+        answer = f"Q1 word {self.word_num}" if self.word_num else f"Q{self.question}"
+        return f"{answer} - {self.path}"
+
+
+class RecordingFingerprint(models.Model):
+    """
+    One landmark hash of a recording: the inverted index used to spot the
+    same audio replayed by another student (see speaking/fingerprint.py).
+    """
+    recording = models.ForeignKey(
+        SpeakingRecording,
+        on_delete=models.CASCADE,
+        related_name="fingerprints"
+    )
+    question = models.PositiveSmallIntegerField()
+    word_num = models.PositiveSmallIntegerField(default=0)
+    hash = models.IntegerField()
+    offset = models.IntegerField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['question', 'word_num', 'hash'], name='speaking_fingerprint_idx'),
+        ]
+
+
+class RecordingBlob(models.Model):
+    """
+    Stored audio bytes, one file per content hash. ref_count counts the
+    SpeakingRecording rows pointing at the file (see speaking/dedup.py).
+    """
+    content_hash = models.CharField(max_length=64, unique=True)
+    path = models.CharField(max_length=500, db_index=True)
+    size = models.BigIntegerField(default=0)
+    ref_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.content_hash[:12]} - {self.path} ({self.ref_count} refs)"
+
+
+class SpeakingResult(models.Model):
+    """
+    What the result page shows for a scored session: per-question scores,
+    overall feedback and the word-level breakdown. The Django session only
+    keeps this row's id.
+    """
+    test_session = models.OneToOneField(
+        TestSession,
+        on_delete=models.CASCADE,
+        related_name="result"
+    )
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="speaking_results"
+    )
+    scores = models.JSONField(default=dict)
+    feedback = models.JSONField(default=dict)
+    word_feedback = models.JSONField(default=dict, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', '-created_at'], name='speaking_result_user_idx'),
+        ]
+
+    def __str__(self):
+        return f"Result for session {self.test_session_id}"
+
+
+class SpeakingScore(models.Model):
+    """
+    Scores of a session under a named scoring version, written by the
+    rescore_sessions command so a model or scoring change never overwrites
+    the scores students were given.
+    """
+    test_session = models.ForeignKey(
+        TestSession,
+        on_delete=models.CASCADE,
+        related_name="score_versions"
+    )
+    version = models.CharField(max_length=50)
+    q1_score = models.FloatField(default=0)
+    q2_score = models.FloatField(default=0)
+    q3_score = models.FloatField(default=0)
+    q4_score = models.FloatField(default=0)
+    q5_score = models.FloatField(default=0)
+    word_feedback = models.JSONField(default=dict, blank=True)
+    scoring_ms = models.IntegerField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['version', 'test_session'],
+                name='speaking_score_unique_version'
+            ),
+        ]
+
+    def get_average_score(self):
+        return (self.q1_score + self.q2_score + self.q3_score + self.q4_score + self.q5_score) / 5
+
+    def __str__(self):
+        return f"Session {self.test_session_id} - {self.version}"
+
+
+class ScoringJob(models.Model):
+    """
+    A session waiting to be scored by a run_scoring_worker node. A worker
+    holds a time-limited lease it renews by heartbeat; jobs whose lease
+    expires go back to the queue (see speaking/scoring_queue.py).
+    """
+    QUEUED = 'queued'
+    LEASED = 'leased'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATES = [
+        (QUEUED, 'Queued'),
+        (LEASED, 'Leased'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    ]
+
+    test_session = models.OneToOneField(
+        TestSession,
+        on_delete=models.CASCADE,
+        related_name="scoring_job"
+    )
+    state = models.CharField(max_length=20, choices=STATES, default=QUEUED)
+    worker = models.CharField(max_length=100, blank=True)
+    lease_expires_at = models.DateTimeField(null=True, blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    scoring_ms = models.IntegerField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['state', 'created_at'], name='speaking_job_queue_idx'),
+            models.Index(fields=['state', 'lease_expires_at'], name='speaking_job_lease_idx'),
+        ]
+
+    def __str__(self):
+        return f"Scoring job for session {self.test_session_id} ({self.state})"
+
+
+class ScoringWorker(models.Model):
+    """A run_scoring_worker process, with its heartbeat and throughput"""
+    name = models.CharField(max_length=100, unique=True)
+    host = models.CharField(max_length=255)
+    pid = models.IntegerField()
+    started_at = models.DateTimeField()
+    last_heartbeat_at = models.DateTimeField()
+    stopped_at = models.DateTimeField(null=True, blank=True)
+    jobs_done = models.IntegerField(default=0)
+    jobs_failed = models.IntegerField(default=0)
+    busy_seconds = models.FloatField(default=0)
+
+    @property
+    def jobs_per_minute(self):
+        uptime = ((self.stopped_at or self.last_heartbeat_at) - self.started_at).total_seconds()
+        return self.jobs_done / uptime * 60 if uptime > 0 else 0
+
+    def __str__(self):
+        return self.name
+
+
+class RecordingUpload(models.Model):
+    """A resumable, chunked recording upload (see speaking/chunked_upload.py)"""
+    upload_id = models.CharField(max_length=64, unique=True)
+    test_session = models.ForeignKey(
+        TestSession,
+        on_delete=models.CASCADE,
+        related_name="uploads"
+    )
+    question = models.IntegerField()
+    word_num = models.IntegerField(null=True, blank=True)
+    received_bytes = models.BigIntegerField(default=0)
+    recording_path = models.CharField(max_length=500, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    committed_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Upload {self.upload_id} - Q{self.question} ({self.received_bytes} bytes)"
+
+
 # Add SuspiciousActivity model
 class SuspiciousActivity(models.Model):
     ACTIVITY_TYPES = [
@@ -107,6 +373,9 @@ class SuspiciousActivity(models.Model):
         ('right_click', 'Right Click Attempt'),
         ('copy_attempt', 'Copy Attempt'),
         ('dev_tools', 'Developer Tools Attempt'),
+        ('duplicate_recording', 'Duplicate Recording'),
+        ('replayed_recording', 'Replayed Recording'),
+        ('shared_recording', 'Recording Replayed by Another Student'),
     ]
     
     user = models.ForeignKey(
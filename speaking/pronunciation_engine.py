@@ -14,11 +14,20 @@ import math
 import language_tool_python
 import torch
 import re
+import time
 from transformers import WhisperForConditionalGeneration, WhisperProcessor, pipeline
+from .audio_codec import AudioDecodeError, decode_bytes
+from .audio_quality import audio_quality_checker
+from .feature_store import FEATURE_DTYPE
+from .fluency import fluency_analyzer
+from .resource_governor import governor
 
 # Initialize grammar checker
 grammar_tool = language_tool_python.LanguageTool('en-US')
 
+# Size torch/BLAS/numba thread pools to this worker's share of the host
+governor.apply()
+
 # Set device
 device = "cuda:0" if torch.cuda.is_available() else "cpu"
 torch_dtype = torch.float16 if torch.cuda.is_available() else torch.float32
@@ -27,6 +36,7 @@ torch_dtype = torch.float16 if torch.cuda.is_available() else torch.float32
 local_model_path = "./speaking/models/swift_model"
 
 print(f"Loading Indian-accent optimized Swift model from {local_model_path} on {device}...")
+_load_started = time.perf_counter()
 
 # Check what files are actually in the directory
 import os
@@ -54,6 +64,7 @@ try:
     processor = WhisperProcessor.from_pretrained(local_model_path)
     
     print("✅ Model loaded successfully from local path!")
+    model_source = "local"
     
 except Exception as e:
     print(f"⚠️ Local load failed: {e}")
@@ -67,6 +78,7 @@ except Exception as e:
     )
     processor = WhisperProcessor.from_pretrained("Oriserve/Whisper-Hindi2Hinglish-Swift")
     print("✅ Model loaded from Hugging Face cache!")
+    model_source = "huggingface"
 
 asr_model.to(device)
 
@@ -88,6 +100,13 @@ asr_pipeline = pipeline(
 
 print("✅ Swift model pipeline ready!")
 
+# Reported by /readyz
+model_status = {
+    'source': model_source,
+    'device': device,
+    'load_seconds': round(time.perf_counter() - _load_started, 2),
+}
+
 # Question data structure
 QUESTIONS = {
     1: {
@@ -169,22 +188,81 @@ class PronunciationEngine:
         self.max_expected_distance = 20000
         self.voice_threshold = 0.001
         self.silence_threshold = 0.005
+        self._reference_features = {}
+        self.last_warm_up = None
+        
+    def load_audio(self, audio_path):
+        """
+        Decode a recording once into a mono float32 buffer at the engine sample rate.
+        Takes a file path or the recording's bytes (e.g. from recording_store).
+        WAV/FLAC/Ogg and WebM-Opus are decoded in-process; anything else falls
+        back to librosa/audioread.
+        """
+        if isinstance(audio_path, (bytes, bytearray)):
+            data = audio_path
+        else:
+            with open(audio_path, 'rb') as f:
+                data = f.read()
         
-    def transcribe_audio(self, audio_path):
+        try:
+            y, sr = decode_bytes(data)
+        except AudioDecodeError:
+            if data is audio_path:
+                y, sr = audio_quality_checker.decode(data, audio_quality_checker.probe_header(data)['format'])
+            else:
+                y, sr = librosa.load(audio_path, sr=self.sample_rate, mono=True)
+        if sr != self.sample_rate:
+            y = librosa.resample(y, orig_sr=sr, target_sr=self.sample_rate)
+        return y.astype(np.float32, copy=False)
+    
+    def transcribe_audio(self, audio):
         """
-        Transcribe audio using Swift model optimized for Indian accents
+        Transcribe audio using Swift model optimized for Indian accents.
+        Accepts a file path or a buffer already decoded by load_audio().
         """
         try:
-            result = asr_pipeline(audio_path)
+            if not isinstance(audio, np.ndarray):
+                audio = self.load_audio(audio)
+            result = asr_pipeline({"raw": audio, "sampling_rate": self.sample_rate})
             return result["text"].strip().lower()
         except Exception as e:
             print(f"Transcription error: {e}")
             return ""
     
+    def transcribe_segments(self, y):
+        """
+        Transcribe a decoded buffer and return ``[(text, start, end), ...]``
+        with segment timestamps in seconds, used by streaming ASR to commit
+        text from audio that is about to leave its decoding window.
+        """
+        try:
+            result = asr_pipeline(
+                {"raw": y, "sampling_rate": self.sample_rate},
+                return_timestamps=True
+            )
+        except Exception as e:
+            print(f"Transcription error: {e}")
+            return []
+        
+        segments = []
+        for chunk in result.get("chunks") or []:
+            start, end = chunk.get("timestamp") or (None, None)
+            segments.append((
+                chunk["text"].strip().lower(),
+                start if start is not None else 0.0,
+                end if end is not None else len(y) / self.sample_rate
+            ))
+        if not segments and result.get("text", "").strip():
+            segments.append((result["text"].strip().lower(), 0.0, len(y) / self.sample_rate))
+        return segments
+    
     def extract_mfcc(self, audio_path):
         """Extract MFCC features for pronunciation scoring"""
         try:
-            y, sr = librosa.load(audio_path, sr=self.sample_rate)
+            if isinstance(audio_path, np.ndarray):
+                y, sr = audio_path, self.sample_rate
+            else:
+                y, sr = self.load_audio(audio_path), self.sample_rate
             if np.max(np.abs(y)) > 0:
                 y = y / np.max(np.abs(y))
             
@@ -264,28 +342,81 @@ class PronunciationEngine:
             print(f"Pronunciation score error: {e}")
             return 0
     
+    def reference_features(self, word_number):
+        """MFCC stack of a Q1 reference word, extracted once per process"""
+        if word_number not in self._reference_features:
+            ref_path = os.path.join(settings.BASE_DIR, 'speaking', 'reference_audio', f'word{word_number}.wav')
+            if not os.path.exists(ref_path):
+                print(f"Reference file not found: {ref_path}")
+                return None
+            self._reference_features[word_number] = self.extract_mfcc(ref_path)
+        return self._reference_features[word_number]
+    
+    def references_loaded(self):
+        return all(self._reference_features.get(w) is not None for w in range(1, 6))
+    
+    def check_asr(self):
+        """
+        Run one second of silence through the ASR pipeline. Unlike
+        transcribe_audio() errors are not swallowed: returns the error, or None.
+        """
+        try:
+            asr_pipeline({"raw": np.zeros(self.sample_rate, dtype=np.float32), "sampling_rate": self.sample_rate})
+            return None
+        except Exception as e:
+            print(f"❌ ASR check failed: {e}")
+            return f"{type(e).__name__}: {e}"
+    
+    def warm_up(self):
+        """
+        Extract every Q1 reference and run one short transcription, so the
+        first student on this worker doesn't pay for lazy initialisation
+        """
+        started = time.perf_counter()
+        missing = [w for w in range(1, 6) if self.reference_features(w) is None]
+        asr_started = time.perf_counter()
+        asr_error = self.check_asr()
+        self.last_warm_up = {
+            'at': time.time(),
+            'seconds': round(time.perf_counter() - started, 3),
+            'asr_seconds': round(time.perf_counter() - asr_started, 3),
+            'asr_error': asr_error,
+            'missing_references': missing,
+        }
+        print(f"✅ Warm-up finished in {self.last_warm_up['seconds']:.2f} s")
+        return self.last_warm_up
+    
     def score_q1_word(self, word_audio_path, word_number):
-        """Score a single Q1 word by comparing with its reference file"""
+        """
+        Score a single Q1 word by comparing with its reference file.
+        Accepts a file path or a buffer already decoded by load_audio().
+        """
         try:
-            ref_path = os.path.join(settings.BASE_DIR, 'speaking', 'reference_audio', f'word{word_number}.wav')
-
             # Check if files exist
-            if not os.path.exists(word_audio_path):
+            if not isinstance(word_audio_path, np.ndarray) and not os.path.exists(word_audio_path):
                 print(f"Student word audio not found: {word_audio_path}")
                 return 0
 
-            if not os.path.exists(ref_path):
-                print(f"Reference file not found: {ref_path}")
-                return 0
-
             # Extract features
-            student_feat = self.extract_mfcc(word_audio_path)
-            ref_feat = self.extract_mfcc(ref_path)
+            return self.score_q1_features(self.extract_mfcc(word_audio_path), word_number)
+
+        except Exception as e:
+            print(f"Error scoring Q1 word {word_number}: {e}")
+            return 0
+    
+    def score_q1_features(self, student_feat, word_number):
+        """
+        Score Q1 word features (e.g. loaded from the feature store) against the
+        reference. Only DTW runs here, so rescoring never decodes audio.
+        """
+        try:
+            ref_feat = self.reference_features(word_number)
 
             if student_feat is None or ref_feat is None:
                 return 0
 
-            # Calculate DTW distance
+            # Calculate DTW distance at stored precision, so fresh scores match rescores
+            student_feat = np.asarray(student_feat, dtype=FEATURE_DTYPE).astype(np.float64)
             distance = self.calculate_dtw_distance(student_feat, ref_feat)
 
             # Convert to score
@@ -301,9 +432,9 @@ class PronunciationEngine:
             print(f"Error scoring Q1 word {word_number}: {e}")
             return 0
     
-    def score_q2_sentence(self, student_audio_path):
+    def score_q2_sentence(self, student_audio_path, transcript=None):
     
-        transcribed_text = self.transcribe_audio(student_audio_path)
+        transcribed_text = transcript if transcript is not None else self.transcribe_audio(student_audio_path)
         spoken_words = transcribed_text.lower().split()
         
         # 🔥 ADD THESE 3 LINES HERE - RIGHT AFTER split()
@@ -337,9 +468,9 @@ class PronunciationEngine:
         
         return word_results, total_score
         
-    def score_q3_phrases(self, student_audio_path):
+    def score_q3_phrases(self, student_audio_path, fluency_factor=1.0, transcript=None):
     
-        transcribed_text = self.transcribe_audio(student_audio_path)
+        transcribed_text = transcript if transcript is not None else self.transcribe_audio(student_audio_path)
         spoken_words = transcribed_text.lower().split()
         
         expected = QUESTIONS[3]['expected_words']
@@ -374,14 +505,14 @@ class PronunciationEngine:
                 'expected': expected[i],
                 'spoken': spoken,
                 'correctness_score': 5.55 if spoken == expected[i] else 0,
-                'fluency_score': 5.55 if spoken != '[silence]' else 0,
+                'fluency_score': 0,
                 'total': 0
             }
             
             if word_result['correctness_score'] > 0:
-                word_result['fluency_score'] = 5.55
+                word_result['fluency_score'] = round(5.55 * fluency_factor, 2)
             elif spoken != '[silence]':
-                word_result['fluency_score'] = 2.77
+                word_result['fluency_score'] = round(2.77 * fluency_factor, 2)
             
             word_result['total'] = round(word_result['correctness_score'] + word_result['fluency_score'], 2)
             total_score += word_result['total']
@@ -389,9 +520,9 @@ class PronunciationEngine:
         
         return word_results, total_score
     
-    def score_q4_sentence(self, student_audio_path):
+    def score_q4_sentence(self, student_audio_path, fluency_factor=1.0, transcript=None):
         """Score Q4: 8 words, each 12.5% (6.25% correctness + 6.25% fluency)"""
-        transcribed_text = self.transcribe_audio(student_audio_path)
+        transcribed_text = transcript if transcript is not None else self.transcribe_audio(student_audio_path)
         spoken_words = transcribed_text.lower().split()
         
         expected = QUESTIONS[4]['expected_words']
@@ -410,9 +541,9 @@ class PronunciationEngine:
             
             if i < len(spoken_words) and i < len(expected) and spoken_words[i] == expected[i]:
                 word_result['correctness_score'] = 6.25
-                word_result['fluency_score'] = 6.25
+                word_result['fluency_score'] = round(6.25 * fluency_factor, 2)
             elif i < len(spoken_words):
-                word_result['fluency_score'] = 3.12
+                word_result['fluency_score'] = round(3.12 * fluency_factor, 2)
             
             word_result['total'] = round(word_result['correctness_score'] + word_result['fluency_score'], 2)
             total_score += word_result['total']
@@ -420,9 +551,9 @@ class PronunciationEngine:
         
         return word_results, total_score
     
-    def score_q5_grammar(self, student_audio_path):
+    def score_q5_grammar(self, student_audio_path, transcript=None):
         """Score Q5: 5 words, each 20% (10% correctness + 10% grammar)"""
-        transcribed_text = self.transcribe_audio(student_audio_path)
+        transcribed_text = transcript if transcript is not None else self.transcribe_audio(student_audio_path)
         spoken_words = transcribed_text.lower().split()
         
         expected = QUESTIONS[5]['expected_words']
@@ -458,31 +589,61 @@ class PronunciationEngine:
     
     def score_recording(self, student_audio_path, question_number):
         """Main scoring function - for Q2-Q5 only"""
-        if not os.path.exists(student_audio_path):
-            return 0, []
+        score, word_results, _, _ = self.analyze_recording(student_audio_path, question_number)
+        return score, word_results
+    
+    def analyze_recording(self, student_audio_path, question_number, transcript=None):
+        """
+        Score a Q2-Q5 recording from a single decode. The same buffer feeds the
+        silence check, prosody analysis and ASR; prosody features and the
+        transcript are returned so the caller can store them with the
+        recording. Takes a file path or the recording's bytes.
+        """
+        if isinstance(student_audio_path, str) and not os.path.exists(student_audio_path):
+            return 0, [], {}, ''
+        
+        try:
+            y = self.load_audio(student_audio_path)
+        except:
+            return 0, [], {}, ''
         
+        return self.analyze_audio(y, question_number, transcript)
+    
+    def analyze_audio(self, y, question_number, transcript=None):
+        """
+        Score an already decoded buffer. A transcript produced elsewhere (e.g.
+        by streaming ASR) skips the transcription step. Returns
+        ``(score, word_results, prosody, transcript)``.
+        """
         # Check for silence
         try:
-            y, sr = librosa.load(student_audio_path, sr=self.sample_rate)
             energy = librosa.feature.rms(y=y)[0]
             if np.max(energy) < self.silence_threshold:
-                return 0, []
+                return 0, [], {}, ''
         except:
-            return 0, []
+            return 0, [], {}, ''
+        
+        prosody = fluency_analyzer.analyze(y, self.sample_rate)
+        fluency_factor = fluency_analyzer.fluency_factor(prosody)
+        if prosody:
+            prosody['fluency_factor'] = fluency_factor
+        
+        if question_number not in (2, 3, 4, 5):
+            return 0, [], prosody, ''
+        if transcript is None:
+            transcript = self.transcribe_audio(y)
         
         # Score based on question type (Q2-Q5 only)
         if question_number == 2:
-            word_results, total = self.score_q2_sentence(student_audio_path)
+            word_results, total = self.score_q2_sentence(y, transcript=transcript)
         elif question_number == 3:
-            word_results, total = self.score_q3_phrases(student_audio_path)
+            word_results, total = self.score_q3_phrases(y, fluency_factor, transcript=transcript)
         elif question_number == 4:
-            word_results, total = self.score_q4_sentence(student_audio_path)
+            word_results, total = self.score_q4_sentence(y, fluency_factor, transcript=transcript)
         elif question_number == 5:
-            word_results, total = self.score_q5_grammar(student_audio_path)
-        else:
-            return 0, []
+            word_results, total = self.score_q5_grammar(y, transcript=transcript)
         
-        return round(total, 2), word_results
+        return round(total, 2), word_results, prosody, transcript
     
     def generate_feedback(self, scores):
         """Generate overall feedback"""
@@ -508,4 +669,13 @@ class PronunciationEngine:
         }
 
 # Create singleton instance
-pronunciation_engine = PronunciationEngine()
\ No newline at end of file
+pronunciation_engine = PronunciationEngine()
+
+
+def warm_up_serving_process():
+    """
+    Warm up a process that will score tests (web workers and scoring
+    workers); management commands that only import the engine skip it
+    """
+    if getattr(settings, 'SPEAKING_WARM_UP', True):
+        pronunciation_engine.warm_up()
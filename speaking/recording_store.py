@@ -0,0 +1,386 @@
+"""
+Read access to stored recordings from any node.
+
+Recording paths (SpeakingRecording.path) are relative to MEDIA_ROOT. The web
+node keeps writing them through RecordingStorage. Scoring nodes read them
+through a RecordingStore: put/get/stream/stat/delete over those paths.
+
+- LocalRecordingStore reads MEDIA_ROOT directly (the default).
+- HttpRecordingStore talks to RecordingStoreServer, which
+  ``manage.py serve_recordings`` runs next to the web node's MEDIA_ROOT.
+- CachedRecordingStore wraps a remote store with a size-bounded local
+  read-through cache, so hot clips (e.g. a rescore run) are fetched once.
+
+Clips are read into memory or streamed in chunks, so decoders never need a
+temporary copy.
+"""
+import hashlib
+import hmac
+import ipaddress
+import os
+import posixpath
+import shutil
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote
+import requests
+from django.conf import settings
+
+CHUNK_SIZE = 64 * 1024
+MB = 1024 * 1024
+
+# Only recordings are served; other media (reference audio, features) is not
+SERVED_PREFIX = 'recordings/'
+
+
+def clean_path(path):
+    """Normalise a MEDIA_ROOT-relative path, rejecting anything that escapes it"""
+    path = posixpath.normpath(path.replace('\\', '/')).lstrip('/')
+    if path in ('', '.') or path.startswith('..'):
+        raise ValueError(f'Invalid recording path: {path!r}')
+    return path
+
+
+def is_loopback(host):
+    """Whether ``host`` only accepts connections from this machine"""
+    if host == 'localhost':
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+class LocalRecordingStore:
+    def __init__(self, root=None):
+        self.root = root or settings.MEDIA_ROOT
+
+    def full_path(self, path):
+        return os.path.join(self.root, *clean_path(path).split('/'))
+
+    def put(self, path, data):
+        full_path = self.full_path(path)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        tmp_path = f'{full_path}.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, full_path)
+
+    def get(self, path):
+        """The clip's bytes, or None if it does not exist"""
+        try:
+            with open(self.full_path(path), 'rb') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def stream(self, path, chunk_size=CHUNK_SIZE):
+        """Yield the clip in chunks; raises FileNotFoundError if it does not exist"""
+        with open(self.full_path(path), 'rb') as f:
+            while True:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    return
+                yield chunk
+
+    def stat(self, path):
+        """``{'size': ..., 'mtime': ...}``, or None if the clip does not exist"""
+        try:
+            st = os.stat(self.full_path(path))
+        except FileNotFoundError:
+            return None
+        return {'size': st.st_size, 'mtime': st.st_mtime}
+
+    def exists(self, path):
+        return self.stat(path) is not None
+
+    def delete(self, path):
+        try:
+            os.remove(self.full_path(path))
+        except FileNotFoundError:
+            pass
+
+
+class HttpRecordingStore:
+    """Client for RecordingStoreServer"""
+    def __init__(self, base_url, token='', timeout=30):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.session = requests.Session()
+        if token:
+            self.session.headers['Authorization'] = f'Bearer {token}'
+
+    def url(self, path):
+        return f'{self.base_url}/{clean_path(path)}'
+
+    def put(self, path, data):
+        self.session.put(self.url(path), data=data, timeout=self.timeout).raise_for_status()
+
+    def get(self, path):
+        response = self.session.get(self.url(path), timeout=self.timeout)
+        if response.status_code == 404:
+            return None
+        response.raise_for_status()
+        return response.content
+
+    def stream(self, path, chunk_size=CHUNK_SIZE):
+        with self.session.get(self.url(path), stream=True, timeout=self.timeout) as response:
+            if response.status_code == 404:
+                raise FileNotFoundError(path)
+            response.raise_for_status()
+            yield from response.iter_content(chunk_size)
+
+    def stat(self, path):
+        response = self.session.head(self.url(path), timeout=self.timeout)
+        if response.status_code == 404:
+            return None
+        response.raise_for_status()
+        return {
+            'size': int(response.headers.get('Content-Length', 0)),
+            'mtime': float(response.headers.get('X-Mtime', 0)),
+        }
+
+    def exists(self, path):
+        return self.stat(path) is not None
+
+    def delete(self, path):
+        response = self.session.delete(self.url(path), timeout=self.timeout)
+        if response.status_code != 404:
+            response.raise_for_status()
+
+
+class CachedRecordingStore:
+    """
+    Read-through cache in front of a (remote) store. Cached clips are keyed
+    by a hash of their path and evicted least-recently-used once the cache
+    passes ``max_bytes``. Stored recordings never change in place (a new
+    take gets a new name), so cached copies are never stale.
+    """
+    def __init__(self, backend, cache_dir, max_bytes):
+        self.backend = backend
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+        self._size = sum(entry.stat().st_size for entry in self._entries())
+
+    def _entries(self):
+        for shard in os.scandir(self.cache_dir):
+            if shard.is_dir():
+                yield from (entry for entry in os.scandir(shard.path) if not entry.name.endswith('.tmp'))
+
+    def cache_path(self, path):
+        digest = hashlib.sha1(clean_path(path).encode()).hexdigest()
+        return os.path.join(self.cache_dir, digest[:2], digest + os.path.splitext(path)[1])
+
+    def _read(self, path):
+        cache_path = self.cache_path(path)
+        try:
+            with open(cache_path, 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        os.utime(cache_path)  # mtime is the LRU clock
+        return data
+
+    def _commit(self, tmp_path, cache_path, size):
+        os.replace(tmp_path, cache_path)
+        with self._lock:
+            self._size += size
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _store(self, path, data):
+        cache_path = self.cache_path(path)
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        tmp_path = f'{cache_path}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        self._commit(tmp_path, cache_path, len(data))
+
+    def _evict(self):
+        """Drop least recently used clips down to 90% of the budget (lock held)"""
+        entries = sorted(self._entries(), key=lambda entry: entry.stat().st_mtime)
+        self._size = sum(entry.stat().st_size for entry in entries)
+        for entry in entries:
+            if self._size <= self.max_bytes * 0.9:
+                break
+            try:
+                size = entry.stat().st_size
+                os.remove(entry.path)
+                self._size -= size
+            except FileNotFoundError:
+                pass
+
+    def put(self, path, data):
+        self.backend.put(path, data)
+        self._store(path, data)
+
+    def get(self, path):
+        data = self._read(path)
+        if data is not None:
+            self.hits += 1
+            return data
+        self.misses += 1
+        data = self.backend.get(path)
+        if data is not None:
+            self._store(path, data)
+        return data
+
+    def stream(self, path, chunk_size=CHUNK_SIZE):
+        cache_path = self.cache_path(path)
+        try:
+            f = open(cache_path, 'rb')
+        except FileNotFoundError:
+            f = None
+        if f is not None:
+            self.hits += 1
+            os.utime(cache_path)
+            with f:
+                while True:
+                    chunk = f.read(chunk_size)
+                    if not chunk:
+                        return
+                    yield chunk
+
+        # Miss: pass chunks through while filling the cache; only a complete copy is kept
+        self.misses += 1
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        tmp_path = f'{cache_path}.{threading.get_ident()}.tmp'
+        size = 0
+        try:
+            with open(tmp_path, 'wb') as out:
+                for chunk in self.backend.stream(path, chunk_size):
+                    out.write(chunk)
+                    size += len(chunk)
+                    yield chunk
+            self._commit(tmp_path, cache_path, size)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def stat(self, path):
+        try:
+            st = os.stat(self.cache_path(path))
+            return {'size': st.st_size, 'mtime': st.st_mtime}
+        except FileNotFoundError:
+            return self.backend.stat(path)
+
+    def exists(self, path):
+        return self.stat(path) is not None
+
+    def delete(self, path):
+        self.backend.delete(path)
+        try:
+            size = os.path.getsize(self.cache_path(path))
+            os.remove(self.cache_path(path))
+            with self._lock:
+                self._size -= size
+        except FileNotFoundError:
+            pass
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0,
+            'bytes': self._size,
+            'max_bytes': self.max_bytes,
+        }
+
+
+class RecordingStoreHandler(BaseHTTPRequestHandler):
+    """GET/HEAD/PUT/DELETE of MEDIA_ROOT/recordings files for HttpRecordingStore"""
+    protocol_version = 'HTTP/1.1'
+
+    def _path(self):
+        if self.server.token:
+            expected = f'Bearer {self.server.token}'.encode('utf-8')
+            supplied = self.headers.get('Authorization', '').encode('utf-8')
+            if not hmac.compare_digest(supplied, expected):
+                self._reply(403)
+                return None
+        try:
+            path = clean_path(unquote(self.path.split('?', 1)[0]))
+        except ValueError:
+            path = ''
+        if not path.startswith(SERVED_PREFIX):
+            self._reply(404)
+            return None
+        return path
+
+    def _reply(self, status, headers=None):
+        self.send_response(status)
+        for name, value in (headers or {'Content-Length': '0'}).items():
+            self.send_header(name, value)
+        self.end_headers()
+
+    def do_HEAD(self, body=False):
+        path = self._path()
+        if path is None:
+            return
+        st = self.server.store.stat(path)
+        if st is None:
+            self._reply(404)
+            return
+        self._reply(200, {
+            'Content-Type': 'application/octet-stream',
+            'Content-Length': str(st['size']),
+            'X-Mtime': str(st['mtime']),
+        })
+        if body:
+            with open(self.server.store.full_path(path), 'rb') as f:
+                shutil.copyfileobj(f, self.wfile, CHUNK_SIZE)
+
+    def do_GET(self):
+        self.do_HEAD(body=True)
+
+    def do_PUT(self):
+        path = self._path()
+        if path is None:
+            return
+        length = int(self.headers.get('Content-Length', 0))
+        self.server.store.put(path, self.rfile.read(length))
+        self._reply(201)
+
+    def do_DELETE(self):
+        path = self._path()
+        if path is None:
+            return
+        self.server.store.delete(path)
+        self._reply(204)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class RecordingStoreServer(ThreadingHTTPServer):
+    """Serves a LocalRecordingStore to HttpRecordingStore clients"""
+    daemon_threads = True
+
+    def __init__(self, address, store=None, token='', verbose=False):
+        if not token and not is_loopback(address[0]):
+            raise ValueError('A token is required to serve recordings beyond localhost')
+        super().__init__(address, RecordingStoreHandler)
+        self.store = store or LocalRecordingStore()
+        self.token = token
+        self.verbose = verbose
+
+
+def build_recording_store():
+    """The store configured by RECORDING_STORE_URL / RECORDING_CACHE_MB"""
+    url = getattr(settings, 'RECORDING_STORE_URL', '')
+    if not url:
+        return LocalRecordingStore()
+    store = HttpRecordingStore(url, getattr(settings, 'RECORDING_STORE_TOKEN', ''))
+    cache_mb = getattr(settings, 'RECORDING_CACHE_MB', 0)
+    if cache_mb:
+        store = CachedRecordingStore(store, settings.RECORDING_CACHE_DIR, cache_mb * MB)
+    return store
+
+
+recording_store = build_recording_store()
@@ -0,0 +1,164 @@
+"""
+CPU budget for in-process speech inference.
+
+Every web worker loads its own Whisper pipeline, and by default torch, the
+BLAS library and numba each start one thread per core in every worker. With
+several workers per host, concurrent transcriptions then oversubscribe the
+CPU. The governor splits a per-host core budget between the workers: each
+worker gets budget // workers threads for torch intra-op parallelism, BLAS
+and numba, a small inter-op pool, and optionally its own block of cores.
+
+Thread-pool sizes that are read at import (OpenMP, BLAS, numba) must be set
+before numpy/librosa/torch are imported, so ``configure_environment()`` runs
+from wsgi/asgi, and again from gunicorn's post_fork hook with the worker's
+core slot. ``apply()`` runs after torch is imported and records
+the effective settings reported by the diagnostics endpoint.
+"""
+import os
+import sys
+
+THREAD_ENV_VARS = (
+    'OMP_NUM_THREADS',
+    'MKL_NUM_THREADS',
+    'OPENBLAS_NUM_THREADS',
+    'NUMEXPR_NUM_THREADS',
+    'VECLIB_MAXIMUM_THREADS',
+    'NUMBA_NUM_THREADS',
+)
+
+
+def available_cpus():
+    """CPUs this process may run on, honouring cgroup/taskset restrictions"""
+    try:
+        return sorted(os.sched_getaffinity(0))
+    except AttributeError:  # not available on macOS/Windows
+        return list(range(os.cpu_count() or 1))
+
+
+def plan(core_budget, workers, interop_threads=1, slot=None, pin=False):
+    """
+    Split ``core_budget`` cores between ``workers`` processes and return the
+    settings for the worker in ``slot`` (0-based).
+    """
+    cpus = available_cpus()
+    core_budget = max(1, core_budget or len(cpus))
+    workers = max(1, workers or 1)
+    threads = max(1, core_budget // workers)
+
+    cores = None
+    if pin and slot is not None:
+        # Each worker gets a contiguous block; blocks wrap when workers outnumber cores
+        budget_cpus = cpus[:core_budget]
+        start = slot * threads
+        cores = sorted({budget_cpus[(start + i) % len(budget_cpus)] for i in range(threads)})
+
+    return {
+        'core_budget': core_budget,
+        'workers': workers,
+        'slot': slot,
+        'intra_op_threads': threads,
+        'inter_op_threads': max(1, min(interop_threads, threads)),
+        'cpu_affinity': cores,
+    }
+
+
+class ResourceGovernor:
+    def __init__(self):
+        self.planned = None
+        self.effective = {}
+
+    def _settings(self):
+        from django.conf import settings
+        return {
+            'core_budget': getattr(settings, 'INFERENCE_CORE_BUDGET', None),
+            'workers': getattr(settings, 'INFERENCE_WORKERS', 1),
+            'interop_threads': getattr(settings, 'INFERENCE_INTEROP_THREADS', 1),
+            'pin': getattr(settings, 'INFERENCE_PIN_CPUS', False),
+        }
+
+    def configure_environment(self, workers=None, slot=None, core_budget=None):
+        """
+        Plan this process's share of the budget and export the thread-pool
+        sizes before the numeric libraries are imported. Safe to call twice;
+        the first call wins.
+        """
+        if self.planned is not None:
+            return self.planned
+
+        options = self._settings()
+        self.planned = plan(
+            core_budget or options['core_budget'], workers or options['workers'], options['interop_threads'], slot, options['pin']
+        )
+        threads = str(self.planned['intra_op_threads'])
+        for name in THREAD_ENV_VARS:
+            os.environ[name] = threads
+
+        if self.planned['cpu_affinity']:
+            try:
+                os.sched_setaffinity(0, self.planned['cpu_affinity'])
+            except (AttributeError, OSError) as e:
+                print(f"⚠️ Could not pin worker to CPUs {self.planned['cpu_affinity']}: {e}")
+        return self.planned
+
+    def configure_worker(self, workers, slot):
+        """Re-plan in a forked web worker; applies at once if the app was preloaded"""
+        self.planned = None
+        self.configure_environment(workers, slot)
+        if 'torch' in sys.modules:
+            self.apply()
+
+    def apply(self):
+        """
+        Apply the plan to libraries that are already imported and record
+        what actually took effect. Called once torch is loaded.
+        """
+        planned = self.configure_environment()
+        threads = planned['intra_op_threads']
+
+        try:
+            import torch
+            torch.set_num_threads(threads)
+            try:
+                torch.set_num_interop_threads(planned['inter_op_threads'])
+            except RuntimeError:
+                # Only settable before the first inter-op task (e.g. with preload_app)
+                pass
+            self.effective['torch_intra_op_threads'] = torch.get_num_threads()
+            self.effective['torch_inter_op_threads'] = torch.get_num_interop_threads()
+        except ImportError:
+            pass
+
+        try:
+            from threadpoolctl import threadpool_info, threadpool_limits
+            threadpool_limits(limits=threads)
+            self.effective['native_pools'] = [
+                {'api': pool['user_api'], 'library': pool['internal_api'], 'threads': pool['num_threads']}
+                for pool in threadpool_info()
+            ]
+        except ImportError:
+            pass
+
+        try:
+            import numba
+            # numba can't grow past the pool size it was imported with
+            numba.set_num_threads(min(threads, numba.config.NUMBA_NUM_THREADS))
+            self.effective['numba_threads'] = numba.get_num_threads()
+        except ImportError:
+            pass
+
+        self.effective['cpu_affinity'] = available_cpus()
+        print(f"✅ Inference threads: {threads} intra-op, {planned['inter_op_threads']} inter-op "
+              f"(worker {planned['slot']} of {planned['workers']}, budget {planned['core_budget']} cores)")
+        return self.effective
+
+    def report(self):
+        return {
+            'pid': os.getpid(),
+            'cpu_count': os.cpu_count(),
+            'planned': self.planned,
+            'effective': self.effective,
+            'environment': {name: os.environ.get(name) for name in THREAD_ENV_VARS},
+        }
+
+
+governor = ResourceGovernor()
@@ -0,0 +1,134 @@
+"""
+Database-backed queue for scoring speaking sessions on dedicated nodes.
+
+process_results enqueues a ScoringJob when SPEAKING_SCORING_QUEUE is on, and
+any node running ``manage.py run_scoring_worker`` against the same database
+claims it. Claims are conditional UPDATEs, like claim_processing, so they
+are atomic on SQLite and Postgres alike. A claim is a lease that the worker
+renews by heartbeat; a worker that dies stops renewing, and its job is
+re-queued once the lease expires.
+"""
+import os
+import socket
+import time
+from datetime import timedelta
+from django.db.models import F
+from django.utils import timezone
+from .models import ScoringJob, ScoringWorker, SpeakingResult
+
+MAX_ATTEMPTS = 3
+
+
+def enqueue_scoring(test_session):
+    """Queue a session for scoring; a failed job is queued again, others are left alone"""
+    job, created = ScoringJob.objects.get_or_create(test_session=test_session)
+    if not created and job.state == ScoringJob.FAILED:
+        ScoringJob.objects.filter(pk=job.pk, state=ScoringJob.FAILED).update(
+            state=ScoringJob.QUEUED, worker='', attempts=0, error=''
+        )
+    return job
+
+
+class ScoringFailed(Exception):
+    pass
+
+
+def wait_for_result(test_session, timeout, poll_interval=0.5):
+    """
+    Wait for a queued session's result; returns the SpeakingResult, or None
+    if it is still queued. Raises ScoringFailed once the job has given up.
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        speaking_result = SpeakingResult.objects.filter(test_session=test_session).first()
+        if speaking_result is not None:
+            return speaking_result
+        job = ScoringJob.objects.filter(test_session=test_session).values('state', 'error').first()
+        if job and job['state'] == ScoringJob.FAILED:
+            raise ScoringFailed(job['error'] or 'Scoring failed')
+        if time.monotonic() >= deadline:
+            return None
+        time.sleep(poll_interval)
+
+
+def requeue_expired(max_attempts=MAX_ATTEMPTS):
+    """Return jobs whose worker stopped heartbeating to the queue; returns how many"""
+    expired = ScoringJob.objects.filter(state=ScoringJob.LEASED, lease_expires_at__lt=timezone.now())
+    gave_up = expired.filter(attempts__gte=max_attempts).update(
+        state=ScoringJob.FAILED, error='Lease expired too many times', finished_at=timezone.now()
+    )
+    requeued = expired.update(state=ScoringJob.QUEUED, worker='')
+    return requeued + gave_up
+
+
+def claim_job(worker_name, lease_seconds):
+    """Lease the oldest queued job to ``worker_name``; returns it or None"""
+    candidates = ScoringJob.objects.filter(state=ScoringJob.QUEUED).order_by('created_at')
+    for pk in candidates.values_list('pk', flat=True)[:10]:
+        now = timezone.now()
+        # Another worker may take the same row first; only one UPDATE matches
+        claimed = ScoringJob.objects.filter(pk=pk, state=ScoringJob.QUEUED).update(
+            state=ScoringJob.LEASED,
+            worker=worker_name,
+            lease_expires_at=now + timedelta(seconds=lease_seconds),
+            started_at=now,
+            attempts=F('attempts') + 1
+        )
+        if claimed:
+            return ScoringJob.objects.select_related('test_session').get(pk=pk)
+    return None
+
+
+def renew_lease(job, worker_name, lease_seconds):
+    """Extend a held lease; False means it expired and another worker may own the job"""
+    return ScoringJob.objects.filter(pk=job.pk, state=ScoringJob.LEASED, worker=worker_name).update(
+        lease_expires_at=timezone.now() + timedelta(seconds=lease_seconds)
+    ) == 1
+
+
+def finish_job(job, worker_name, scoring_ms):
+    return ScoringJob.objects.filter(pk=job.pk, state=ScoringJob.LEASED, worker=worker_name).update(
+        state=ScoringJob.DONE, finished_at=timezone.now(), scoring_ms=scoring_ms, error=''
+    ) == 1
+
+
+def fail_job(job, worker_name, error, max_attempts=MAX_ATTEMPTS):
+    """
+    Re-queue a failed job for another attempt, or give up after
+    ``max_attempts``. Returns True if it was re-queued.
+    """
+    held = ScoringJob.objects.filter(pk=job.pk, state=ScoringJob.LEASED, worker=worker_name)
+    if held.filter(attempts__gte=max_attempts).update(
+        state=ScoringJob.FAILED, error=error, finished_at=timezone.now()
+    ):
+        return False
+    return held.update(state=ScoringJob.QUEUED, worker='', error=error) == 1
+
+
+def queue_depth():
+    return ScoringJob.objects.filter(state__in=[ScoringJob.QUEUED, ScoringJob.LEASED]).count()
+
+
+def register_worker(name=None):
+    now = timezone.now()
+    host = socket.gethostname()
+    name = name or f'{host}:{os.getpid()}'
+    worker, _ = ScoringWorker.objects.update_or_create(
+        name=name,
+        defaults={
+            'host': host, 'pid': os.getpid(), 'started_at': now, 'last_heartbeat_at': now,
+            'stopped_at': None, 'jobs_done': 0, 'jobs_failed': 0, 'busy_seconds': 0,
+        }
+    )
+    return worker
+
+
+def worker_heartbeat(worker, done=0, failed=0, busy_seconds=0.0, stopped=False):
+    now = timezone.now()
+    ScoringWorker.objects.filter(pk=worker.pk).update(
+        last_heartbeat_at=now,
+        stopped_at=now if stopped else None,
+        jobs_done=F('jobs_done') + done,
+        jobs_failed=F('jobs_failed') + failed,
+        busy_seconds=F('busy_seconds') + busy_seconds
+    )
@@ -0,0 +1,86 @@
+"""
+Single-flight execution of speaking test scoring per TestSession
+"""
+import threading
+import time
+from concurrent.futures import Future
+from datetime import timedelta
+from django.db.models import Q
+from django.utils import timezone
+from .models import TestSession
+
+# Longest a request waits on another process's run; under gunicorn's 30 s worker timeout
+PROCESSING_WAIT = 20
+
+
+class SingleFlight:
+    """
+    Run at most one call per key inside this process. Concurrent callers with
+    the same key block on the leader's call and receive its result (or error).
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn):
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._calls[key] = future
+
+        if not leader:
+            return future.result()
+
+        try:
+            result = fn()
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._calls)
+
+
+def claim_processing(session_id, stale_after=600):
+    """
+    Atomically mark a session as being scored. The conditional UPDATE is the
+    cross-process lock: only one caller sees a row count of 1. Claims older
+    than ``stale_after`` seconds are treated as abandoned and can be taken over.
+    """
+    stale_before = timezone.now() - timedelta(seconds=stale_after)
+    claimable = (
+        Q(processing_state__in=['', TestSession.PROCESSING_FAILED])
+        | Q(processing_state=TestSession.PROCESSING, processing_started_at__lt=stale_before)
+    )
+    updated = TestSession.objects.filter(claimable, session_id=session_id).update(
+        processing_state=TestSession.PROCESSING,
+        processing_started_at=timezone.now()
+    )
+    return updated == 1
+
+
+def release_processing(session_id, state):
+    TestSession.objects.filter(session_id=session_id).update(processing_state=state)
+
+
+def wait_for_processing(session_id, timeout=PROCESSING_WAIT, poll_interval=0.5):
+    """Wait for another process to finish or fail scoring; returns the session or None"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        test_session = TestSession.objects.get(session_id=session_id)
+        if test_session.processing_state != TestSession.PROCESSING:
+            return test_session
+        time.sleep(poll_interval)
+    return None
+
+
+# Shared by all requests in this process
+scoring_flight = SingleFlight()
@@ -0,0 +1,75 @@
+"""
+Storage for speaking recordings: hashed shard directories, FLAC for PCM audio
+and Ogg Opus for browser WebM recordings
+"""
+import hashlib
+import io
+import os
+import soundfile as sf
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from .audio_codec import AudioDecodeError, webm_to_ogg
+from .audio_quality import audio_quality_checker
+
+# WAV sample formats FLAC can hold bit-exactly
+FLAC_SUBTYPES = {'PCM_16', 'PCM_24', 'PCM_S8', 'PCM_U8'}
+
+
+class RecordingStorage(FileSystemStorage):
+    """
+    Saves recordings as MEDIA_ROOT/recordings/<aa>/<bb>/<name>, where aa/bb
+    are taken from a hash of the file name so no directory grows unbounded.
+    PCM WAV is re-encoded to lossless FLAC. WebM-Opus is re-wrapped as Ogg
+    Opus without re-encoding, so every compressed recording is stored in a
+    format libsndfile reads directly; decoding Opus to FLAC would only make
+    it larger. Names returned by save() are relative to MEDIA_ROOT/recordings,
+    like FileSystemStorage.
+    """
+    def __init__(self, **kwargs):
+        kwargs.setdefault('location', os.path.join(settings.MEDIA_ROOT, 'recordings'))
+        kwargs.setdefault('base_url', f'{settings.MEDIA_URL}recordings/')
+        super().__init__(**kwargs)
+
+    def shard(self, name):
+        name = os.path.basename(name)
+        digest = hashlib.sha1(name.encode()).hexdigest()
+        return f'{digest[:2]}/{digest[2:4]}/{name}'
+
+    def is_sharded(self, name):
+        parts = name.split('/')
+        return len(parts) == 3 and len(parts[0]) == 2 and len(parts[1]) == 2
+
+    def compress(self, data):
+        """Return ``(bytes, extension)`` for the stored form of an upload"""
+        fmt = audio_quality_checker.probe_header(data)['format']
+        if fmt == 'wav':
+            try:
+                info = sf.info(io.BytesIO(data))
+                if info.subtype in FLAC_SUBTYPES:
+                    y, sr = sf.read(io.BytesIO(data), dtype='int32', always_2d=True)
+                    out = io.BytesIO()
+                    subtype = 'PCM_24' if info.subtype == 'PCM_24' else 'PCM_16'
+                    sf.write(out, y if subtype == 'PCM_24' else (y >> 16).astype('int16'), sr,
+                             format='FLAC', subtype=subtype)
+                    return out.getvalue(), '.flac'
+            except Exception as e:
+                print(f"FLAC compression skipped: {e}")
+            return data, '.wav'
+        if fmt == 'webm':
+            try:
+                return webm_to_ogg(data), '.ogg'
+            except AudioDecodeError as e:
+                print(f"Ogg remux skipped: {e}")
+        if fmt in ('webm', 'ogg', 'flac'):
+            return data, f'.{fmt}'
+        return data, ''
+
+    def save(self, name, content, max_length=None):
+        content.seek(0)
+        data, ext = self.compress(content.read())
+        stem, original_ext = os.path.splitext(os.path.basename(name))
+        return super().save(self.shard(stem + (ext or original_ext)), ContentFile(data), max_length)
+
+
+recording_storage = RecordingStorage()
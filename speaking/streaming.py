@@ -0,0 +1,262 @@
+"""
+Streaming partial transcription for speaking answers over a WebSocket.
+
+The browser sends 16 kHz mono 16-bit PCM frames while the student speaks.
+Every ``step_seconds`` of new audio the current window is re-decoded and the
+partial transcript is pushed back; when the student stops, only the final
+window has to be decoded before the transcript and score are ready.
+"""
+import asyncio
+import io
+import json
+import threading
+from http.cookies import SimpleCookie
+from importlib import import_module
+from urllib.parse import parse_qs
+import numpy as np
+import soundfile as sf
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import SESSION_KEY
+from .audio_quality import audio_quality_checker
+from .dedup import store_recording, attach_recording
+from .fingerprint import index_recording
+from .models import TestSession
+from .pronunciation_engine import pronunciation_engine
+from .views import recording_filename
+
+STREAM_PATH = '/ws/speaking/stream/'
+
+# Longest answer buffered per stream (about 11 MB of PCM); longer streams are closed
+MAX_STREAM_SECONDS = 180
+
+# One ASR call at a time per process; concurrent streams queue for the model
+_asr_lock = threading.Lock()
+
+
+class StreamingTranscriber:
+    def __init__(self, engine, step_seconds=1.0, window_seconds=20.0, keep_seconds=5.0, max_seconds=MAX_STREAM_SECONDS):
+        self.engine = engine
+        self.sample_rate = engine.sample_rate
+        self.max_samples = int(max_seconds * self.sample_rate)
+        self.step = int(step_seconds * self.sample_rate)
+        self.window = int(window_seconds * self.sample_rate)
+        self.keep = int(keep_seconds * self.sample_rate)
+        self.lock = threading.Lock()
+        self.blocks = []
+        self.total = 0
+        self.window_start = 0   # first sample of the decoding window
+        self.committed = []     # text of audio that has left the window
+        self.decoded_until = 0
+        self.previous = ''
+
+    def add_pcm(self, data):
+        """Buffer a PCM frame; False (and nothing buffered) once the stream is too long"""
+        if self.total + len(data) // 2 > self.max_samples:
+            return False
+        samples = np.frombuffer(data[:len(data) - len(data) % 2], dtype='<i2').astype(np.float32) / 32768.0
+        with self.lock:
+            self.blocks.append(samples)
+            self.total += len(samples)
+        return True
+
+    @property
+    def audio(self):
+        with self.lock:
+            if len(self.blocks) > 1:
+                self.blocks = [np.concatenate(self.blocks)]
+            return self.blocks[0] if self.blocks else np.zeros(0, dtype=np.float32)
+
+    def needs_partial(self):
+        return self.total - self.decoded_until >= self.step
+
+    def _decode_window(self, y):
+        with _asr_lock:
+            return self.engine.transcribe_segments(y[self.window_start:])
+
+    def partial(self):
+        """Re-decode the current window and slide it forward once it is full"""
+        y = self.audio
+        self.decoded_until = len(y)
+        segments = self._decode_window(y)
+
+        # Commit segments that end before the part of the window we keep
+        if len(y) - self.window_start > self.window:
+            cut = (len(y) - self.window_start - self.keep) / self.sample_rate
+            committed_until = 0.0
+            for text, start, end in segments:
+                if end > cut:
+                    break
+                self.committed.append(text)
+                committed_until = end
+            if committed_until:
+                self.window_start += int(committed_until * self.sample_rate)
+                segments = [s for s in segments if s[2] > committed_until]
+
+        text = ' '.join(self.committed + [s[0] for s in segments]).strip()
+
+        # Words that agree with the previous hypothesis are unlikely to change
+        stable = []
+        for new, old in zip(text.split(), self.previous.split()):
+            if new != old:
+                break
+            stable.append(new)
+        self.previous = text
+
+        return {'type': 'partial', 'text': text, 'stable': ' '.join(stable)}
+
+    def final(self):
+        segments = self._decode_window(self.audio)
+        return ' '.join(self.committed + [s[0] for s in segments]).strip()
+
+
+def _same_origin(scope):
+    headers = dict(scope.get('headers') or [])
+    origin = headers.get(b'origin', b'').decode()
+    if not origin:
+        return True
+    host = headers.get(b'host', b'').decode()
+    return origin.split('://', 1)[-1] == host
+
+
+def _load_context(scope):
+    """Resolve the Django session and the user's active TestSession"""
+    headers = dict(scope.get('headers') or [])
+    cookie = SimpleCookie()
+    cookie.load(headers.get(b'cookie', b'').decode())
+    morsel = cookie.get(settings.SESSION_COOKIE_NAME)
+    if morsel is None:
+        return None
+
+    session = import_module(settings.SESSION_ENGINE).SessionStore(morsel.value)
+    user_id = session.get(SESSION_KEY)
+    session_id = session.get('test_session_id')
+    if not user_id or not session_id:
+        return None
+
+    test_session = TestSession.objects.filter(session_id=session_id).first()
+    if test_session is None or (test_session.user_id and str(test_session.user_id) != str(user_id)):
+        return None
+    return session, test_session
+
+
+def _finalize(transcriber, session, test_session, q_num):
+    """Store the streamed recording and score it with the final transcript"""
+    text = transcriber.final()
+    y = transcriber.audio
+    sr = transcriber.sample_rate
+
+    wav = io.BytesIO()
+    sf.write(wav, y, sr, format='WAV', subtype='PCM_16')
+    data = wav.getvalue()
+
+    quality = audio_quality_checker.check(data, decoded=(y, sr))
+    if not quality['ok']:
+        return {
+            'type': 'final',
+            'success': False,
+            'text': text,
+            'error': quality['issues'][0]['message'],
+            'quality': quality
+        }
+
+    saved_path, digest = store_recording(recording_filename(test_session.session_id, q_num), data)
+
+    score, word_results, prosody, _ = pronunciation_engine.analyze_audio(y, q_num, transcript=text)
+
+    recording = attach_recording(
+        test_session, q_num, 0, saved_path, digest,
+        duration=quality['metrics'].get('duration'), transcript=text, prosody=prosody
+    )
+    index_recording(recording, decoded=(y, sr))
+
+    answered_questions = session.get('answered_questions', [])
+    if not isinstance(answered_questions, list):
+        answered_questions = []
+    if q_num not in answered_questions:
+        answered_questions.append(q_num)
+        session['answered_questions'] = answered_questions
+        session.save()
+
+    return {
+        'type': 'final',
+        'success': True,
+        'text': text,
+        'score': score,
+        'word_results': word_results,
+        'filename': saved_path,
+        'next_question': q_num + 1 if q_num < 5 else None,
+        'progress_percentage': int((len(answered_questions) / 5) * 100),
+        'quality': quality
+    }
+
+
+async def speaking_stream(scope, receive, send):
+    """ASGI WebSocket handler mounted at STREAM_PATH by english_learning/asgi.py"""
+    message = await receive()
+    if message['type'] != 'websocket.connect':
+        return
+
+    async def send_json(payload):
+        await send({'type': 'websocket.send', 'text': json.dumps(payload)})
+
+    query = parse_qs(scope.get('query_string', b'').decode())
+    try:
+        q_num = int(query.get('q_num', ['0'])[0])
+    except ValueError:
+        q_num = 0
+
+    context = await sync_to_async(_load_context)(scope) if _same_origin(scope) else None
+    if context is None or not 2 <= q_num <= 5:
+        await send({'type': 'websocket.close', 'code': 4403})
+        return
+    session, test_session = context
+
+    await send({'type': 'websocket.accept'})
+    await send_json({'type': 'ready'})
+
+    transcriber = StreamingTranscriber(pronunciation_engine)
+    decoding = None
+
+    async def push_partial():
+        try:
+            await send_json(await asyncio.to_thread(transcriber.partial))
+        except Exception as e:
+            print(f"Streaming partial error: {e}")
+
+    while True:
+        message = await receive()
+        if message['type'] == 'websocket.disconnect':
+            return
+
+        if message.get('bytes'):
+            if not transcriber.add_pcm(message['bytes']):
+                await send_json({
+                    'type': 'final', 'success': False,
+                    'error': f'Recording is longer than {MAX_STREAM_SECONDS} seconds'
+                })
+                await send({'type': 'websocket.close', 'code': 1009})
+                return
+            if transcriber.needs_partial() and (decoding is None or decoding.done()):
+                decoding = asyncio.ensure_future(push_partial())
+            continue
+
+        try:
+            data = json.loads(message.get('text') or '{}')
+        except ValueError:
+            continue
+        if data.get('type') != 'stop':
+            continue
+
+        if decoding is not None:
+            await decoding
+        try:
+            result = await sync_to_async(_finalize, thread_sensitive=False)(
+                transcriber, session, test_session, q_num
+            )
+        except Exception as e:
+            print(f"❌ Streaming finalize error: {e}")
+            result = {'type': 'final', 'success': False, 'error': str(e)}
+        await send_json(result)
+        await send({'type': 'websocket.close', 'code': 1000})
+        return
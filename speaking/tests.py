@@ -1,3 +1,624 @@
-from django.test import TestCase
+import io
+import os
+import shutil
+import struct
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from unittest import mock
+import numpy as np
+import soundfile as sf
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import IntegrityError
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
 
-# Create your tests here.
+from . import audio_codec, chunked_upload, dedup, health, views
+from .audio_quality import audio_quality_checker
+from .models import RecordingBlob, RecordingUpload, ScoringJob, SpeakingRecording, SpeakingResult, TestSession
+from .recording_store import (
+    CachedRecordingStore, HttpRecordingStore, LocalRecordingStore, RecordingStoreServer, clean_path
+)
+from .scoring_queue import (
+    ScoringFailed, claim_job, enqueue_scoring, fail_job, finish_job, renew_lease, requeue_expired, wait_for_result
+)
+from .singleflight import SingleFlight, claim_processing, release_processing, wait_for_processing
+from .storage import RecordingStorage
+from .streaming import StreamingTranscriber
+
+
+class SingleFlightTests(SimpleTestCase):
+    def test_concurrent_callers_share_one_call(self):
+        flight = SingleFlight()
+        started, release = threading.Event(), threading.Event()
+        calls = []
+
+        def score():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return 'result'
+
+        results = []
+        leader = threading.Thread(target=lambda: results.append(flight.do('session', score)))
+        leader.start()
+        started.wait(5)
+        follower = threading.Thread(target=lambda: results.append(flight.do('session', score)))
+        follower.start()
+        time.sleep(0.2)  # let the follower attach to the leader's call
+        release.set()
+        leader.join(5)
+        follower.join(5)
+
+        self.assertEqual(results, ['result', 'result'])
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(flight.in_flight(), 0)
+
+    def test_errors_reach_the_caller_and_clear_the_key(self):
+        flight = SingleFlight()
+        with self.assertRaises(ValueError):
+            flight.do('session', lambda: int('x'))
+        self.assertEqual(flight.do('session', lambda: 1), 1)
+
+
+class ClaimProcessingTests(TestCase):
+    def setUp(self):
+        TestSession.objects.create(session_id='claimed-session')
+
+    def test_only_one_claim_wins(self):
+        self.assertTrue(claim_processing('claimed-session'))
+        self.assertFalse(claim_processing('claimed-session'))
+
+    def test_failed_and_stale_claims_can_be_taken_over(self):
+        claim_processing('claimed-session')
+        release_processing('claimed-session', TestSession.PROCESSING_FAILED)
+        self.assertTrue(claim_processing('claimed-session'))
+
+        TestSession.objects.update(processing_started_at=timezone.now() - timedelta(seconds=700))
+        self.assertTrue(claim_processing('claimed-session', stale_after=600))
+
+    def test_finished_sessions_are_not_claimed_again(self):
+        claim_processing('claimed-session')
+        release_processing('claimed-session', TestSession.PROCESSING_DONE)
+        self.assertFalse(claim_processing('claimed-session'))
+
+    def test_wait_returns_once_the_run_ends(self):
+        claim_processing('claimed-session')
+        self.assertIsNone(wait_for_processing('claimed-session', timeout=0))
+        release_processing('claimed-session', TestSession.PROCESSING_FAILED)
+        test_session = wait_for_processing('claimed-session', timeout=1)
+        self.assertEqual(test_session.processing_state, TestSession.PROCESSING_FAILED)
+
+
+class ScoringQueueTests(TestCase):
+    def setUp(self):
+        self.test_session = TestSession.objects.create(session_id='queue-session')
+        self.job = enqueue_scoring(self.test_session)
+
+    def test_enqueue_is_idempotent(self):
+        self.assertEqual(enqueue_scoring(self.test_session).pk, self.job.pk)
+        self.assertEqual(ScoringJob.objects.count(), 1)
+
+    def test_claim_leases_the_job_once(self):
+        job = claim_job('worker-a', lease_seconds=60)
+        self.assertEqual(job.pk, self.job.pk)
+        self.assertEqual((job.state, job.worker, job.attempts), (ScoringJob.LEASED, 'worker-a', 1))
+        self.assertIsNone(claim_job('worker-b', lease_seconds=60))
+
+    def test_finish_requires_the_lease(self):
+        job = claim_job('worker-a', lease_seconds=60)
+        self.assertFalse(finish_job(job, 'worker-b', scoring_ms=10))
+        self.assertTrue(finish_job(job, 'worker-a', scoring_ms=10))
+        self.assertEqual(ScoringJob.objects.get(pk=job.pk).state, ScoringJob.DONE)
+
+    def test_renew_fails_once_the_lease_is_lost(self):
+        job = claim_job('worker-a', lease_seconds=60)
+        self.assertTrue(renew_lease(job, 'worker-a', lease_seconds=60))
+        self.assertFalse(renew_lease(job, 'worker-b', lease_seconds=60))
+
+    def test_fail_requeues_until_max_attempts(self):
+        job = claim_job('worker-a', lease_seconds=60)
+        self.assertTrue(fail_job(job, 'worker-a', 'boom', max_attempts=2))
+        self.assertEqual(ScoringJob.objects.get(pk=job.pk).state, ScoringJob.QUEUED)
+
+        job = claim_job('worker-a', lease_seconds=60)
+        self.assertFalse(fail_job(job, 'worker-a', 'boom again', max_attempts=2))
+        job.refresh_from_db()
+        self.assertEqual((job.state, job.error), (ScoringJob.FAILED, 'boom again'))
+
+        # Submitting again queues a failed job afresh
+        enqueue_scoring(self.test_session)
+        job.refresh_from_db()
+        self.assertEqual((job.state, job.attempts), (ScoringJob.QUEUED, 0))
+
+    def test_expired_leases_are_requeued_then_given_up(self):
+        claim_job('worker-a', lease_seconds=60)
+        ScoringJob.objects.update(lease_expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(requeue_expired(max_attempts=2), 1)
+        self.assertEqual(ScoringJob.objects.get().state, ScoringJob.QUEUED)
+
+        claim_job('worker-b', lease_seconds=60)
+        ScoringJob.objects.update(lease_expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(requeue_expired(max_attempts=2), 1)
+        self.assertEqual(ScoringJob.objects.get().state, ScoringJob.FAILED)
+
+    def test_wait_for_result(self):
+        self.assertIsNone(wait_for_result(self.test_session, timeout=0))
+
+        ScoringJob.objects.update(state=ScoringJob.FAILED, error='boom')
+        with self.assertRaisesMessage(ScoringFailed, 'boom'):
+            wait_for_result(self.test_session, timeout=5)
+
+        speaking_result = SpeakingResult.objects.create(test_session=self.test_session, scores={}, feedback={})
+        self.assertEqual(wait_for_result(self.test_session, timeout=0), speaking_result)
+
+
+class StoreRecordingTests(TestCase):
+    def setUp(self):
+        location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, location)
+        self.storage = RecordingStorage(location=location)
+        patcher = mock.patch.object(dedup, 'recording_storage', self.storage)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_identical_uploads_share_one_file(self):
+        first, digest = dedup.store_recording('a.bin', b'same take')
+        second, _ = dedup.store_recording('b.bin', b'same take')
+        self.assertEqual(first, second)
+        self.assertEqual(RecordingBlob.objects.get(content_hash=digest).ref_count, 2)
+
+        dedup.release_recording(f'recordings/{first}')
+        self.assertTrue(self.storage.exists(first))
+        dedup.release_recording(f'recordings/{first}')
+        self.assertFalse(self.storage.exists(first))
+        self.assertFalse(RecordingBlob.objects.exists())
+
+    def test_lost_race_to_a_released_blob_retries(self):
+        create = RecordingBlob.objects.create
+        attempts = []
+
+        def lose_first_race(**fields):
+            attempts.append(fields)
+            if len(attempts) == 1:
+                raise IntegrityError('duplicate content_hash')
+            return create(**fields)
+
+        with mock.patch.object(RecordingBlob.objects, 'create', side_effect=lose_first_race):
+            saved_name, digest = dedup.store_recording('a.bin', b'take')
+
+        self.assertEqual(len(attempts), 2)
+        blob = RecordingBlob.objects.get(content_hash=digest)
+        self.assertEqual((blob.path, blob.ref_count), (f'recordings/{saved_name}', 1))
+        self.assertTrue(self.storage.exists(saved_name))
+
+    def test_file_is_removed_when_no_blob_can_be_registered(self):
+        with mock.patch.object(RecordingBlob.objects, 'create', side_effect=IntegrityError('duplicate')):
+            with self.assertRaises(RuntimeError):
+                dedup.store_recording('a.bin', b'take')
+        self.assertEqual([files for _, _, files in os.walk(self.storage.location) if files], [])
+
+
+
+def ebml(element_id, payload):
+    """An EBML element with an 8-byte size, as a muxer may write it"""
+    return element_id.to_bytes((element_id.bit_length() + 7) // 8, 'big') + (1 << 56 | len(payload)).to_bytes(8, 'big') + payload
+
+
+def webm_opus(packets):
+    """A minimal browser-style WebM: Segment and Cluster have unknown sizes"""
+    unknown = b'\x01\xff\xff\xff\xff\xff\xff\xff'
+    head = b'OpusHead' + struct.pack('<BBHIhB', 1, 1, 312, 48000, 0, 0)
+    track = ebml(0xAE, ebml(0xD7, b'\x01') + ebml(0x86, b'A_OPUS') + ebml(0x63A2, head) + ebml(0xE1, ebml(0x9F, b'\x01')))
+    blocks = b''.join(
+        ebml(0xA3, b'\x81' + struct.pack('>h', i * 20) + b'\x80' + packet) for i, packet in enumerate(packets)
+    )
+    return (
+        ebml(0x1A45DFA3, ebml(0x4282, b'webm'))
+        + b'\x18\x53\x80\x67' + unknown + ebml(0x1654AE6B, track)
+        + b'\x1f\x43\xb6\x75' + unknown + ebml(0xE7, b'\x00') + blocks
+    )
+
+
+# A 20 ms CELT frame of digital silence
+OPUS_SILENCE = b'\xf8\xff\xfe'
+
+
+class AudioCodecTests(SimpleTestCase):
+    def test_ogg_crc(self):
+        self.assertEqual(audio_codec.ogg_crc(b''), 0)
+        self.assertEqual(audio_codec.ogg_crc(b'123456789'), 0x89A1897F)
+
+        # The first page of an Ogg file written by libsndfile
+        ogg = io.BytesIO()
+        sf.write(ogg, np.zeros(1600, dtype=np.float32), 16000, format='OGG', subtype='VORBIS')
+        data = ogg.getvalue()
+        page = bytearray(data[:27 + data[26] + sum(data[27:27 + data[26]])])
+        stored = struct.unpack('<I', page[22:26])[0]
+        page[22:26] = b'\0\0\0\0'
+        self.assertEqual(audio_codec.ogg_crc(bytes(page)), stored)
+
+    def test_block_frames_for_each_lacing_mode(self):
+        frames = [b'a' * 300, b'bb', b'ccccc']
+        header = b'\x81\x00\x00'  # track 1, timecode 0
+        blocks = {
+            'none': header + b'\x80' + frames[0],
+            'xiph': header + b'\x82' + b'\x02' + b'\xff\x2d' + b'\x02' + b''.join(frames),
+            # 300, then signed 2-byte deltas 2 - 300 = -298 (bias 8191)
+            'ebml': header + b'\x86' + b'\x02' + b'\x41\x2c' + b'\x5e\xd5' + b''.join(frames),
+            'fixed': header + b'\x84' + b'\x02' + b'xxxxyyyyzzzz',
+        }
+        self.assertEqual(audio_codec._block_frames(blocks['none']), (1, [frames[0]]))
+        self.assertEqual(audio_codec._block_frames(blocks['xiph']), (1, frames))
+        self.assertEqual(audio_codec._block_frames(blocks['ebml']), (1, frames))
+        self.assertEqual(audio_codec._block_frames(blocks['fixed']), (1, [b'xxxx', b'yyyy', b'zzzz']))
+
+    def test_opus_packet_samples(self):
+        cases = [
+            (b'\xf8', 960),           # CELT 20 ms, code 0: one frame
+            (b'\xf9', 1920),          # code 1: two equal frames
+            (b'\xfa\x01', 1920),      # code 2: two frames of different sizes
+            (b'\xfb\x03', 2880),      # code 3: frame count in the second byte
+            (b'\x18', 2880),          # SILK 60 ms
+            (b'\x68', 960),           # hybrid 20 ms
+            (b'\xf3\x45', 5 * 480),   # CELT 10 ms, code 3 with the padding flag set
+        ]
+        for packet, samples in cases:
+            self.assertEqual(audio_codec.opus_packet_samples(packet), samples, packet.hex())
+
+    def test_decode_webm_round_trip(self):
+        y, sr = audio_codec.decode_bytes(webm_opus([OPUS_SILENCE] * 25))
+        self.assertEqual(sr, 48000)
+        self.assertEqual(len(y), 25 * 960 - 312)  # minus the OpusHead pre-skip
+        self.assertEqual(y.dtype, np.float32)
+        self.assertLess(np.abs(y).max(), 1e-3)
+
+    def test_truncated_webm_decodes_what_arrived(self):
+        data = webm_opus([OPUS_SILENCE] * 25)
+        y, _ = audio_codec.decode_bytes(data[:-40])
+        self.assertLess(len(y), 25 * 960 - 312)
+
+    def test_unsupported_container(self):
+        with self.assertRaises(audio_codec.AudioDecodeError):
+            audio_codec.decode_bytes(b'ID3\x04 not audio')
+
+
+class RecordingStoreTests(SimpleTestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        self.server = RecordingStoreServer(('127.0.0.1', 0), LocalRecordingStore(self.root), token='secret')
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.url = f'http://127.0.0.1:{self.server.server_address[1]}'
+
+    def test_round_trip(self):
+        store = HttpRecordingStore(self.url, token='secret')
+        store.put('recordings/ab/cd/take.flac', b'audio')
+        self.assertEqual(store.get('recordings/ab/cd/take.flac'), b'audio')
+        self.assertEqual(store.stat('recordings/ab/cd/take.flac')['size'], 5)
+        self.assertEqual(b''.join(store.stream('recordings/ab/cd/take.flac')), b'audio')
+        store.delete('recordings/ab/cd/take.flac')
+        self.assertIsNone(store.get('recordings/ab/cd/take.flac'))
+
+    def test_wrong_token_is_rejected(self):
+        for token in ('', 'wrong'):
+            response = HttpRecordingStore(self.url, token=token).session.get(f'{self.url}/recordings/x.flac')
+            self.assertEqual(response.status_code, 403)
+
+    def test_only_recordings_are_served(self):
+        store = HttpRecordingStore(self.url, token='secret')
+        response = store.session.get(f'{self.url}/reference/word1.wav')
+        self.assertEqual(response.status_code, 404)
+        with self.assertRaises(ValueError):
+            clean_path('../settings.py')
+
+    def test_no_token_only_on_loopback(self):
+        with self.assertRaises(ValueError):
+            RecordingStoreServer(('0.0.0.0', 0), LocalRecordingStore(self.root))
+        RecordingStoreServer(('127.0.0.1', 0), LocalRecordingStore(self.root)).server_close()
+
+    def test_cache_fetches_each_clip_once(self):
+        cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_dir)
+        backend = HttpRecordingStore(self.url, token='secret')
+        backend.put('recordings/take.flac', b'audio')
+        store = CachedRecordingStore(backend, cache_dir, max_bytes=1024)
+        self.assertEqual(store.get('recordings/take.flac'), b'audio')
+        self.assertEqual(store.get('recordings/take.flac'), b'audio')
+        self.assertEqual((store.misses, store.hits), (1, 1))
+
+
+class ChunkedUploadTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        media = override_settings(MEDIA_ROOT=media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+
+        user = User.objects.create_user('student', password='secret')
+        self.client.force_login(user)
+        TestSession.objects.create(session_id='upload-session', user=user)
+        session = self.client.session
+        session['test_session_id'] = 'upload-session'
+        session.save()
+
+        self.upload_id = self.client.post(reverse('speaking:upload_start'), {'q_num': 2}).json()['upload_id']
+        self.path = chunked_upload.partial_path(self.upload_id)
+
+    def send(self, offset, data):
+        return self.client.post(
+            reverse('speaking:upload_chunk', args=[self.upload_id]) + f'?offset={offset}',
+            data, content_type='application/octet-stream'
+        )
+
+    def commit(self, size):
+        return self.client.post(reverse('speaking:upload_commit', args=[self.upload_id]), {'size': size})
+
+    def test_chunks_append_at_the_stored_offset(self):
+        self.assertEqual(self.send(0, b'abcd').json()['offset'], 4)
+        # A resent chunk overlapping stored bytes only appends what is new
+        self.assertEqual(self.send(2, b'cdef').json()['offset'], 6)
+        self.assertEqual(self.send(6, b'').json()['offset'], 6)
+        with open(self.path, 'rb') as f:
+            self.assertEqual(f.read(), b'abcdef')
+
+    def test_gaps_are_refused_with_the_resume_offset(self):
+        self.send(0, b'abcd')
+        for offset in (5, -1):
+            response = self.send(offset, b'xyz')
+            self.assertEqual((response.status_code, response.json()['offset']), (409, 4))
+
+    def test_losing_writer_gets_409(self):
+        self.send(0, b'abcd')
+        # Another request moves the offset after this one read it
+        real_filter = RecordingUpload.objects.filter
+
+        def moved(*args, **kwargs):
+            if 'received_bytes' in kwargs:
+                RecordingUpload.objects.update(received_bytes=10)
+            return real_filter(*args, **kwargs)
+
+        with mock.patch.object(RecordingUpload.objects, 'filter', side_effect=moved):
+            response = self.send(4, b'efgh')
+        self.assertEqual((response.status_code, response.json()['offset']), (409, 10))
+
+    def test_commit_reads_only_the_committed_bytes(self):
+        self.send(0, b'abcdef')
+        with open(self.path, 'ab') as f:
+            f.write(b'stray bytes from a losing retry')
+
+        self.assertEqual(self.commit(4).status_code, 409)
+
+        quality = {'ok': True, 'issues': [], 'metrics': {}}
+        with mock.patch.object(audio_quality_checker, 'check', return_value=quality) as check, \
+                mock.patch.object(views, '_store_answer', return_value='ab/cd/take.wav') as store:
+            self.assertTrue(self.commit(6).json()['success'])
+            # A retried commit returns the stored recording without storing it again
+            self.assertTrue(self.commit(6).json()['success'])
+
+        self.assertEqual(check.call_args[0][0], b'abcdef')
+        self.assertEqual(store.call_count, 1)
+        self.assertFalse(os.path.exists(self.path))
+        self.assertEqual(RecordingUpload.objects.get().recording_path, 'recordings/ab/cd/take.wav')
+
+    def test_cancel_removes_the_file_and_row(self):
+        self.send(0, b'abcd')
+        response = self.client.post(reverse('speaking:upload_cancel', args=[self.upload_id]))
+        self.assertTrue(response.json()['success'])
+        self.assertFalse(os.path.exists(self.path))
+        self.assertFalse(RecordingUpload.objects.exists())
+        self.assertEqual(self.send(4, b'efgh').status_code, 404)
+
+    def test_sweep_removes_only_stale_uploads(self):
+        old = time.time() - 3 * 3600
+        RecordingUpload.objects.update(created_at=timezone.now() - timedelta(hours=3))
+        stray = chunked_upload.partial_path('no-such-upload')
+        open(stray, 'wb').close()
+        os.utime(stray, (old, old))
+
+        fresh_id = self.client.post(reverse('speaking:upload_start'), {'q_num': 3}).json()['upload_id']
+        self.assertEqual(chunked_upload.sweep_stale_uploads(), (1, 1))
+        self.assertEqual(list(RecordingUpload.objects.values_list('upload_id', flat=True)), [fresh_id])
+        self.assertEqual(os.listdir(os.path.dirname(self.path)), [f'{fresh_id}.part'])
+
+    def test_decoders_are_capped(self):
+        with mock.patch.object(chunked_upload, 'MAX_DECODERS', 2):
+            for upload_id in ('a', 'b', 'c'):
+                chunked_upload.get_decoder(upload_id)
+            self.assertEqual(list(chunked_upload._decoders)[-2:], ['b', 'c'])
+            self.assertNotIn('a', chunked_upload._decoders)
+
+
+
+class SubmitRecordingTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user('student', password='secret')
+        self.client.force_login(user)
+        TestSession.objects.create(session_id='submit-session', user=user)
+        session = self.client.session
+        session['test_session_id'] = 'submit-session'
+        session.save()
+
+    def test_upload_is_decoded_once(self):
+        t = np.arange(24000) / 16000
+        rng = np.random.default_rng(0)
+        y = (0.3 * np.sin(2 * np.pi * 220 * t) + 0.001 * rng.standard_normal(len(t))).astype(np.float32)
+        wav = io.BytesIO()
+        sf.write(wav, y, 16000, format='WAV', subtype='PCM_16')
+        upload = SimpleUploadedFile('q2.wav', wav.getvalue(), content_type='audio/wav')
+
+        with mock.patch.object(audio_quality_checker, 'decode', wraps=audio_quality_checker.decode) as decode, \
+                mock.patch.object(views, 'store_recording', return_value=('ab/cd/take.wav', 'digest')), \
+                mock.patch.object(views, 'attach_recording') as attach, \
+                mock.patch.object(views, 'index_recording') as index:
+            response = self.client.post(reverse('speaking:submit_recording'), {'q_num': 2, 'audio': upload})
+
+        self.assertTrue(response.json()['success'])
+        self.assertEqual(decode.call_count, 1)
+        decoded_y, sr = index.call_args.kwargs['decoded']
+        self.assertEqual((len(decoded_y), sr), (24000, 16000))
+        self.assertIs(index.call_args.args[0], attach.return_value)
+
+
+class ScoreRecordingsTests(TestCase):
+    def setUp(self):
+        self.test_session = TestSession.objects.create(session_id='scoring-session')
+        self.recording = SpeakingRecording.objects.create(
+            test_session=self.test_session, question=2, path='recordings/q2.webm'
+        )
+        patcher = mock.patch.object(views.recording_store, 'get', return_value=b'audio')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def score(self, **kwargs):
+        analysis = (40, [], {'speech_rate': 2.5}, 'the cat sat on mat')
+        with mock.patch.object(views.pronunciation_engine, 'analyze_recording', return_value=analysis) as analyze:
+            _, _, scored = views.score_recordings(self.test_session, **kwargs)
+        return analyze, scored
+
+    def test_transcript_of_a_sentence_answer_is_stored(self):
+        analyze, scored = self.score()
+        self.assertEqual(analyze.call_args.args, (b'audio', 2, None))
+        self.assertEqual(scored, [self.recording])
+        self.assertEqual((scored[0].score, scored[0].transcript), (40, 'the cat sat on mat'))
+
+    def test_rescore_reuses_the_stored_transcript(self):
+        SpeakingRecording.objects.filter(pk=self.recording.pk).update(transcript='the cat sat on mat')
+        analyze, _ = self.score()
+        self.assertEqual(analyze.call_args.args, (b'audio', 2, 'the cat sat on mat'))
+        analyze, _ = self.score(reuse_cached=False)
+        self.assertEqual(analyze.call_args.args, (b'audio', 2, None))
+
+
+class FakeEngine:
+    """Stands in for the pronunciation engine: the ASR check fails until fixed"""
+    def __init__(self, asr_error):
+        self.asr_error = asr_error
+        self.last_warm_up = None
+        self.warm_ups = self.asr_checks = 0
+
+    def check_asr(self):
+        self.asr_checks += 1
+        return self.asr_error
+
+    def warm_up(self):
+        self.warm_ups += 1
+        self.last_warm_up = {'at': time.time(), 'seconds': 0.0, 'asr_error': self.check_asr()}
+        return self.last_warm_up
+
+    def references_loaded(self):
+        return True
+
+
+class ReadinessTests(TestCase):
+    def setUp(self):
+        self.engine = FakeEngine('RuntimeError: model failed to load')
+        grammar_tool = mock.Mock()
+        for target, value in [
+            ('pronunciation_engine', self.engine), ('grammar_tool', grammar_tool),
+            ('_asr_retry', {'at': None}), ('_language_tool_probe', {'at': None, 'result': None}),
+        ]:
+            patcher = mock.patch.object(health, target, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.grammar_tool = grammar_tool
+
+    def readyz(self):
+        return self.client.get(reverse('readyz'))
+
+    def test_failing_model_is_not_ready_and_retried_at_most_once_a_minute(self):
+        response = self.readyz()
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.json()['checks']['asr_model']['error'], 'RuntimeError: model failed to load')
+        self.readyz()
+        self.assertEqual((self.engine.warm_ups, self.engine.asr_checks), (1, 1))
+
+        self.engine.asr_error = None
+        health._asr_retry['at'] -= health.ASR_RETRY_SECONDS
+        self.assertEqual(self.readyz().status_code, 200)
+        self.assertEqual((self.engine.warm_ups, self.engine.asr_checks), (1, 2))
+        self.readyz()
+        self.assertEqual(self.engine.asr_checks, 2)
+
+    def test_language_tool_outage_only_degrades(self):
+        self.engine.asr_error = None
+        self.grammar_tool.check.side_effect = ConnectionError('LanguageTool is down')
+        response = self.readyz()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['degraded'], ['language_tool'])
+
+
+class FakeTranscriptionEngine:
+    """Returns scripted (text, start, end) segments and records each decoded window's length"""
+    sample_rate = 100
+
+    def __init__(self, *hypotheses):
+        self.hypotheses = list(hypotheses)
+        self.windows = []
+
+    def transcribe_segments(self, audio):
+        self.windows.append(len(audio))
+        return self.hypotheses.pop(0)
+
+
+def pcm(seconds, sample_rate=FakeTranscriptionEngine.sample_rate):
+    return b'\0\0' * int(seconds * sample_rate)
+
+
+class StreamingTranscriberTests(SimpleTestCase):
+    def transcriber(self, engine):
+        return StreamingTranscriber(engine, step_seconds=1.0, window_seconds=4.0, keep_seconds=1.0, max_seconds=60)
+
+    def test_partial_only_after_a_step_of_new_audio(self):
+        transcriber = self.transcriber(FakeTranscriptionEngine([('hello', 0.0, 0.5)]))
+        transcriber.add_pcm(pcm(0.5))
+        self.assertFalse(transcriber.needs_partial())
+        transcriber.add_pcm(pcm(0.5))
+        self.assertTrue(transcriber.needs_partial())
+        transcriber.partial()
+        self.assertFalse(transcriber.needs_partial())
+
+    def test_full_window_commits_segments_and_slides(self):
+        engine = FakeTranscriptionEngine(
+            [('one', 0.0, 1.5), ('two', 1.5, 3.0), ('three', 3.0, 4.5)],
+            # Times are relative to the new window, which starts at 3 s
+            [('three', 0.0, 1.5), ('four', 1.5, 3.0)],
+            [('three', 0.0, 1.5), ('four', 1.5, 3.0), ('five', 3.0, 3.5)],
+        )
+        transcriber = self.transcriber(engine)
+        transcriber.add_pcm(pcm(5))
+        # Past the 4 s window: segments ending before the last kept second (4 s) are committed
+        self.assertEqual(transcriber.partial()['text'], 'one two three')
+        self.assertEqual(transcriber.committed, ['one', 'two'])
+        self.assertEqual(transcriber.window_start, 300)
+
+        transcriber.add_pcm(pcm(1))
+        self.assertEqual(transcriber.partial()['text'], 'one two three four')
+        self.assertEqual(engine.windows, [500, 300])
+        self.assertEqual(transcriber.final(), 'one two three four five')
+        self.assertEqual(engine.windows[-1], 300)
+
+    def test_stable_prefix_is_what_two_hypotheses_agree_on(self):
+        transcriber = self.transcriber(FakeTranscriptionEngine(
+            [('I like to', 0.0, 1.0)],
+            [('I like two apples', 0.0, 2.0)],
+            [('I like two apples a lot', 0.0, 3.0)],
+        ))
+        transcriber.add_pcm(pcm(1))
+        self.assertEqual(transcriber.partial(), {'type': 'partial', 'text': 'I like to', 'stable': ''})
+        transcriber.add_pcm(pcm(1))
+        self.assertEqual(transcriber.partial()['stable'], 'I like')
+        transcriber.add_pcm(pcm(1))
+        self.assertEqual(transcriber.partial()['stable'], 'I like two apples')
+
+    def test_stream_longer_than_the_limit_is_refused(self):
+        transcriber = StreamingTranscriber(FakeTranscriptionEngine(), max_seconds=2)
+        self.assertTrue(transcriber.add_pcm(pcm(2)))
+        self.assertFalse(transcriber.add_pcm(pcm(0.01)))
+        self.assertEqual(transcriber.total, 200)
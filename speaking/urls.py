@@ -9,8 +9,15 @@ urlpatterns = [
     path('initialize-test/', views.initialize_test, name='initialize_test'),
     path('question/<int:q_num>/', views.question, name='question'),
     path('submit-recording/', views.submit_recording, name='submit_recording'),
+    path('upload/start/', views.upload_start, name='upload_start'),
+    path('upload/<str:upload_id>/', views.upload_status, name='upload_status'),
+    path('upload/<str:upload_id>/chunk/', views.upload_chunk, name='upload_chunk'),
+    path('upload/<str:upload_id>/commit/', views.upload_commit, name='upload_commit'),
+    path('upload/<str:upload_id>/cancel/', views.upload_cancel, name='upload_cancel'),
     path('process-results/', views.process_results, name='process_results'),
     path('result/', views.result, name='result'),
     path('latest-result/', views.latest_result, name='latest_result'),
     path('log-activity/', views.log_suspicious_activity, name='log_activity'),
+    path('diagnostics/', views.diagnostics, name='diagnostics'),
+    path('diagnostics/memory/', views.memory_diagnostics, name='memory_diagnostics'),
 ]
\ No newline at end of file
@@ -1,6 +1,7 @@
 # speaking/views.py
 import re
 import os
+import time
 import uuid
 from datetime import datetime
 from django.shortcuts import render, redirect, get_object_or_404
@@ -8,13 +9,27 @@ from django.http import JsonResponse, HttpResponseBadRequest
 from django.views.decorators.http import require_POST
 from django.views.decorators.csrf import csrf_exempt
 from django.contrib.auth.decorators import login_required
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib import messages
 from django.conf import settings
-from django.core.files.storage import FileSystemStorage
+from django.urls import reverse
+from django.utils import timezone
 from home_page.models import StudentProfile
 from home_page.decorators import pretest_access_required
-from .models import TestSession, SuspiciousActivity  # Add SuspiciousActivity here
+from .models import TestSession, SuspiciousActivity, RecordingUpload, SpeakingRecording, SpeakingResult  # Add SuspiciousActivity here
 from .pronunciation_engine import pronunciation_engine, QUESTIONS
+from .audio_quality import audio_quality_checker
+from .chunked_upload import (
+    MAX_UPLOAD_BYTES, partial_path, get_decoder, pop_decoder, read_upload, discard_upload, maybe_sweep_stale_uploads
+)
+from .dedup import store_recording, attach_recording
+from .fingerprint import index_recording
+from .feature_store import feature_store
+from .recording_store import recording_store
+from .resource_governor import governor
+from .memory_watchdog import memory_watchdog
+from .singleflight import PROCESSING_WAIT, scoring_flight, claim_processing, release_processing, wait_for_processing
+from .scoring_queue import ScoringFailed, enqueue_scoring, wait_for_result
 import traceback
 import json
 
@@ -32,6 +47,7 @@ def start(request):
     """Start page for speaking test"""
     # Clear any existing session data
     request.session.pop('test_session_id', None)
+    request.session.pop('speaking_result_id', None)
     request.session.pop('scores', None)
     request.session.pop('feedback', None)
     request.session.pop('word_feedback', None)
@@ -142,6 +158,88 @@ def question(request, q_num):
     return render(request, 'speaking/question.html', context)
 
 
+def recording_filename(session_id, q_num, word_num=None):
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    if word_num:
+        return f"{session_id}_q1_word{word_num}_{timestamp}.wav"
+    return f"{session_id}_q{q_num}_{timestamp}.wav"
+
+
+def _store_answer(test_session, q_num, word_num, data, quality, decoded=None):
+    """
+    Store the bytes (once per content hash), attach them to the answer and
+    check the clip against other students' recordings of the same prompt
+    """
+    saved_path, digest = store_recording(recording_filename(test_session.session_id, q_num, word_num), data)
+    recording = attach_recording(
+        test_session, q_num, word_num, saved_path, digest,
+        duration=quality['metrics'].get('duration') if quality else None
+    )
+    index_recording(recording, decoded=decoded, data=data)
+    return saved_path
+
+
+def _record_answer(request, q_num, word_num, saved_path, quality):
+    """Update progress tracking for a stored answer and build the JSON response"""
+    # Track answered questions for progress bar - get as list
+    answered_questions = request.session.get('answered_questions', [])
+    if not isinstance(answered_questions, list):
+        answered_questions = []
+    
+    # Q1 with individual words
+    if q_num == 1 and word_num:
+        # Track word-level answers for Q1 - use list
+        q1_word_answers = request.session.get('q1_word_answers', [])
+        if not isinstance(q1_word_answers, list):
+            q1_word_answers = []
+        
+        if word_num not in q1_word_answers:
+            q1_word_answers.append(word_num)
+            request.session['q1_word_answers'] = q1_word_answers
+        
+        # If all 5 words are answered, mark Q1 as complete
+        if len(q1_word_answers) == 5 and 1 not in answered_questions:
+            answered_questions.append(1)
+            request.session['answered_questions'] = answered_questions
+        
+        next_word = word_num + 1 if word_num < 5 else None
+        
+        return JsonResponse({
+            'success': True,
+            'filename': saved_path,
+            'word_num': word_num,
+            'next_word': next_word,
+            'q_num': q_num,
+            'quality': quality,
+            'word_progress': {
+                'answered': len(q1_word_answers),
+                'total': 5,
+                'percentage': int((len(q1_word_answers) / 5) * 100)
+            }
+        })
+    
+    # Q2-Q5: mark question as answered for progress
+    if q_num not in answered_questions:
+        answered_questions.append(q_num)
+        request.session['answered_questions'] = answered_questions
+    
+    next_question = q_num + 1 if q_num < 5 else None
+    
+    # Calculate progress percentage
+    total_questions = 5
+    progress_percentage = int((len(answered_questions) / total_questions) * 100)
+    
+    return JsonResponse({
+        'success': True,
+        'filename': saved_path,
+        'next_question': next_question,
+        'progress_percentage': progress_percentage,
+        'answered_count': len(answered_questions),
+        'total_questions': total_questions,
+        'quality': quality
+    })
+
+
 @login_required
 @require_POST
 @csrf_exempt
@@ -167,85 +265,20 @@ def submit_recording(request):
         if not audio_file:
             return JsonResponse({'error': 'No audio file provided'}, status=400)
         
-        recordings_dir = os.path.join(settings.MEDIA_ROOT, 'recordings')
-        os.makedirs(recordings_dir, exist_ok=True)
+        word_num_int = int(word_num) if q_num == 1 and word_num else None
         
-        fs = FileSystemStorage(location=recordings_dir)
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        # Pre-screen the upload so unusable audio is never stored or scored
+        quality, decoded = audio_quality_checker.check_upload(audio_file, is_word=bool(word_num_int))
+        if not quality['ok']:
+            return JsonResponse({
+                'success': False,
+                'error': quality['issues'][0]['message'],
+                'quality': quality
+            }, status=422)
         
-        # Track answered questions for progress bar - get as list
-        answered_questions = request.session.get('answered_questions', [])
-        if not isinstance(answered_questions, list):
-            answered_questions = []
+        saved_path = _store_answer(test_session, q_num, word_num_int, audio_file.read(), quality, decoded)
         
-        # Q1 with individual words
-        if q_num == 1 and word_num:
-            word_num_int = int(word_num)
-            filename = f"{session_id}_q1_word{word_num_int}_{timestamp}.wav"
-            saved_path = fs.save(filename, audio_file)
-            relative_path = f'recordings/{saved_path}'
-            
-            # Save to database
-            setattr(test_session, f'q1_word{word_num_int}_recording', relative_path)
-            test_session.save()
-            
-            # Track word-level answers for Q1 - use list
-            q1_word_answers = request.session.get('q1_word_answers', [])
-            if not isinstance(q1_word_answers, list):
-                q1_word_answers = []
-            
-            if word_num_int not in q1_word_answers:
-                q1_word_answers.append(word_num_int)
-                request.session['q1_word_answers'] = q1_word_answers
-            
-            # If all 5 words are answered, mark Q1 as complete
-            if len(q1_word_answers) == 5 and 1 not in answered_questions:
-                answered_questions.append(1)
-                request.session['answered_questions'] = answered_questions
-            
-            next_word = word_num_int + 1 if word_num_int < 5 else None
-            
-            return JsonResponse({
-                'success': True,
-                'filename': saved_path,
-                'word_num': word_num_int,
-                'next_word': next_word,
-                'q_num': q_num,
-                'word_progress': {
-                    'answered': len(q1_word_answers),
-                    'total': 5,
-                    'percentage': int((len(q1_word_answers) / 5) * 100)
-                }
-            })
-        
-        # Q2-Q5
-        else:
-            filename = f"{session_id}_q{q_num}_{timestamp}.wav"
-            saved_path = fs.save(filename, audio_file)
-            relative_path = f'recordings/{saved_path}'
-            
-            setattr(test_session, f'q{q_num}_recording', relative_path)
-            test_session.save()
-            
-            # Mark question as answered for progress
-            if q_num not in answered_questions:
-                answered_questions.append(q_num)
-                request.session['answered_questions'] = answered_questions
-            
-            next_question = q_num + 1 if q_num < 5 else None
-            
-            # Calculate progress percentage
-            total_questions = 5
-            progress_percentage = int((len(answered_questions) / total_questions) * 100)
-            
-            return JsonResponse({
-                'success': True,
-                'filename': saved_path,
-                'next_question': next_question,
-                'progress_percentage': progress_percentage,
-                'answered_count': len(answered_questions),
-                'total_questions': total_questions
-            })
+        return _record_answer(request, q_num, word_num_int, saved_path, quality)
         
     except Exception as e:
         print(f"❌ Error in submit_recording: {str(e)}")
@@ -253,112 +286,430 @@ def submit_recording(request):
         return JsonResponse({'error': str(e)}, status=500)
 
 
+def _get_upload(request, upload_id):
+    """Look up a chunked upload owned by the current user's active session"""
+    session_id = request.session.get('test_session_id')
+    upload = RecordingUpload.objects.select_related('test_session').filter(
+        upload_id=upload_id,
+        test_session__session_id=session_id
+    ).first()
+    if upload is None:
+        return None
+    if upload.test_session.user and upload.test_session.user != request.user:
+        return None
+    return upload
+
+
 @login_required
 @require_POST
 @csrf_exempt
-def process_results(request):
-    """Process all recordings and generate scores with word-level feedback"""
+def upload_start(request):
+    """Open a resumable upload for one recording"""
     session_id = request.session.get('test_session_id')
     if not session_id:
         return JsonResponse({'error': 'No active session'}, status=400)
     
+    test_session = get_object_or_404(TestSession, session_id=session_id)
+    if test_session.user and test_session.user != request.user:
+        return JsonResponse({'error': 'Permission denied'}, status=403)
+    
     try:
-        test_session = get_object_or_404(TestSession, session_id=session_id)
+        q_num = int(request.POST.get('q_num', 0))
+        word_num = int(request.POST['word_num']) if q_num == 1 and request.POST.get('word_num') else None
+    except ValueError:
+        return JsonResponse({'error': 'Invalid question number'}, status=400)
+    if q_num < 1 or q_num > 5 or (word_num is not None and not 1 <= word_num <= 5):
+        return JsonResponse({'error': 'Invalid question number'}, status=400)
+    
+    maybe_sweep_stale_uploads()
+    upload = RecordingUpload.objects.create(
+        upload_id=uuid.uuid4().hex,
+        test_session=test_session,
+        question=q_num,
+        word_num=word_num
+    )
+    path = partial_path(upload.upload_id)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    open(path, 'wb').close()
+    
+    return JsonResponse({
+        'success': True,
+        'upload_id': upload.upload_id,
+        'offset': 0,
+        'chunk_url': reverse('speaking:upload_chunk', args=[upload.upload_id]),
+        'status_url': reverse('speaking:upload_status', args=[upload.upload_id]),
+        'commit_url': reverse('speaking:upload_commit', args=[upload.upload_id]),
+        'cancel_url': reverse('speaking:upload_cancel', args=[upload.upload_id]),
+    })
+
+
+@login_required
+@require_POST
+@csrf_exempt
+def upload_chunk(request, upload_id):
+    """
+    Append a chunk at ``?offset=``. Re-sent chunks that overlap bytes already
+    stored are acknowledged without writing them twice; a gap returns 409 with
+    the offset the client should resume from.
+    """
+    upload = _get_upload(request, upload_id)
+    if upload is None:
+        return JsonResponse({'error': 'Upload not found'}, status=404)
+    if upload.committed_at:
+        return JsonResponse({'error': 'Upload already committed', 'offset': upload.received_bytes}, status=409)
+    
+    try:
+        offset = int(request.GET.get('offset', request.headers.get('X-Upload-Offset', '')))
+    except ValueError:
+        return JsonResponse({'error': 'Missing offset'}, status=400)
+    
+    received = upload.received_bytes
+    if offset > received or offset < 0:
+        return JsonResponse({'error': 'Offset mismatch', 'offset': received}, status=409)
+    
+    chunk = request.body[received - offset:]
+    if received + len(chunk) > MAX_UPLOAD_BYTES:
+        return JsonResponse({'error': 'Recording is too large'}, status=413)
+    
+    if chunk:
+        with open(partial_path(upload_id), 'r+b') as f:
+            f.seek(received)
+            f.write(chunk)
         
-        # Verify session belongs to current user
-        if test_session.user and test_session.user != request.user:
-            return JsonResponse({'error': 'Permission denied'}, status=403)
+        # Only one writer can move the offset forward from `received`
+        updated = RecordingUpload.objects.filter(
+            pk=upload.pk, received_bytes=received
+        ).update(received_bytes=received + len(chunk))
+        if not updated:
+            upload.refresh_from_db()
+            return JsonResponse({'error': 'Offset mismatch', 'offset': upload.received_bytes}, status=409)
+        
+        # Start decoding while the rest of the recording uploads
+        get_decoder(upload_id, received).feed(chunk)
+    
+    return JsonResponse({'success': True, 'offset': received + len(chunk)})
+
+
+@login_required
+def upload_status(request, upload_id):
+    """Report how many bytes are stored so an interrupted upload can resume"""
+    upload = _get_upload(request, upload_id)
+    if upload is None:
+        return JsonResponse({'error': 'Upload not found'}, status=404)
+    return JsonResponse({
+        'success': True,
+        'offset': upload.received_bytes,
+        'committed': upload.committed_at is not None
+    })
+
+
+@login_required
+@require_POST
+@csrf_exempt
+def upload_cancel(request, upload_id):
+    """Drop an upload the page no longer needs (the streamed answer was used, or a re-record)"""
+    upload = _get_upload(request, upload_id)
+    if upload is None:
+        return JsonResponse({'error': 'Upload not found'}, status=404)
+    if upload.committed_at:
+        return JsonResponse({'error': 'Upload already committed'}, status=409)
+    discard_upload(upload)
+    return JsonResponse({'success': True})
+
+
+@login_required
+@require_POST
+@csrf_exempt
+def upload_commit(request, upload_id):
+    """Finish a chunked upload: pre-screen, store and attach the recording"""
+    upload = _get_upload(request, upload_id)
+    if upload is None:
+        return JsonResponse({'error': 'Upload not found'}, status=404)
+    test_session = upload.test_session
+    
+    try:
+        # Retried commits return the already stored recording
+        if upload.committed_at:
+            return _record_answer(request, upload.question, upload.word_num,
+                                  upload.recording_path[len('recordings/'):], None)
         
-        scores = {}
-        word_feedback = {}
+        size = int(request.POST.get('size', -1))
+        if size != upload.received_bytes:
+            return JsonResponse({'error': 'Upload incomplete', 'offset': upload.received_bytes}, status=409)
         
-        # ========== Q1 PROCESSING ==========
-        q1_word_results = []
-        expected_words = ['comfortable', 'vegetable', 'often', 'engineer', 'laboratory']
+        path = partial_path(upload_id)
+        decoded = pop_decoder(upload_id, upload.received_bytes).finish()
+        data = read_upload(upload)
         
-        for w in range(1, 6):
-            word_field = f'q1_word{w}_recording'
-            word_path = getattr(test_session, word_field)
-            
-            spoken_word = "Not recorded"
-            correctness = 0
-            pronunciation_score = 0
-            total_score = 0
-            
-            if word_path:
-                full_path = os.path.join(settings.MEDIA_ROOT, word_path)
+        quality = audio_quality_checker.check(data, is_word=bool(upload.word_num), decoded=decoded)
+        if not quality['ok']:
+            discard_upload(upload)
+            return JsonResponse({
+                'success': False,
+                'error': quality['issues'][0]['message'],
+                'quality': quality
+            }, status=422)
+        
+        saved_path = _store_answer(test_session, upload.question, upload.word_num, data, quality, decoded)
+        os.remove(path)
+        
+        upload.recording_path = f'recordings/{saved_path}'
+        upload.committed_at = timezone.now()
+        upload.save(update_fields=['recording_path', 'committed_at'])
+        
+        return _record_answer(request, upload.question, upload.word_num, saved_path, quality)
+        
+    except Exception as e:
+        print(f"❌ Error in upload_commit: {str(e)}")
+        traceback.print_exc()
+        return JsonResponse({'error': str(e)}, status=500)
+
+
+def _save_result(test_session, scores, word_feedback):
+    """Create or replace the SpeakingResult shown on the result page"""
+    speaking_result, _ = SpeakingResult.objects.update_or_create(
+        test_session=test_session,
+        defaults={
+            'user': test_session.user,
+            'scores': scores,
+            'feedback': pronunciation_engine.generate_feedback(scores),
+            'word_feedback': word_feedback,
+        }
+    )
+    return speaking_result
+
+
+def _stored_results(test_session):
+    """
+    Result of an already scored session. Sessions scored before results were
+    stored get one rebuilt from their score columns (without word feedback).
+    """
+    speaking_result = SpeakingResult.objects.filter(test_session=test_session).first()
+    if speaking_result is None:
+        scores = {f'q{q_num}': getattr(test_session, f'q{q_num}_score') for q_num in range(1, 6)}
+        speaking_result = _save_result(test_session, scores, {})
+    return speaking_result
+
+
+def score_recordings(test_session, reuse_cached=True):
+    """
+    Score every recording of a session without saving anything. Returns
+    ``(scores, word_feedback, scored)``, where ``scored`` holds the
+    SpeakingRecording rows updated in memory. Also used by rescore_sessions;
+    ``reuse_cached=False`` ignores stored transcripts and features.
+    """
+    scores = {}
+    word_feedback = {}
+    
+    # One query for every recording of the session
+    recordings = {(r.question, r.word_num): r for r in test_session.recordings.all()}
+    scored = []
+    
+    def finish(recording, score, started, **fields):
+        recording.score = score
+        recording.scored_at = timezone.now()
+        recording.scoring_ms = int((time.perf_counter() - started) * 1000)
+        for name, value in fields.items():
+            setattr(recording, name, value)
+        scored.append(recording)
+    
+    # ========== Q1 PROCESSING ==========
+    q1_word_results = []
+    expected_words = ['comfortable', 'vegetable', 'often', 'engineer', 'laboratory']
+    takes = {}
+    
+    for w in range(1, 6):
+        recording = recordings.get((1, w))
+        
+        spoken_word = "Not recorded"
+        correctness = 0
+        pronunciation_score = 0
+        total_score = 0
+        
+        if recording:
+            # The clip may live on another node; see recording_store
+            if recording_store.exists(recording.path):
+                started = time.perf_counter()
+                
+                # A rescore with a stored transcript and features never decodes audio
+                transcribed_text = recording.transcript if reuse_cached else ''
+                features = feature_store.load(recording.features_path) if transcribed_text else None
                 
-                if os.path.exists(full_path):
-                    # Transcribe student's word
-                    transcribed_text = pronunciation_engine.transcribe_audio(full_path)
-                    spoken_word = re.sub(r'[^\w\s]', '', transcribed_text.lower()).strip()
-                    expected_word = re.sub(r'[^\w\s]', '', expected_words[w-1].lower()).strip()
+                # The same take submitted for several words is decoded once
+                if features is None and recording.content_hash in takes:
+                    transcribed_text, features, recording.features_path = takes[recording.content_hash]
+                
+                if features is None:
+                    # Decode once; transcription and MFCC share the buffer
+                    data = recording_store.get(recording.path)
+                    try:
+                        with memory_watchdog.stage('decode'):
+                            word_audio = pronunciation_engine.load_audio(data)
+                    except Exception as e:
+                        print(f"Could not decode {recording.path}: {e}")
+                        word_audio = data
                     
-                    # Check correctness (10 marks)
-                    if spoken_word == expected_word:
-                        correctness = 10
-                        
-                        # Pronunciation score (0-100 → convert to 0-10)
-                        raw_pron_score = pronunciation_engine.score_q1_word(full_path, w)
-                        pronunciation_score = round(raw_pron_score / 10, 1)
-                        
-                        # Final per word = 20
-                        total_score = correctness + pronunciation_score
-                        
-                        # Also save individual word score
-                        setattr(test_session, f'q1_word{w}_score', total_score)
-                else:
-                    spoken_word = "File missing"
-            else:
-                spoken_word = "No recording"
-            
-            word_result = {
-                'position': w,
-                'expected': expected_words[w-1],
-                'spoken': spoken_word,
-                'correctness_score': correctness,
-                'pronunciation_score': pronunciation_score,
-                'total': total_score
-            }
-            
-            q1_word_results.append(word_result)
-        
-        # Final Q1 Total (out of 100)
-        q1_total = sum(word['total'] for word in q1_word_results)
-        test_session.q1_score = q1_total
-        scores['q1'] = q1_total
-        word_feedback['q1'] = q1_word_results
-        
-        # ========== Q2-Q5 PROCESSING ==========
-        for q_num in range(2, 6):
-            recording_field = f'q{q_num}_recording'
-            recording_path = getattr(test_session, recording_field)
-            
-            if recording_path:
-                full_path = os.path.join(settings.MEDIA_ROOT, recording_path)
-                if os.path.exists(full_path):
-                    score, word_results = pronunciation_engine.score_recording(full_path, q_num)
-                    scores[f'q{q_num}'] = score
-                    word_feedback[f'q{q_num}'] = word_results
-                    setattr(test_session, f'q{q_num}_score', score)
-                else:
-                    scores[f'q{q_num}'] = 0
-                    setattr(test_session, f'q{q_num}_score', 0)
+                    # Transcribe student's word, unless a previous run already did
+                    if not transcribed_text:
+                        with memory_watchdog.stage('asr'):
+                            transcribed_text = pronunciation_engine.transcribe_audio(word_audio)
+                    
+                    with memory_watchdog.stage('mfcc'):
+                        features = pronunciation_engine.extract_mfcc(word_audio)
+                    if features is not None:
+                        recording.features_path = feature_store.save(recording.path, features)
+                
+                if recording.content_hash:
+                    takes[recording.content_hash] = (transcribed_text, features, recording.features_path)
+                
+                spoken_word = re.sub(r'[^\w\s]', '', transcribed_text.lower()).strip()
+                expected_word = re.sub(r'[^\w\s]', '', expected_words[w-1].lower()).strip()
+                
+                # Check correctness (10 marks)
+                if spoken_word == expected_word:
+                    correctness = 10
+                    
+                    # Pronunciation score (0-100 → convert to 0-10)
+                    with memory_watchdog.stage('dtw'):
+                        raw_pron_score = pronunciation_engine.score_q1_features(features, w)
+                    pronunciation_score = round(raw_pron_score / 10, 1)
+                    
+                    # Final per word = 20
+                    total_score = correctness + pronunciation_score
+                
+                # Also save individual word score
+                finish(recording, total_score, started, transcript=transcribed_text)
             else:
-                scores[f'q{q_num}'] = 0
-                setattr(test_session, f'q{q_num}_score', 0)
+                spoken_word = "File missing"
+        else:
+            spoken_word = "No recording"
         
-        # CRITICAL: Set completed_at timestamp
-        test_session.completed_at = datetime.now()
-        test_session.save()
+        word_result = {
+            'position': w,
+            'expected': expected_words[w-1],
+            'spoken': spoken_word,
+            'correctness_score': correctness,
+            'pronunciation_score': pronunciation_score,
+            'total': total_score
+        }
         
-        # Generate feedback
-        feedback = pronunciation_engine.generate_feedback(scores)
+        q1_word_results.append(word_result)
+    
+    # Final Q1 Total (out of 100)
+    q1_total = sum(word['total'] for word in q1_word_results)
+    scores['q1'] = q1_total
+    word_feedback['q1'] = q1_word_results
+    
+    # ========== Q2-Q5 PROCESSING ==========
+    for q_num in range(2, 6):
+        recording = recordings.get((q_num, 0))
+        score = 0
         
-        # Store in session
-        request.session['scores'] = scores
-        request.session['feedback'] = feedback
-        request.session['word_feedback'] = word_feedback
+        if recording:
+            started = time.perf_counter()
+            data = recording_store.get(recording.path)
+            if data is not None:
+                # Reuse the transcript if this clip was already decoded while streaming
+                with memory_watchdog.stage('analysis'):
+                    score, word_results, prosody, transcript = pronunciation_engine.analyze_recording(
+                        data, q_num, (recording.transcript if reuse_cached else '') or None
+                    )
+                word_feedback[f'q{q_num}'] = word_results
+                finish(recording, score, started, transcript=transcript, prosody=prosody)
+        
+        scores[f'q{q_num}'] = score
+    
+    return scores, word_feedback, scored
+
+
+def _score_test_session(test_session):
+    """Run the full scoring pipeline for a session and save the scores"""
+    with memory_watchdog.job(f'Scoring session {test_session.pk}'):
+        scores, word_feedback, scored = score_recordings(test_session)
+    for q_num in range(1, 6):
+        setattr(test_session, f'q{q_num}_score', scores[f'q{q_num}'])
+    
+    SpeakingRecording.objects.bulk_update(
+        scored, ['score', 'scored_at', 'scoring_ms', 'transcript', 'prosody', 'features_path']
+    )
+    
+    # CRITICAL: Set completed_at timestamp
+    test_session.completed_at = datetime.now()
+    test_session.processing_state = TestSession.PROCESSING_DONE
+    test_session.save(update_fields=[
+        'q1_score', 'q2_score', 'q3_score', 'q4_score', 'q5_score',
+        'completed_at', 'processing_state'
+    ])
+    
+    # Generate feedback and store it with the word-level breakdown
+    return _save_result(test_session, scores, word_feedback)
+
+
+def _is_scored(test_session):
+    # Sessions scored before the processing lock existed only have completed_at
+    return test_session.processing_state == TestSession.PROCESSING_DONE or (
+        not test_session.processing_state and test_session.completed_at
+    )
+
+
+def _run_scoring(session_id):
+    """
+    Score a session at most once across processes. Finished sessions are
+    returned from the database; if another process holds the claim we wait
+    for it instead of running ASR a second time, and take over if it fails.
+    """
+    test_session = TestSession.objects.get(session_id=session_id)
+    if _is_scored(test_session):
+        return _stored_results(test_session)
+    
+    deadline = time.monotonic() + PROCESSING_WAIT
+    while not claim_processing(session_id):
+        test_session = wait_for_processing(session_id, timeout=max(0, deadline - time.monotonic()))
+        if test_session is None:
+            raise RuntimeError('Results are still being processed. Please try again shortly.')
+        if _is_scored(test_session):
+            return _stored_results(test_session)
+        # The other run failed, so its claim can be taken over; score it here
+    
+    try:
+        test_session.refresh_from_db()
+        return _score_test_session(test_session)
+    except Exception:
+        release_processing(session_id, TestSession.PROCESSING_FAILED)
+        raise
+
+
+@login_required
+@require_POST
+@csrf_exempt
+def process_results(request):
+    """Process all recordings and generate scores with word-level feedback"""
+    session_id = request.session.get('test_session_id')
+    if not session_id:
+        return JsonResponse({'error': 'No active session'}, status=400)
+    
+    try:
+        test_session = get_object_or_404(TestSession, session_id=session_id)
+        
+        # Verify session belongs to current user
+        if test_session.user and test_session.user != request.user:
+            return JsonResponse({'error': 'Permission denied'}, status=403)
+        
+        if settings.SPEAKING_SCORING_QUEUE:
+            # Scored by a run_scoring_worker node; wait briefly so quick jobs still show up here.
+            # Otherwise the page gets queued=true and posts again; a failed job is queued again
+            enqueue_scoring(test_session)
+            speaking_result = wait_for_result(test_session, settings.SPEAKING_SCORING_WAIT)
+        else:
+            # Double clicks and retries attach to the in-flight run
+            speaking_result = scoring_flight.do(session_id, lambda: _run_scoring(session_id))
+        scores = speaking_result.scores if speaking_result else {}
+        
+        # The session only keeps the result id; details stay in the database
+        if speaking_result:
+            request.session['speaking_result_id'] = speaking_result.pk
+        for key in ('scores', 'feedback', 'word_feedback'):
+            request.session.pop(key, None)
         
         # Mark speaking test as completed in StudentProfile
         if request.user.is_authenticated:
@@ -367,7 +718,7 @@ def process_results(request):
                 profile.speaking_completed = True
                 profile.update_pretest_status()
                 print(f"✅ Speaking marked as completed for user: {request.user.username}")
-                print(f"✅ Scores calculated: Q1={q1_total}, Q2={scores.get('q2', 0)}, Q3={scores.get('q3', 0)}, Q4={scores.get('q4', 0)}, Q5={scores.get('q5', 0)}")
+                print(f"✅ Scores calculated: Q1={scores.get('q1', 0)}, Q2={scores.get('q2', 0)}, Q3={scores.get('q3', 0)}, Q4={scores.get('q4', 0)}, Q5={scores.get('q5', 0)}")
             except StudentProfile.DoesNotExist:
                 print(f"⚠️ No profile found for user: {request.user.username}")
             except Exception as e:
@@ -380,12 +731,16 @@ def process_results(request):
         return JsonResponse({
             'success': True,
             'redirect': '/speaking/result/',
+            'queued': speaking_result is None,
             'scores': scores  # Return scores for debugging
         })
         
     except TestSession.DoesNotExist:
         print(f"❌ Test session not found: {session_id}")
         return JsonResponse({'error': 'Test session not found'}, status=400)
+    except ScoringFailed as e:
+        print(f"❌ Scoring failed for session {session_id}: {e}")
+        return JsonResponse({'error': 'Scoring failed. Please submit again to retry.'}, status=500)
     except Exception as e:
         print(f"❌ Error processing results: {str(e)}")
         traceback.print_exc()
@@ -395,28 +750,20 @@ def process_results(request):
 @login_required
 def result(request):
     """Display test results with ownership verification"""
-    scores = request.session.get('scores', {})
-    feedback = request.session.get('feedback', {})
-    word_feedback = request.session.get('word_feedback', {})
+    result_id = request.session.get('speaking_result_id')
     
-    if not scores:
+    # One indexed lookup that also checks the results belong to the current user
+    speaking_result = SpeakingResult.objects.filter(pk=result_id, user=request.user).first() if result_id else None
+    if speaking_result is None:
         return redirect('speaking:start')
     
-    # Verify that the results belong to the current user
-    session_id = request.session.get('test_session_id')
-    if session_id:
-        try:
-            test_session = TestSession.objects.get(session_id=session_id)
-            if test_session.user and test_session.user != request.user:
-                messages.error(request, "You don't have permission to view these results.")
-                return redirect('speaking:start')
-        except TestSession.DoesNotExist:
-            pass
+    scores = speaking_result.scores
+    feedback = speaking_result.feedback
     
     context = {
         'scores': scores,
         'feedback': feedback,
-        'word_feedback': word_feedback,
+        'word_feedback': speaking_result.word_feedback,
         'q1_score': scores.get('q1', 0),
         'q2_score': scores.get('q2', 0),
         'q3_score': scores.get('q3', 0),
@@ -434,57 +781,19 @@ def result(request):
 def latest_result(request):
     """Redirect to the most recent test result"""
     try:
-        # Find the most recent COMPLETED test session for this user
-        test_session = TestSession.objects.filter(
-            user=request.user,
-            completed_at__isnull=False  # Only completed tests
-        ).order_by('-completed_at').first()
-        
-        if test_session:
-            print(f"✅ Found test session: {test_session.session_id} completed at {test_session.completed_at}")
-            
-            # Build scores dictionary from database
-            scores = {}
-            for q_num in range(1, 6):
-                score_field = f'q{q_num}_score'
-                score_value = getattr(test_session, score_field)
-                if score_value is not None:
-                    scores[f'q{q_num}'] = float(score_value)
-                    print(f"   Q{q_num} score: {score_value}")
-                else:
-                    scores[f'q{q_num}'] = 0
-                    print(f"   Q{q_num} score: 0 (not found)")
-            
-            # Calculate average
-            valid_scores = [s for s in scores.values() if s is not None]
-            average = sum(valid_scores) / len(valid_scores) if valid_scores else 0
-            
-            # Determine level and message
-            if average >= 80:
-                level = "Advanced"
-                message = "Excellent work! Your speaking skills are very advanced."
-            elif average >= 60:
-                level = "Intermediate"
-                message = "Good job! You have intermediate speaking skills with room for improvement."
-            else:
-                level = "Beginner"
-                message = "Keep practicing! Focus on pronunciation and grammar to improve your speaking skills."
-            
-            # Create feedback dictionary
-            feedback = {
-                'average': average,
-                'level': level,
-                'message': message
-            }
-            
-            # Store in session for the result page to use
-            request.session['scores'] = scores
-            request.session['feedback'] = feedback
-            request.session['test_session_id'] = test_session.session_id
-            
-            print(f"✅ Session data set for user {request.user.username}")
-            print(f"   Average: {average}, Level: {level}")
-            
+        speaking_result = SpeakingResult.objects.filter(user=request.user).order_by('-created_at').first()
+        
+        if speaking_result is None:
+            # Sessions completed before results were stored
+            test_session = TestSession.objects.filter(
+                user=request.user,
+                completed_at__isnull=False  # Only completed tests
+            ).order_by('-completed_at').first()
+            if test_session:
+                speaking_result = _stored_results(test_session)
+        
+        if speaking_result:
+            request.session['speaking_result_id'] = speaking_result.pk
             return redirect('speaking:result')
         else:
             print(f"❌ No completed test session found for user: {request.user.username}")
@@ -527,4 +836,16 @@ def log_suspicious_activity(request):
         except Exception as e:
             return JsonResponse({'error': str(e)}, status=400)
     
-    return JsonResponse({'error': 'Invalid request'}, status=400)
\ No newline at end of file
+    return JsonResponse({'error': 'Invalid request'}, status=400)
+
+
+@staff_member_required
+def diagnostics(request):
+    """Effective inference thread/affinity settings of the worker serving this request"""
+    return JsonResponse(governor.report())
+
+
+@staff_member_required
+def memory_diagnostics(request):
+    """RSS of the worker serving this request and its recent per-job growth"""
+    return JsonResponse(memory_watchdog.report())
@@ -51,6 +51,10 @@ class WritingQuestionAdmin(admin.ModelAdmin):
             'fields': ('correct_answer', 'acceptable_answers'),
             'description': 'For Fill in Blanks: comma-separated answers (e.g., "goes, are, a")<br>For Sentence Order: letters with commas (e.g., "C, B, A")<br>For Spelling MCQ: letters (e.g., "b, b, b")'
         }),
+        ('📝 Rubric', {
+            'fields': ('clue_words', 'transition_words', 'topic_words', 'allowed_words', 'error_patterns'),
+            'description': 'Sentence Rewrite uses Allowed Words and Error Patterns; Paragraph Writing uses all of them. Leave empty for the built-in rubric.'
+        }),
         ('🖼️ Legacy Fields (Not used in new questions)', {
             'fields': ('picture_filename', 'required_keywords', 'min_sentences', 'min_words', 'max_words', 'audio_filename'),
             'classes': ('collapse',),
@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class WritingConfig(AppConfig):
     name = 'writing'
+
+    def ready(self):
+        import writing.signals
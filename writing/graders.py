@@ -0,0 +1,631 @@
+"""
+Graders for the writing test, one per question type.
+
+Each question type registers a grader and a compile step. The compile step
+turns a WritingQuestion's fields (answer key, clue words, transitions,
+allowed words, error patterns) into an immutable spec: parsed expected
+answers, frozensets and a compiled PhraseMatcher. Graders only read the
+spec, so any test can reuse them with its own rubric.
+
+compiled_spec() keeps one spec per question in each process. It is rebuilt
+when the question's ``updated_at`` changes, so an edit made in the admin
+reaches every worker, and the post_save signal drops it locally at once.
+Rubric fields left empty fall back to the DEFAULT_* values below, the
+rubric of the original test.
+
+Answers are saved as drafts while the test is taken and graded together by
+grade_batch() on submit; graders registered as expensive run on a small
+thread pool next to the cheap ones.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple
+from django.conf import settings
+from .grading_cache import grading_cache
+from .phrase_matcher import PhraseMatcher
+from .suggestions import describe_misspellings
+from .text_analysis import TextAnalysis, analyze_text
+
+DEFAULT_REWRITE_ALLOWED_WORDS = [
+    'communication', 'skills', 'important', 'however', 'students', 'often',
+    'ignore', 'punctuation', 'grammar', 'clarity', 'are', 'and', 'the', 'to',
+]
+DEFAULT_REWRITE_ERROR_PATTERNS = [
+    ('comunication', 'communication', 'Spelling'),
+    ('punctution', 'punctuation', 'Spelling'),
+    ('grammer', 'grammar', 'Spelling'),
+]
+
+DEFAULT_PARAGRAPH_CLUE_WORDS = ["time management", "planning", "daily routine", "stress", "success"]
+DEFAULT_PARAGRAPH_TRANSITIONS = ['first', 'second', 'then', 'next', 'after', 'because', 'so', 'therefore', 'finally', 'also', 'however']
+DEFAULT_PARAGRAPH_TOPIC_WORDS = ['time management', 'important', 'essential', 'crucial', 'key']
+DEFAULT_PARAGRAPH_ERROR_PATTERNS = [
+    ("is", "are", "Subject-verb agreement"),
+    ("student is", "students are", "Plural/singular agreement"),
+    ("dont", "don't", "Missing apostrophe"),
+    ("doesnt", "doesn't", "Missing apostrophe"),
+    ("cant", "can't", "Missing apostrophe"),
+    ("wont", "won't", "Missing apostrophe"),
+]
+DEFAULT_PARAGRAPH_ALLOWED_WORDS = [
+    'time', 'management', 'planning', 'daily', 'routine', 'stress', 'success',
+    'and', 'the', 'to', 'is', 'are', 'was', 'were', 'have', 'has', 'had',
+    'important', 'essential', 'crucial', 'key', 'life', 'student', 'students',
+    'help', 'helps', 'helping', 'make', 'makes', 'making', 'overwhelming',
+]
+
+# question_type -> (compile_spec, grade)
+GRADERS = {}
+# Question types whose graders are worth a pool thread in grade_batch()
+EXPENSIVE_GRADERS = set()
+
+
+def register(question_type, compile_spec, expensive=False):
+    """Register ``grade(user_answer, spec)`` for a question type, with the step that builds its spec"""
+    def decorator(grade):
+        GRADERS[question_type] = (compile_spec, grade)
+        if expensive:
+            EXPENSIVE_GRADERS.add(question_type)
+        return grade
+    return decorator
+
+
+# question id -> ((question_type, updated_at), spec)
+_specs = {}
+
+
+def compiled_spec(question):
+    """The question's compiled spec, built once per process and edit"""
+    compile_spec, _ = GRADERS[question.question_type]
+    if question.pk is None:
+        return compile_spec(question)
+    version = (question.question_type, question.updated_at)
+    cached = _specs.get(question.pk)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+    spec = compile_spec(question)
+    _specs[question.pk] = (version, spec)
+    return spec
+
+
+def clear_compiled_spec(question_id=None):
+    """Drop the cached spec of one question (or all of them)"""
+    if question_id is None:
+        _specs.clear()
+    else:
+        _specs.pop(question_id, None)
+
+
+def count_sentences(text):
+    """Count sentences in text"""
+    from nltk.tokenize import sent_tokenize
+    try:
+        sentences = sent_tokenize(text)
+        return len([s for s in sentences if s.strip()])
+    except:
+        # Fallback: count by punctuation
+        return len([s for s in text.split('.') if s.strip()])
+
+def count_words(text):
+    """Count words in text"""
+    words = text.split()
+    return len(words)
+
+
+def is_gibberish(text, threshold=0.3):
+    """
+    Check if text is gibberish (mostly non-dictionary words)
+    Returns True if text is gibberish, False otherwise
+    Accepts the answer text or its TextAnalysis
+    """
+    analysis = text if isinstance(text, TextAnalysis) else analyze_text(text)
+    
+    if analysis.word_count == 0:
+        return True
+    
+    # If less than threshold% of words are recognizable, it's gibberish
+    return (analysis.recognizable_count() / analysis.word_count) < threshold
+
+
+class FillBlanksSpec(NamedTuple):
+    expected_parts: tuple
+
+
+def compile_fill_blanks(question):
+    # Expected answers from database (store as "goes, are, a")
+    return FillBlanksSpec(tuple(part.strip().lower() for part in question.correct_answer.split(',')))
+
+
+@register('fill_blanks', compile_fill_blanks)
+def grade_fill_blanks(user_answer, spec):
+    """Grade Q1: Fill in the blanks (grammatical accuracy)"""
+    # Expected format: "goes, are, a" or "goes,are,a"
+    user_answer = user_answer.strip().lower()
+    
+    # Clean up the answer - remove spaces and split
+    user_parts = [part.strip() for part in user_answer.replace(',', ' ').split() if part.strip()]
+    
+    expected_parts = spec.expected_parts
+    
+    correct_count = 0
+    feedback = []
+    
+    for i, expected in enumerate(expected_parts):
+        if i < len(user_parts):
+            if user_parts[i] == expected:
+                correct_count += 1
+                # Don't add feedback for correct answers - we only show errors
+            else:
+                feedback.append(f"❌ Blank {i+1}: Expected '{expected}', you wrote '{user_parts[i]}'")
+        else:
+            feedback.append(f"❌ Blank {i+1}: Missing answer (expected '{expected}')")
+    
+    score = (correct_count / len(expected_parts)) * 100
+    
+    return {
+        'score': round(score, 2),
+        'feedback': feedback,  # Only errors, no correct items
+        'needs_manual_review': False
+    }
+
+
+class SentenceOrderSpec(NamedTuple):
+    expected: str
+    display: str
+
+
+def compile_sentence_order(question):
+    # Expected order from database (store as "C,B,A")
+    expected = question.correct_answer.strip().upper().replace(' ', '').replace(',', '')
+    return SentenceOrderSpec(expected, ', '.join(expected))
+
+
+@register('sentence_order', compile_sentence_order)
+def grade_sentence_order(user_answer, spec):
+    """Grade Q2: Arrange sentences in logical order"""
+    # Expected format: "C, B, A" or "CBA"
+    user_answer = user_answer.strip().upper().replace(' ', '').replace(',', '')
+    expected = spec.expected
+    
+    if user_answer == expected:
+        return {
+            'score': 100,
+            'feedback': [],  # No errors to show
+            'needs_manual_review': False
+        }
+    
+    # Check if user reversed it
+    if user_answer == expected[::-1]:
+        return {
+            'score': 50,
+            'feedback': [f"⚠️ You have the correct order but reversed. The correct order is {spec.display}"],
+            'needs_manual_review': False
+        }
+    
+    # Check partial correctness - first sentence
+    if user_answer and len(user_answer) > 0 and user_answer[0] == expected[0]:
+        return {
+            'score': 33,
+            'feedback': [f"❌ Only the first sentence ({expected[0]}) is correct. Correct order: {spec.display}"],
+            'needs_manual_review': False
+        }
+    
+    return {
+        'score': 0,
+        'feedback': [f"❌ Incorrect order. The correct order is {spec.display}"],
+        'needs_manual_review': False
+    }
+
+
+class RewriteSpec(NamedTuple):
+    allowed_words: frozenset
+    error_patterns: tuple
+    matcher: PhraseMatcher
+
+
+def compile_rewrite_sentence(question):
+    error_patterns = tuple(tuple(pattern) for pattern in question.error_patterns or DEFAULT_REWRITE_ERROR_PATTERNS)
+    phrases = [pattern for pattern, _, _ in error_patterns] + ['however']
+    return RewriteSpec(
+        frozenset(word.lower() for word in question.allowed_words or DEFAULT_REWRITE_ALLOWED_WORDS),
+        error_patterns,
+        PhraseMatcher(dict.fromkeys(phrases))
+    )
+
+
+@register('sentence_rewrite', compile_rewrite_sentence, expensive=True)
+def grade_rewrite_sentence(user_answer, spec):
+    """Grade Q3: Rewrite sentence (question.correct_answer) with correct spelling and punctuation"""
+    analysis = analyze_text(user_answer)
+    user_text = analysis.text
+    
+    # ===== CHECK FOR EMPTY OR VERY SHORT ANSWERS =====
+    if analysis.word_count < 3:
+        return {
+            'score': 0,
+            'feedback': ["❌ Answer is too short. Please write a complete sentence."],
+            'needs_manual_review': False
+        }
+    
+    # ===== CHECK FOR GIBBERISH =====
+    if is_gibberish(analysis, threshold=0.3):
+        return {
+            'score': 0,
+            'feedback': ["❌ Your answer doesn't contain enough recognizable English words. Please write a proper sentence."],
+            'needs_manual_review': False
+        }
+    
+    feedback = []
+    score = 0
+    mistake_count = 0
+    
+    # 1. Spelling Check (40 points) - IMPROVED
+    words = analysis.tokens
+    # Original words (with context) that are neither common nor in the dictionary
+    misspelled = analysis.misspelled(skip=spec.allowed_words)
+    
+    if len(misspelled) == 0:
+        score += 40
+    else:
+        # Show unique misspelled words (limit to 3)
+        unique_errors = list(set([w.lower() for w in misspelled]))[:3]
+        feedback.append(f"❌ Spelling errors: {describe_misspellings(unique_errors)}")
+        # Give partial credit only if there are some correct words
+        correct_words = len(words) - len(misspelled)
+        if correct_words > 0 and len(misspelled) < len(words):
+            spell_score = (correct_words / len(words)) * 40
+            score += spell_score
+        mistake_count += len(misspelled)
+    
+    # 2. Grammar Check (30 points) - Use pattern matching
+    grammar_errors = []
+    found = spec.matcher.found(analysis.words)
+    
+    # Check for common errors in the original sentence
+    for wrong, correct, _ in spec.error_patterns:
+        if wrong in found:
+            grammar_errors.append(f"❌ '{wrong}' should be '{correct}'")
+    if 'however' in found and ';' not in user_text:
+        grammar_errors.append("❌ Use semicolon (;) before 'however'")
+    
+    if len(grammar_errors) == 0:
+        score += 30
+    else:
+        deduction = min(25, len(grammar_errors) * 8)
+        grammar_score = 30 - deduction
+        score += grammar_score
+        feedback.extend(grammar_errors[:3])
+        mistake_count += len(grammar_errors)
+    
+    # 3. Capitalization (15 points)
+    if user_text and user_text[0].isupper():
+        score += 15
+    else:
+        feedback.append("❌ Start with capital letter")
+        mistake_count += 1
+    
+    # 4. Punctuation (15 points)
+    if user_text and user_text[-1] in ['.', '!', '?']:
+        score += 15
+    else:
+        feedback.append("❌ End with proper punctuation (. or !)")
+        mistake_count += 1
+    
+    # Ensure score is between 0-100
+    final_score = round(min(100, max(0, score)), 2)
+    
+    return {
+        'score': final_score,
+        'feedback': feedback,  # Only errors
+        'needs_manual_review': False
+    }
+
+
+class SpellingMcqSpec(NamedTuple):
+    expected: str
+
+
+def compile_spelling_mcq(question):
+    # Expected answers from database (store as "b,b,b")
+    return SpellingMcqSpec(question.correct_answer.strip().lower().replace(' ', '').replace(',', ''))
+
+
+@register('spelling_mcq', compile_spelling_mcq)
+def grade_spelling_mcq(user_answer, spec):
+    """Grade Q4: Choose correctly spelled word (multiple choice)"""
+    # Expected format: "b, b, b" or "bbb"
+    user_answer = user_answer.strip().lower().replace(' ', '').replace(',', '')
+    expected = spec.expected
+    
+    # Check each answer
+    correct_count = 0
+    feedback = []
+    
+    for i, exp_char in enumerate(expected):
+        if i < len(user_answer):
+            if user_answer[i] == exp_char:
+                correct_count += 1
+                # Don't add feedback for correct answers
+            else:
+                feedback.append(f"❌ Question {i+1}: You chose '{user_answer[i]}', correct was '{exp_char}'")
+        else:
+            feedback.append(f"❌ Question {i+1}: Missing answer")
+    
+    score = (correct_count / len(expected)) * 100
+    
+    return {
+        'score': round(score, 2),
+        'feedback': feedback,  # Only errors
+        'needs_manual_review': False
+    }
+
+
+class ParagraphSpec(NamedTuple):
+    clue_words: tuple
+    transitions: tuple
+    topic_words: frozenset
+    error_patterns: tuple
+    allowed_words: frozenset
+    matcher: PhraseMatcher
+
+
+def compile_paragraph_writing(question):
+    clue_words = tuple(question.clue_words or DEFAULT_PARAGRAPH_CLUE_WORDS)
+    transitions = tuple(question.transition_words or DEFAULT_PARAGRAPH_TRANSITIONS)
+    topic_words = tuple(question.topic_words or DEFAULT_PARAGRAPH_TOPIC_WORDS)
+    error_patterns = tuple(tuple(pattern) for pattern in question.error_patterns or DEFAULT_PARAGRAPH_ERROR_PATTERNS)
+    # One automaton for every phrase the rubrics look for
+    phrases = clue_words + transitions + topic_words + tuple(pattern for pattern, _, _ in error_patterns)
+    return ParagraphSpec(
+        clue_words,
+        transitions,
+        frozenset(topic_words),
+        error_patterns,
+        frozenset(word.lower() for word in question.allowed_words or DEFAULT_PARAGRAPH_ALLOWED_WORDS),
+        PhraseMatcher(dict.fromkeys(phrases))
+    )
+
+
+@register('paragraph_writing', compile_paragraph_writing, expensive=True)
+def grade_paragraph_writing(user_answer, spec):
+    """
+    Grade Q5: Write paragraph using clue words
+    4 Rubrics: Grammatical Accuracy (25), Vocabulary (25), 
+               Organization (25), Spelling/Punctuation (25)
+    """
+    analysis = analyze_text(user_answer)
+    user_text = analysis.text
+    clue_words = spec.clue_words
+    
+    # ===== CHECK FOR EMPTY OR VERY SHORT ANSWERS =====
+    words = analysis.tokens
+    if len(words) < 10:
+        return {
+            'score': 0,
+            'feedback': ["❌ Answer is too short. Please write a complete paragraph of 5-6 sentences (at least 50 words)."],
+            'needs_manual_review': False,
+            'level': 'Beginner'
+        }
+    
+    # ===== CHECK FOR GIBBERISH =====
+    if is_gibberish(analysis, threshold=0.4):
+        return {
+            'score': 0,
+            'feedback': ["❌ Your answer doesn't contain enough recognizable English words. Please write a proper paragraph."],
+            'needs_manual_review': False,
+            'level': 'Beginner'
+        }
+    
+    # FEEDBACK STORAGE - ONLY ERRORS
+    error_feedback = []
+    mistake_count = 0
+    
+    # Every clue word, transition and error pattern, found in one pass
+    hits = spec.matcher.find(analysis.words)
+    found = {phrase for phrase, _ in hits}
+    
+    # ===== RUBRIC 1: GRAMMATICAL ACCURACY (25 points) =====
+    grammar_score = 25
+    grammar_errors = []
+    
+    # Basic grammar checks (pattern matching)
+    grammar_error_count = 0
+    for error_pattern, correction, desc in spec.error_patterns:
+        if error_pattern in found:
+            grammar_error_count += 1
+            grammar_errors.append(f"❌ {desc}: '{error_pattern}' should be '{correction}'")
+    
+    if grammar_error_count > 0:
+        deduction = min(15, grammar_error_count * 3)
+        grammar_score -= deduction
+        error_feedback.append(f"❌ Found {grammar_error_count} grammar issues")
+        error_feedback.extend(grammar_errors[:3])
+        mistake_count += grammar_error_count
+    
+    # ===== RUBRIC 2: VOCABULARY USE (25 points) =====
+    vocab_score = 0
+    
+    # Check clue words (15 points)
+    found_words = []
+    missing_words = []
+    for word in clue_words:
+        if word in found:
+            found_words.append(word)
+        else:
+            missing_words.append(word)
+    
+    word_score = (len(found_words) / len(clue_words)) * 15
+    vocab_score += word_score
+    
+    if len(found_words) < len(clue_words):
+        error_feedback.append(f"❌ Missing clue words: {', '.join(missing_words)}")
+        mistake_count += len(missing_words)
+    
+    # Check word variety (10 points)
+    unique_words = analysis.unique_word_count
+    
+    if unique_words >= 15:
+        vocab_score += 10
+    elif unique_words >= 10:
+        vocab_score += 7
+    elif unique_words >= 7:
+        vocab_score += 5
+    else:
+        error_feedback.append(f"❌ Very limited vocabulary ({unique_words} unique words)")
+        mistake_count += 1
+    
+    # ===== RUBRIC 3: ORGANIZATION & COHERENCE (25 points) =====
+    org_score = 0
+    
+    # Sentence count (10 points)
+    sentences = analysis.sentences
+    sentence_count = len(sentences)
+    
+    if 5 <= sentence_count <= 6:
+        org_score += 10
+    elif sentence_count >= 4:
+        org_score += 7
+        error_feedback.append(f"❌ Aim for 5-6 sentences (you wrote {sentence_count})")
+        mistake_count += 1
+    elif sentence_count >= 3:
+        org_score += 5
+        error_feedback.append(f"❌ Too few sentences ({sentence_count}), need 5-6")
+        mistake_count += 1
+    else:
+        error_feedback.append(f"❌ Need 5-6 sentences (you wrote {sentence_count})")
+        mistake_count += 1
+    
+    # Check for transition words (10 points)
+    found_transitions = [t for t in spec.transitions if t in found]
+    
+    if len(found_transitions) >= 3:
+        org_score += 10
+    elif len(found_transitions) >= 2:
+        org_score += 7
+    elif len(found_transitions) >= 1:
+        org_score += 4
+        error_feedback.append("❌ Add more transition words (first, then, finally)")
+        mistake_count += 1
+    else:
+        error_feedback.append("❌ No transition words found")
+        mistake_count += 1
+    
+    # Logical flow - check if starts with topic introduction (5 points)
+    if sentences:
+        first_sentence_end = analysis.sentence_spans[0][1]
+        if any(phrase in spec.topic_words and offset < first_sentence_end for phrase, offset in hits):
+            org_score += 5
+        else:
+            error_feedback.append("❌ Start with a clear topic introduction")
+            org_score += 2
+            mistake_count += 1
+    else:
+        error_feedback.append("❌ No sentences written")
+        mistake_count += 1
+    
+    # ===== RUBRIC 4: SPELLING & PUNCTUATION (25 points) =====
+    spell_score = 25
+    spelling_errors = []
+    
+    # IMPROVED SPELLING CHECK (common words and single letters are skipped)
+    misspelled = analysis.misspelled(skip=spec.allowed_words)
+    
+    if len(misspelled) > 0:
+        # Show unique misspelled words (limit to 3)
+        unique_errors = list(set([w.lower() for w in misspelled]))[:3]
+        deduction = min(15, len(misspelled) * 2)  # Reduced penalty
+        spell_score -= deduction
+        error_feedback.append(f"❌ Possible spelling errors: {describe_misspellings(unique_errors)}")
+        mistake_count += len(misspelled)
+    
+    # Capitalization
+    if not (user_text and user_text[0].isupper()):
+        spell_score -= 5
+        error_feedback.append("❌ Start with capital letter")
+        mistake_count += 1
+    
+    # Ending punctuation
+    if not (user_text and user_text[-1] in ['.', '!', '?']):
+        spell_score -= 5
+        error_feedback.append("❌ End with proper punctuation (. or !)")
+        mistake_count += 1
+    
+    # ===== CALCULATE TOTAL SCORE =====
+    total_score = grammar_score + vocab_score + org_score + spell_score
+    
+    # Ensure score is between 0-100
+    total_score = round(max(0, min(100, total_score)), 2)
+    
+    # If most words are misspelled, give 0
+    if len(misspelled) > len(words) * 0.7:  # More than 70% misspelled
+        total_score = 0
+        error_feedback = ["❌ Your answer contains too many spelling errors. Please write using proper English words."]
+    
+    # ===== DETERMINE LEVEL =====
+    if total_score >= 80:
+        level = "Advanced"
+    elif total_score >= 60:
+        level = "Intermediate"
+    elif total_score >= 40:
+        level = "Basic"
+    else:
+        level = "Beginner"
+    
+    # Only return error feedback (no ✅ items)
+    return {
+        'score': total_score,
+        'feedback': error_feedback,  # Only errors
+        'needs_manual_review': False,
+        'level': level
+    }
+
+
+# ===== MAIN GRADING FUNCTION =====
+def grade_writing_response(user_answer, question):
+    """Main grading function; repeated answers come from the grading cache"""
+    return grading_cache.get_or_grade(question, user_answer, grade_writing_response_uncached)
+
+
+def grade_writing_response_uncached(user_answer, question):
+    """Routes to the grader registered for the question type"""
+    if question.question_type not in GRADERS:
+        # Fallback for old question types
+        return {
+            'score': 0,
+            'feedback': ["❌ Question type not supported"],
+            'needs_manual_review': True
+        }
+    _, grade = GRADERS[question.question_type]
+    return grade(user_answer, compiled_spec(question))
+
+
+# Lazy loading for the pool that runs expensive graders
+_pool = None
+_pool_lock = threading.Lock()
+def get_grading_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(
+                max_workers=max(1, settings.WRITING_GRADING_THREADS), thread_name_prefix='writing-grader'
+            )
+    return _pool
+
+
+def grade_batch(items):
+    """
+    Grade (user_answer, question) pairs in one pass; returns the results in
+    order. All but one of the expensive answers go to the pool while this
+    thread grades the rest.
+    """
+    results = [None] * len(items)
+    expensive = [i for i, (_, question) in enumerate(items) if question.question_type in EXPENSIVE_GRADERS]
+    pooled = expensive[1:] if settings.WRITING_GRADING_THREADS > 0 else []
+    futures = {i: get_grading_pool().submit(grade_writing_response, *items[i]) for i in pooled}
+
+    for i, (user_answer, question) in enumerate(items):
+        if i not in futures:
+            results[i] = grade_writing_response(user_answer, question)
+    for i, future in futures.items():
+        results[i] = future.result()
+    return results
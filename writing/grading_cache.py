@@ -0,0 +1,131 @@
+"""
+Memoized grading results.
+
+Many students send the same answer to the short questions (fill_blanks,
+sentence_order, spelling_mcq), and an answer resubmitted unchanged should
+not be graded twice. GradingCache keeps recent results in a per-process LRU
+keyed by:
+
+- the question id and its grader version (bump GRADER_VERSIONS when a
+  grader's scores or feedback change), and
+- a hash of the question's answer key and last edit time plus the answer,
+  normalised only in the ways its grader ignores (case, spacing, commas).
+
+Hashing the answer key means a question edited in another process can
+never be served a stale result here; the post_save/post_delete signals in
+signals.py also drop the question's entries so they don't sit in memory.
+"""
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from django.conf import settings
+
+# Bump a question type's version when its grader's output changes
+GRADER_VERSIONS = {
+    'fill_blanks': 1,
+    'sentence_order': 1,
+    'sentence_rewrite': 1,
+    'spelling_mcq': 1,
+    'paragraph_writing': 1,
+}
+
+
+def normalize_answer(question_type, user_answer):
+    """The answer as its grader sees it; equal results mean equal grades"""
+    if question_type == 'fill_blanks':
+        return ' '.join(user_answer.lower().replace(',', ' ').split())
+    if question_type == 'sentence_order':
+        return user_answer.strip().upper().replace(' ', '').replace(',', '')
+    if question_type == 'spelling_mcq':
+        return user_answer.strip().lower().replace(' ', '').replace(',', '')
+    return user_answer.strip()
+
+
+def answer_key(question):
+    """Fingerprint of the question fields the graders read (updated_at covers the rubric)"""
+    return json.dumps(
+        [question.question_type, question.correct_answer, question.acceptable_answers, question.updated_at],
+        sort_keys=True, default=str
+    )
+
+
+class GradingCache:
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.by_type = {}
+
+    def key(self, question, user_answer):
+        question_type = question.question_type
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(answer_key(question).encode('utf-8'))
+        digest.update(b'\0')
+        digest.update(normalize_answer(question_type, user_answer).encode('utf-8'))
+        return (question.pk, GRADER_VERSIONS.get(question_type, 0), digest.hexdigest())
+
+    def _count(self, question_type, hit):
+        counts = self.by_type.setdefault(question_type, {'hits': 0, 'misses': 0})
+        counts['hits' if hit else 'misses'] += 1
+
+    def get_or_grade(self, question, user_answer, grade):
+        """Cached result of ``grade(user_answer, question)``; a fresh copy each call"""
+        if not self.max_entries:
+            return grade(user_answer, question)
+
+        key = self.key(question, user_answer)
+        with self._lock:
+            result = self._entries.get(key)
+            if result is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                self._count(question.question_type, True)
+        if result is None:
+            # Graded outside the lock; two threads may both grade the same new answer
+            result = grade(user_answer, question)
+            with self._lock:
+                self.misses += 1
+                self._count(question.question_type, False)
+                self._entries[key] = result
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        return dict(result, feedback=list(result.get('feedback', [])))
+
+    def invalidate_question(self, question_id):
+        with self._lock:
+            stale = [key for key in self._entries if key[0] == question_id]
+            for key in stale:
+                del self._entries[key]
+            self.invalidations += len(stale)
+        return len(stale)
+
+    def clear(self):
+        with self._lock:
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'max_entries': self.max_entries,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0,
+            'evictions': self.evictions,
+            'invalidations': self.invalidations,
+            'by_type': {
+                question_type: dict(counts, hit_rate=counts['hits'] / (counts['hits'] + counts['misses']))
+                for question_type, counts in self.by_type.items()
+            },
+        }
+
+
+grading_cache = GradingCache(settings.WRITING_GRADING_CACHE_SIZE)
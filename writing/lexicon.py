@@ -0,0 +1,197 @@
+"""
+Prebuilt English lexicon for the writing graders' spelling checks.
+
+pyspellchecker's SpellChecker() decompresses its word-frequency list into a
+Python dict in every process that grades an answer. ``manage.py build_lexicon``
+writes the same words once to a compact file instead, which each worker
+memory-maps read-only: opening it costs no parsing, and the pages are shared
+between all workers on the host through the page cache.
+
+File layout (little-endian uint32 sections after a 16-byte header):
+
+    header   b'LEX1', word count N, slot count S (power of two), blob size
+    offsets  N + 1 start offsets of the sorted words in the blob
+    freqs    N word frequencies (for ranking spelling suggestions)
+    slots    S-slot open-addressing hash table of word index + 1 (0 = empty)
+    blob     the UTF-8 words, concatenated in sorted order
+
+Membership is one CRC32 and (usually) one probe, so O(1) per word.
+"""
+import mmap
+import os
+import struct
+import sys
+import zlib
+from array import array
+from django.conf import settings
+
+MAGIC = b'LEX1'
+HEADER = struct.Struct('<4sIII')
+
+
+def _slot_count(count):
+    """Power of two at least twice ``count``, keeping probe chains short"""
+    slots = 1
+    while slots < count * 2:
+        slots <<= 1
+    return slots
+
+
+def build_lexicon(path, frequencies):
+    """Write a lexicon of ``frequencies`` ({word: count}) to ``path``; returns the word count"""
+    if sys.byteorder != 'little':
+        raise RuntimeError('Lexicon files are little-endian; build them on a little-endian host')
+
+    words = sorted(word.lower() for word in frequencies if word)
+    words = [word for i, word in enumerate(words) if i == 0 or word != words[i - 1]]
+    encoded = [word.encode('utf-8') for word in words]
+    counts = {}
+    for word, count in frequencies.items():
+        counts[word.lower()] = counts.get(word.lower(), 0) + int(count)
+
+    offsets = array('I', [0])
+    for key in encoded:
+        offsets.append(offsets[-1] + len(key))
+    freqs = array('I', (min(counts[word], 0xFFFFFFFF) for word in words))
+
+    slot_count = _slot_count(len(words))
+    mask = slot_count - 1
+    slots = array('I', bytes(4 * slot_count))
+    for index, key in enumerate(encoded):
+        slot = zlib.crc32(key) & mask
+        while slots[slot]:
+            slot = (slot + 1) & mask
+        slots[slot] = index + 1
+
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, len(words), slot_count, offsets[-1]))
+        offsets.tofile(f)
+        freqs.tofile(f)
+        slots.tofile(f)
+        f.write(b''.join(encoded))
+    # Replace atomically; workers that mapped the old file keep reading it
+    os.replace(tmp_path, path)
+    return len(words)
+
+
+class Lexicon:
+    """Read-only, memory-mapped view of a file written by build_lexicon()"""
+    def __init__(self, path):
+        if sys.byteorder != 'little':
+            raise RuntimeError('Lexicon files are little-endian')
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self._count, slot_count, blob_size = HEADER.unpack_from(self._mm)
+        if magic != MAGIC:
+            raise ValueError(f'{path} is not a lexicon file')
+        self._mask = slot_count - 1
+
+        view = memoryview(self._mm)
+        start = HEADER.size
+        sections = []
+        for length in (self._count + 1, self._count, slot_count):
+            sections.append(view[start:start + 4 * length].cast('I'))
+            start += 4 * length
+        self._offsets, self._freqs, self._slots = sections
+        self._blob_start = start
+        self.size = start + blob_size
+
+    def __len__(self):
+        return self._count
+
+    def _word_bytes(self, index):
+        start = self._blob_start
+        return self._mm[start + self._offsets[index]:start + self._offsets[index + 1]]
+
+    def index(self, word):
+        """Position of ``word`` (lowercase) in the sorted word list, or -1"""
+        key = word.encode('utf-8')
+        slot = zlib.crc32(key) & self._mask
+        while True:
+            entry = self._slots[slot]
+            if not entry:
+                return -1
+            if self._word_bytes(entry - 1) == key:
+                return entry - 1
+            slot = (slot + 1) & self._mask
+
+    def __contains__(self, word):
+        return self.index(word) >= 0
+
+    def contains_many(self, words):
+        """Membership of each word in ``words``, looking every distinct word up once"""
+        found = {word: self.index(word) >= 0 for word in set(words)}
+        return [found[word] for word in words]
+
+    def frequency(self, word):
+        index = self.index(word)
+        return self._freqs[index] if index >= 0 else 0
+
+    def word(self, index):
+        return self._word_bytes(index).decode('utf-8')
+
+    def word_length(self, index):
+        """Length of a word in UTF-8 bytes, without decoding it"""
+        return self._offsets[index + 1] - self._offsets[index]
+
+    def frequency_at(self, index):
+        return self._freqs[index]
+
+    def __iter__(self):
+        for index in range(self._count):
+            yield self.word(index)
+
+    def items(self):
+        """(word, frequency) pairs in sorted order"""
+        for index in range(self._count):
+            yield self.word(index), self._freqs[index]
+
+
+class FrequencyLexicon:
+    """Same interface over an in-memory {word: count} dict (no prebuilt file)"""
+    def __init__(self, frequencies):
+        self._frequencies = frequencies
+        self.path = None
+        self.size = None
+
+    def __len__(self):
+        return len(self._frequencies)
+
+    def __contains__(self, word):
+        return word in self._frequencies
+
+    def contains_many(self, words):
+        return [word in self._frequencies for word in words]
+
+    def frequency(self, word):
+        return self._frequencies.get(word, 0)
+
+    def __iter__(self):
+        return iter(sorted(self._frequencies))
+
+    def items(self):
+        return sorted(self._frequencies.items())
+
+
+def spellchecker_frequencies():
+    """pyspellchecker's bundled English word frequencies (the lexicon's source)"""
+    from spellchecker import SpellChecker
+    return dict(SpellChecker().word_frequency.dictionary)
+
+
+# Lazy loading for the lexicon, once per process
+_lexicon = None
+def get_lexicon():
+    global _lexicon
+    if _lexicon is None:
+        path = settings.WRITING_LEXICON_PATH
+        try:
+            _lexicon = Lexicon(path)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Lexicon not available ({e}); run `manage.py build_lexicon`")
+            print("⚠️ Falling back to pyspellchecker's in-memory dictionary")
+            _lexicon = FrequencyLexicon(spellchecker_frequencies())
+    return _lexicon
@@ -0,0 +1,115 @@
+import random
+import string
+import time
+
+from django.core.management.base import BaseCommand
+
+VOCABULARY = (
+    'time management planning daily routine stress success students student life help helps '
+    'making important essential crucial key first then next after because so therefore finally '
+    'also however schedule tasks goals deadlines focus balance study work rest sleep habits '
+    'priorities week morning evening calendar list exams project homework friends family '
+    'healthy energy attention progress results better easier without with every their our'
+).split()
+CONNECTORS = ['First,', 'Then', 'Next,', 'After that,', 'Because of this,', 'Therefore,', 'Finally,', 'Also,']
+
+
+def _misspell(word, rng):
+    """Swap two neighbouring letters (or drop one) to make a plausible typo"""
+    if len(word) < 4:
+        return word
+    i = rng.randrange(1, len(word) - 2)
+    if rng.random() < 0.5:
+        return word[:i] + word[i + 1] + word[i] + word[i + 2:]
+    return word[:i] + word[i + 1:]
+
+
+def build_corpus(count, sentences, typo_rate, seed=0):
+    """Synthetic 'time management' paragraphs with a share of misspelled words"""
+    rng = random.Random(seed)
+    essays = []
+    for _ in range(count):
+        parts = ['Time management is important for every student.']
+        for i in range(sentences - 1):
+            words = [_misspell(w, rng) if rng.random() < typo_rate else w
+                     for w in rng.choices(VOCABULARY, k=rng.randint(8, 16))]
+            parts.append(f"{CONNECTORS[i % len(CONNECTORS)]} {' '.join(words)}.")
+        essays.append(' '.join(parts))
+    return essays
+
+
+def _legacy_passes(text, spell):
+    """The text work the rewrite and paragraph graders did per answer before TextAnalysis"""
+    from nltk.tokenize import sent_tokenize
+
+    translator = str.maketrans('', '', string.punctuation)
+    user_text = text.strip()
+    # is_gibberish: its own split, translate and lookup loop
+    words = user_text.split()
+    sum(1 for w in words if len(w.translate(translator).lower()) > 2 and w.translate(translator).lower() in spell)
+    # Rubrics: repeated lowercasing, sentence split and a second translate/lookup loop
+    words = user_text.split()
+    user_text.lower()
+    user_text.lower()
+    len(set([w.lower() for w in words]))
+    try:
+        sent_tokenize(user_text)
+    except Exception:
+        [s.strip() for s in user_text.replace('!', '.').replace('?', '.').split('.') if s.strip()]
+    for word in words:
+        clean_word = word.translate(translator).lower()
+        if len(clean_word) > 1:
+            clean_word in spell
+
+
+class Command(BaseCommand):
+    help = "Time the writing graders' text analysis on a synthetic essay corpus"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--essays', type=int, default=500, help='Essays in the corpus')
+        parser.add_argument('--sentences', type=int, default=6, help='Sentences per essay')
+        parser.add_argument('--typo-rate', type=float, default=0.08, help='Share of misspelled words')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def _time(self, label, func, essays, baseline=None):
+        started = time.perf_counter()
+        for essay in essays:
+            func(essay)
+        elapsed = time.perf_counter() - started
+        speedup = f"{baseline / elapsed:>9.2f}x" if baseline else ''
+        self.stdout.write(f"{label:<34}{elapsed * 1000 / len(essays):>10.3f}{len(essays) / elapsed:>12.0f}{speedup}")
+        return elapsed
+
+    def handle(self, *args, **options):
+        from writing.lexicon import get_lexicon
+        from writing.text_analysis import TextAnalysis, analyze_text
+        from writing.graders import compiled_spec, grade_paragraph_writing, grade_rewrite_sentence
+        from writing.models import WritingQuestion
+
+        essays = build_corpus(max(1, options['essays']), max(2, options['sentences']),
+                              options['typo_rate'], options['seed'])
+        spell = get_lexicon()
+        words = sum(len(essay.split()) for essay in essays)
+        self.stdout.write(f"{len(essays)} essays, {words} words, typo rate {options['typo_rate']:.0%}")
+
+        # Load the dictionary and sentence tokenizer before timing
+        _legacy_passes(essays[0], spell)
+        TextAnalysis(essays[0]).sentences
+
+        self.stdout.write(f"{'pass':<34}{'ms/essay':>10}{'essays/s':>12}{'speed-up':>10}")
+        legacy = self._time('legacy text passes', lambda e: _legacy_passes(e, spell), essays)
+        self._time('TextAnalysis', lambda e: TextAnalysis(e).sentences, essays, legacy)
+
+        # Unsaved questions with empty rubric fields compile to the built-in rubric
+        rewrite_spec = compiled_spec(WritingQuestion(question_type='sentence_rewrite'))
+        paragraph_spec = compiled_spec(WritingQuestion(question_type='paragraph_writing'))
+
+        def grade_both(essay):
+            grade_rewrite_sentence(essay, rewrite_spec)
+            grade_paragraph_writing(essay, paragraph_spec)
+
+        # Starts cold: each essay is analysed once and shared by both graders
+        analyze_text.cache_clear()
+        self._time('rewrite + paragraph graders', grade_both, essays)
+
+        self.stdout.write(self.style.SUCCESS("Done"))
@@ -0,0 +1,99 @@
+import json
+import os
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Run in a fresh interpreter so each loader's start-up cost and RSS are measured alone
+_LOAD_PROBE = """
+import json, resource, sys, time
+started = time.perf_counter()
+if sys.argv[1] == 'pyspellchecker':
+    from spellchecker import SpellChecker
+    words = SpellChecker()
+else:
+    sys.path.insert(0, sys.argv[3])
+    from writing.lexicon import Lexicon
+    words = Lexicon(sys.argv[2])
+loaded = time.perf_counter() - started
+probe = ['time', 'management', 'recieve', 'planning', 'stres', 'success'] * 5000
+started = time.perf_counter()
+for word in probe:
+    word in words
+lookup = time.perf_counter() - started
+print(json.dumps({
+    'load_ms': loaded * 1000,
+    'lookup_us': lookup * 1e6 / len(probe),
+    'rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+}))
+"""
+
+
+class Command(BaseCommand):
+    help = "Build the memory-mapped English lexicon used by the writing graders"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--source', default='',
+            help='Word list with "word count" per line (defaults to the pyspellchecker dictionary)'
+        )
+        parser.add_argument('--output', default='', help='Lexicon file (defaults to WRITING_LEXICON_PATH)')
+        parser.add_argument(
+            '--compare', action='store_true',
+            help='Compare start-up time, RSS and lookups against pyspellchecker in fresh processes'
+        )
+
+    def _read_source(self, path):
+        frequencies = {}
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                parts = line.split()
+                if not parts:
+                    continue
+                count = int(parts[1]) if len(parts) > 1 and parts[1].isdigit() else 1
+                frequencies[parts[0]] = frequencies.get(parts[0], 0) + count
+        return frequencies
+
+    def _probe(self, loader, path):
+        output = subprocess.run(
+            [sys.executable, '-c', _LOAD_PROBE, loader, path, str(settings.BASE_DIR)],
+            capture_output=True, text=True, check=True
+        ).stdout
+        return json.loads(output)
+
+    def handle(self, *args, **options):
+        from writing.lexicon import Lexicon, build_lexicon, spellchecker_frequencies
+
+        path = options['output'] or settings.WRITING_LEXICON_PATH
+        started = time.perf_counter()
+        if options['source']:
+            if not os.path.exists(options['source']):
+                raise CommandError(f"{options['source']} does not exist")
+            frequencies = self._read_source(options['source'])
+        else:
+            frequencies = spellchecker_frequencies()
+        count = build_lexicon(path, frequencies)
+        elapsed = time.perf_counter() - started
+
+        lexicon = Lexicon(path)
+        missing = [word for word in frequencies if word.lower() not in lexicon]
+        if missing:
+            raise CommandError(f"{len(missing)} words did not round-trip, e.g. {missing[:5]}")
+        self.stdout.write(f"Wrote {count} words to {path} ({lexicon.size / 1024 / 1024:.1f} MB) in {elapsed:.1f} s")
+
+        if options['compare']:
+            self.stdout.write(f"{'loader':<16}{'start-up ms':>12}{'lookup us':>11}{'max RSS MB':>12}")
+            for loader in ('pyspellchecker', 'lexicon'):
+                try:
+                    result = self._probe(loader, path)
+                except subprocess.CalledProcessError as e:
+                    self.stderr.write(f"{loader} probe failed: {e.stderr.strip()}")
+                    continue
+                self.stdout.write(
+                    f"{loader:<16}{result['load_ms']:>12.1f}{result['lookup_us']:>11.2f}{result['rss_mb']:>12.1f}"
+                )
+
+        self.stdout.write(self.style.SUCCESS("Done"))
@@ -0,0 +1,59 @@
+import os
+import random
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = "Build the symmetric-delete index behind the writing graders' spelling suggestions"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', default='', help='Index file (defaults to WRITING_SUGGESTION_INDEX_PATH)')
+        parser.add_argument('--prefix-length', type=int, default=7, help='Letters of each word that are indexed')
+        parser.add_argument('--max-distance', type=int, default=2, help='Largest edit distance suggested')
+        parser.add_argument(
+            '--min-frequency', type=int, default=0,
+            help='Leave rarer words out of the suggestions (they still count as correctly spelled)'
+        )
+        parser.add_argument('--samples', type=int, default=2000, help='Misspellings to time once it is built')
+
+    def handle(self, *args, **options):
+        from writing.lexicon import Lexicon
+        from writing.suggestions import SuggestionIndex, build_suggestion_index
+
+        if not os.path.exists(settings.WRITING_LEXICON_PATH):
+            raise CommandError("Build the lexicon first (manage.py build_lexicon)")
+        lexicon = Lexicon(settings.WRITING_LEXICON_PATH)
+        path = options['output'] or settings.WRITING_SUGGESTION_INDEX_PATH
+
+        started = time.perf_counter()
+        keys, postings = build_suggestion_index(
+            path, lexicon, options['prefix_length'], options['max_distance'], options['min_frequency']
+        )
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f"Indexed {len(lexicon)} words: {keys} deletes, {postings} postings, "
+            f"{os.path.getsize(path) / 1024 / 1024:.1f} MB in {elapsed:.1f} s"
+        )
+
+        # Time suggestions for one-edit typos of common words
+        index = SuggestionIndex(path, lexicon)
+        rng = random.Random(0)
+        common = sorted(lexicon.items(), key=lambda item: -item[1])[:5000]
+        samples = []
+        for word, _ in rng.sample(common, min(options['samples'], len(common))):
+            if len(word) > 3:
+                i = rng.randrange(1, len(word) - 1)
+                samples.append((word[:i] + word[i + 1:], word))
+        if samples:
+            started = time.perf_counter()
+            hits = sum(1 for typo, word in samples if word in [w for w, _ in index.suggest(typo)])
+            elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f"{len(samples)} typos: {elapsed * 1e6 / len(samples):.0f} us per word, "
+                f"intended word in the top 3 for {hits / len(samples):.0%}"
+            )
+
+        self.stdout.write(self.style.SUCCESS("Done"))
@@ -0,0 +1,67 @@
+# Generated by Django 6.0.1 on 2026-10-19 18:40
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("writing", "0002_suspiciousactivity"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="writingquestion",
+            name="clue_words",
+            field=models.JSONField(
+                blank=True,
+                default=list,
+                help_text="Paragraph: words/phrases the answer should use",
+            ),
+        ),
+        migrations.AddField(
+            model_name="writingquestion",
+            name="transition_words",
+            field=models.JSONField(
+                blank=True,
+                default=list,
+                help_text="Paragraph: transition words that earn organization points",
+            ),
+        ),
+        migrations.AddField(
+            model_name="writingquestion",
+            name="topic_words",
+            field=models.JSONField(
+                blank=True,
+                default=list,
+                help_text="Paragraph: words that mark a topic introduction in the first sentence",
+            ),
+        ),
+        migrations.AddField(
+            model_name="writingquestion",
+            name="allowed_words",
+            field=models.JSONField(
+                blank=True,
+                default=list,
+                help_text="Words never flagged as spelling errors",
+            ),
+        ),
+        migrations.AddField(
+            model_name="writingquestion",
+            name="error_patterns",
+            field=models.JSONField(
+                blank=True,
+                default=list,
+                help_text='Mistakes to flag, as [["wrong", "right", "description"], ...]',
+            ),
+        ),
+        migrations.AddField(
+            model_name="writingquestion",
+            name="updated_at",
+            field=models.DateTimeField(
+                auto_now=True, default=django.utils.timezone.now
+            ),
+            preserve_default=False,
+        ),
+    ]
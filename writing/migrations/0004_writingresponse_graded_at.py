@@ -0,0 +1,29 @@
+# Generated by Django 6.0.1 on 2026-10-19 19:15
+
+from django.db import migrations, models
+
+
+def mark_existing_graded(apps, schema_editor):
+    # Answers saved before drafts existed were graded when they were saved
+    WritingResponse = apps.get_model("writing", "WritingResponse")
+    WritingResponse.objects.update(graded_at=models.F("created_at"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("writing", "0003_writingquestion_rubric"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="writingresponse",
+            name="graded_at",
+            field=models.DateTimeField(
+                blank=True,
+                help_text="Empty while the answer is a draft; graded on submit",
+                null=True,
+            ),
+        ),
+        migrations.RunPython(mark_existing_graded, migrations.RunPython.noop),
+    ]
@@ -79,6 +79,14 @@ class WritingQuestion(models.Model):
     # For dictation (keeping for backward compatibility)
     audio_filename = models.CharField(max_length=200, blank=True, help_text="Name of audio file for dictation")
     
+    # Rubric (compiled once per process by writing/graders.py; empty = the built-in defaults)
+    clue_words = models.JSONField(default=list, blank=True, help_text="Paragraph: words/phrases the answer should use")
+    transition_words = models.JSONField(default=list, blank=True, help_text="Paragraph: transition words that earn organization points")
+    topic_words = models.JSONField(default=list, blank=True, help_text="Paragraph: words that mark a topic introduction in the first sentence")
+    allowed_words = models.JSONField(default=list, blank=True, help_text="Words never flagged as spelling errors")
+    error_patterns = models.JSONField(default=list, blank=True, help_text='Mistakes to flag, as [["wrong", "right", "description"], ...]')
+    updated_at = models.DateTimeField(auto_now=True)
+    
     class Meta:
         ordering = ['order']
         unique_together = ['test', 'order']
@@ -109,6 +117,7 @@ class WritingResponse(models.Model):
     feedback = models.JSONField(default=list, blank=True, help_text="List of feedback points")
     needs_manual_review = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
+    graded_at = models.DateTimeField(null=True, blank=True, help_text="Empty while the answer is a draft; graded on submit")
     
     class Meta:
         unique_together = [['session_key', 'question']]
@@ -0,0 +1,77 @@
+"""
+One-pass, word-boundary-aware phrase matching for the writing rubrics.
+
+The paragraph and rewrite graders looked for clue words, transition words
+and error patterns with one substring scan each (``t in user_lower``), which
+also matched inside longer words: "so" in "also", "key" in "keyboard",
+"cant" in "significant". PhraseMatcher compiles all of a rubric's phrases
+into one Aho-Corasick automaton over *words*. A single pass over the
+answer's words (TextAnalysis.words) then reports every phrase occurrence,
+including overlapping ones, and only ever matches whole words.
+
+Automata are compiled once per question, as part of its grading spec (see
+graders.py).
+"""
+from .text_analysis import WORD_RE
+
+
+def phrase_words(phrase):
+    return tuple(WORD_RE.findall(phrase.lower()))
+
+
+class PhraseMatcher:
+    """Aho-Corasick automaton whose alphabet is words rather than characters"""
+    def __init__(self, phrases):
+        self.phrases = tuple(phrases)
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+
+        for phrase in self.phrases:
+            words = phrase_words(phrase)
+            if not words:
+                continue
+            state = 0
+            for word in words:
+                next_state = self._goto[state].get(word)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][word] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                state = next_state
+            self._out[state].append((phrase, len(words)))
+
+        # Failure links, breadth first; each state also reports its fallback's phrases
+        queue = list(self._goto[0].values())
+        for state in queue:
+            for word, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and word not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(word, 0)
+                self._out[next_state].extend(self._out[self._fail[next_state]])
+
+    def find(self, words):
+        """
+        Every occurrence in ``words`` (a sequence of (word, char_offset) pairs,
+        lowercase) as (phrase, char_offset) pairs, in text order
+        """
+        goto, fail, out = self._goto, self._fail, self._out
+        hits = []
+        state = 0
+        for i, (word, _) in enumerate(words):
+            while state and word not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(word, 0)
+            for phrase, length in out[state]:
+                hits.append((i - length + 1, phrase))
+        hits.sort()
+        return [(phrase, words[start][1]) for start, phrase in hits]
+
+    def found(self, words):
+        """The set of phrases that occur in ``words``"""
+        return {phrase for phrase, _ in self.find(words)}
+
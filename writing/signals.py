@@ -0,0 +1,13 @@
+# writing/signals.py
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .graders import clear_compiled_spec
+from .grading_cache import grading_cache
+from .models import WritingQuestion
+
+@receiver(post_save, sender=WritingQuestion)
+@receiver(post_delete, sender=WritingQuestion)
+def invalidate_question_grades(sender, instance, **kwargs):
+    """Drop this worker's compiled rubric and cached grades for an edited or deleted question"""
+    clear_compiled_spec(instance.pk)
+    grading_cache.invalidate_question(instance.pk)
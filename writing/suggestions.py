@@ -0,0 +1,231 @@
+"""
+"Did you mean" spelling suggestions from a symmetric-delete index.
+
+Generating every edit of a misspelled word and checking each one (what
+pyspellchecker's candidates() does) costs tens of thousands of lookups per
+word. The symmetric-delete approach (SymSpell) instead precomputes, offline,
+every string reachable by deleting up to ``max_distance`` characters from
+the first ``prefix_length`` letters of each lexicon word. At query time only
+the deletes of the misspelling are generated; words sharing a delete are the
+candidates, which are then checked with a real edit distance.
+
+``manage.py build_suggestion_index`` writes the index next to the lexicon.
+It stores CRC32 hashes of the deletes rather than the strings, so a hash
+collision only adds a candidate that the distance check then rejects.
+
+File layout (little-endian uint32 sections after a 24-byte header):
+
+    header    b'SYM1', prefix length, max distance, lexicon word count N,
+              key count K, posting count P
+    keys      K sorted delete hashes
+    starts    K + 1 offsets into postings
+    postings  P lexicon word indices
+"""
+import mmap
+import os
+import string
+import struct
+import sys
+import zlib
+from array import array
+from bisect import bisect_left
+from django.conf import settings
+from .lexicon import Lexicon, get_lexicon
+
+MAGIC = b'SYM1'
+HEADER = struct.Struct('<4sIIIII')
+
+
+def deletes(word, max_distance):
+    """``word`` and every string made by deleting up to ``max_distance`` characters"""
+    result = {word}
+    frontier = {word}
+    for _ in range(max_distance):
+        frontier = {w[:i] + w[i + 1:] for w in frontier for i in range(len(w))}
+        result |= frontier
+    return result
+
+
+def _distance_within_one(a, b):
+    """edit_distance(a, b, 1) with slice comparisons instead of the table"""
+    if len(a) < len(b):
+        a, b = b, a
+    i = 0
+    while i < len(b) and a[i] == b[i]:
+        i += 1
+    if i == len(a):
+        return 0
+    if len(a) > len(b):
+        return 1 if a[i + 1:] == b[i:] else 2
+    if a[i + 1:] == b[i + 1:]:
+        return 1
+    if i + 1 < len(a) and a[i] == b[i + 1] and a[i + 1] == b[i] and a[i + 2:] == b[i + 2:]:
+        return 1
+    return 2
+
+
+def edit_distance(a, b, max_distance):
+    """Optimal string alignment distance, or max_distance + 1 once it is exceeded"""
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    if max_distance <= 1:
+        return min(_distance_within_one(a, b), max_distance + 1)
+    # Only the differing middle needs the full table
+    start = 0
+    while start < len(a) and start < len(b) and a[start] == b[start]:
+        start += 1
+    if start:
+        start -= 1  # keep one shared letter so a transposition at the edge is seen
+    end = 0
+    while end < len(a) - start and end < len(b) - start and a[-1 - end] == b[-1 - end]:
+        end += 1
+    if end:
+        end -= 1
+    a, b = a[start:len(a) - end], b[start:len(b) - end]
+    if not a or not b:
+        return min(max(len(a), len(b)), max_distance + 1)
+    previous2 = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        row_min = i
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            value = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                value = min(value, previous2[j - 2] + 1)
+            current[j] = value
+            row_min = min(row_min, value)
+        if row_min > max_distance:
+            return max_distance + 1
+        previous2, previous = previous, current
+    return min(previous[-1], max_distance + 1)
+
+
+def _hash(text):
+    return zlib.crc32(text.encode('utf-8'))
+
+
+def build_suggestion_index(path, lexicon, prefix_length=7, max_distance=2, min_frequency=0):
+    """Write the delete index of ``lexicon`` (a Lexicon) to ``path``; returns (keys, postings)"""
+    import numpy as np
+
+    if sys.byteorder != 'little':
+        raise RuntimeError('Suggestion indexes are little-endian; build them on a little-endian host')
+
+    # (hash << 32 | word index) pairs, sorted and de-duplicated in numpy
+    pairs = array('Q')
+    for index in range(len(lexicon)):
+        if lexicon.frequency_at(index) < min_frequency:
+            continue
+        word = lexicon.word(index)
+        pairs.extend((_hash(delete) << 32) | index for delete in deletes(word[:prefix_length], max_distance))
+    pairs = np.unique(np.frombuffer(pairs, dtype=np.uint64))
+
+    hashes = (pairs >> np.uint64(32)).astype(np.uint32)
+    postings = (pairs & np.uint64(0xFFFFFFFF)).astype(np.uint32)
+    keys, starts = np.unique(hashes, return_index=True)
+    starts = np.append(starts, len(postings)).astype(np.uint32)
+
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, prefix_length, max_distance, len(lexicon), len(keys), len(postings)))
+        f.write(keys.astype('<u4').tobytes())
+        f.write(starts.astype('<u4').tobytes())
+        f.write(postings.astype('<u4').tobytes())
+    os.replace(tmp_path, path)
+    return len(keys), len(postings)
+
+
+class SuggestionIndex:
+    """Memory-mapped delete index over the Lexicon it was built from"""
+    def __init__(self, path, lexicon):
+        if sys.byteorder != 'little':
+            raise RuntimeError('Suggestion indexes are little-endian')
+        with open(path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.prefix_length, self.max_distance, words, key_count, posting_count = HEADER.unpack_from(self._mm)
+        if magic != MAGIC:
+            raise ValueError(f'{path} is not a suggestion index')
+        if words != len(lexicon):
+            raise ValueError(f'{path} was built from a different lexicon; rebuild it')
+        self.lexicon = lexicon
+
+        view = memoryview(self._mm)
+        start = HEADER.size
+        sections = []
+        for length in (key_count, key_count + 1, posting_count):
+            sections.append(view[start:start + 4 * length].cast('I'))
+            start += 4 * length
+        self._keys, self._starts, self._postings = sections
+
+    def _candidates(self, word):
+        found = set()
+        for delete in deletes(word[:self.prefix_length], self.max_distance):
+            key = _hash(delete)
+            position = bisect_left(self._keys, key)
+            if position < len(self._keys) and self._keys[position] == key:
+                found.update(self._postings[self._starts[position]:self._starts[position + 1]])
+        return found
+
+    def suggest(self, word, top_k=3, max_distance=None):
+        """Up to ``top_k`` (word, distance) corrections, closest then most frequent first"""
+        word = word.lower()
+        max_distance = min(self.max_distance, max_distance if max_distance is not None else self.max_distance)
+        if word in self.lexicon:
+            return [(word, 0)]
+
+        # Most typos are one edit away, and that check is cheap; only fall back to
+        # the full distance-table pass when it leaves the list short
+        length = len(word.encode('utf-8'))
+        candidates = [
+            (index, self.lexicon.word(index)) for index in self._candidates(word)
+            if abs(self.lexicon.word_length(index) - length) <= max_distance
+        ]
+        ranked = self._rank(word, candidates, min(1, max_distance))
+        if len(ranked) < top_k and max_distance > 1:
+            ranked = self._rank(word, candidates, max_distance)
+        return [(candidate, distance) for distance, _, candidate in ranked[:top_k]]
+
+    def _rank(self, word, candidates, max_distance):
+        ranked = []
+        for index, candidate in candidates:
+            distance = edit_distance(word, candidate, max_distance)
+            if distance <= max_distance:
+                ranked.append((distance, -self.lexicon.frequency_at(index), candidate))
+        ranked.sort()
+        return ranked
+
+
+# Lazy loading; False means no index is available in this process
+_suggestion_index = None
+def get_suggestion_index():
+    global _suggestion_index
+    if _suggestion_index is None:
+        lexicon = get_lexicon()
+        try:
+            if not isinstance(lexicon, Lexicon):
+                raise ValueError('the prebuilt lexicon is not loaded')
+            _suggestion_index = SuggestionIndex(settings.WRITING_SUGGESTION_INDEX_PATH, lexicon)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Spelling suggestions disabled ({e}); run `manage.py build_suggestion_index`")
+            _suggestion_index = False
+    return _suggestion_index or None
+
+
+def describe_misspellings(words):
+    """
+    Format misspelled words for feedback, each with the closest correction:
+    "recieve (did you mean 'receive'?), stres (did you mean 'stress'?)"
+    """
+    index = get_suggestion_index()
+    described = []
+    for word in words:
+        clean_word = word.strip(string.punctuation)
+        suggestions = index.suggest(clean_word, top_k=1) if index is not None and clean_word else []
+        if suggestions and suggestions[0][1] > 0:
+            described.append(f"{word} (did you mean '{suggestions[0][0]}'?)")
+        else:
+            described.append(word)
+    return ', '.join(described)
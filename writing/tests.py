@@ -1,3 +1,207 @@
-from django.test import TestCase
+import os
+import shutil
+import tempfile
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from django.utils import timezone
 
-# Create your tests here.
+from .graders import grade_writing_response, grade_writing_response_uncached
+from .grading_cache import GradingCache, grading_cache
+from .models import WritingQuestion, WritingResponse, WritingTest
+from .lexicon import Lexicon, build_lexicon
+from .phrase_matcher import PhraseMatcher
+from .suggestions import SuggestionIndex, build_suggestion_index, deletes, edit_distance
+from .text_analysis import WORD_RE
+
+
+def words(text):
+    return [(match.group().lower(), match.start()) for match in WORD_RE.finditer(text)]
+
+
+class PhraseMatcherTests(SimpleTestCase):
+    def test_only_whole_words_match(self):
+        matcher = PhraseMatcher(['so', 'key', 'cant'])
+        self.assertEqual(matcher.found(words('I also lost my keyboard; significant.')), set())
+        self.assertEqual(matcher.found(words('So the key was lost, I cant find it')), {'so', 'key', 'cant'})
+
+    def test_phrases_and_offsets_in_text_order(self):
+        matcher = PhraseMatcher(['In addition', 'addition', 'for example', 'example'])
+        text = 'For example, in addition to that.'
+        self.assertEqual(matcher.find(words(text)), [
+            ('for example', 0), ('example', 4), ('In addition', 13), ('addition', 16),
+        ])
+
+    def test_overlapping_and_repeated_phrases(self):
+        matcher = PhraseMatcher(['a b', 'b c', 'a b c d'])
+        self.assertEqual(
+            [phrase for phrase, _ in matcher.find(words('a b c d a b'))],
+            ['a b', 'a b c d', 'b c', 'a b']
+        )
+
+    def test_failure_links_follow_the_longest_suffix(self):
+        matcher = PhraseMatcher(['on the other hand', 'the other'])
+        self.assertEqual(matcher.find(words('on the the other hand')), [('the other', 7)])
+
+
+class SuggestionIndexTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.directory = tempfile.mkdtemp()
+        frequencies = {
+            'receive': 500, 'believe': 400, 'stress': 300, 'the': 10000, 'they': 900,
+            'then': 800, 'there': 700, 'their': 600, 'environment': 50,
+        }
+        lexicon_path = os.path.join(cls.directory, 'en.lex')
+        build_lexicon(lexicon_path, frequencies)
+        cls.lexicon = Lexicon(lexicon_path)
+        cls.index_path = os.path.join(cls.directory, 'en.sym')
+        build_suggestion_index(cls.index_path, cls.lexicon)
+        cls.index = SuggestionIndex(cls.index_path, cls.lexicon)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.directory)
+        super().tearDownClass()
+
+    def test_known_words_are_returned_as_is(self):
+        self.assertEqual(self.index.suggest('Receive'), [('receive', 0)])
+
+    def test_typos_are_corrected(self):
+        self.assertEqual(self.index.suggest('recieve', top_k=1), [('receive', 1)])  # transposition
+        self.assertEqual(self.index.suggest('stres', top_k=1), [('stress', 1)])     # deletion
+        self.assertEqual(self.index.suggest('enviroment', top_k=1), [('environment', 1)])
+        self.assertEqual(self.index.suggest('beleev', top_k=1), [('believe', 2)])
+
+    def test_closest_then_most_frequent(self):
+        self.assertEqual(self.index.suggest('thes'), [('the', 1), ('they', 1), ('then', 1)])
+
+    def test_nothing_within_max_distance(self):
+        self.assertEqual(self.index.suggest('xylophone'), [])
+
+    def test_index_must_match_its_lexicon(self):
+        other_path = os.path.join(self.directory, 'other.lex')
+        build_lexicon(other_path, {'only': 1})
+        with self.assertRaises(ValueError):
+            SuggestionIndex(self.index_path, Lexicon(other_path))
+
+    def test_edit_distance(self):
+        cases = [
+            ('receive', 'recieve', 1), ('stress', 'stres', 1), ('kitten', 'sitting', 3),
+            ('abc', 'abc', 0), ('', 'ab', 2), ('ca', 'ac', 1), ('believe', 'beleev', 2),
+        ]
+        for a, b, distance in cases:
+            self.assertEqual(edit_distance(a, b, 3), distance, (a, b))
+            self.assertEqual(edit_distance(a, b, 1), min(distance, 2), (a, b))
+
+    def test_deletes(self):
+        self.assertEqual(deletes('abc', 1), {'abc', 'ab', 'ac', 'bc'})
+        self.assertEqual(len(deletes('abc', 2)), 7)
+
+
+class GradingCacheTests(TestCase):
+    def setUp(self):
+        grading_cache.clear()
+        test = WritingTest.objects.create(title='Writing')
+        self.question = WritingQuestion.objects.create(
+            test=test, order=1, question_type='fill_blanks', prompt='Fill in', correct_answer='goes, are, a'
+        )
+
+    def counting_grader(self):
+        calls = []
+
+        def grade(user_answer, question):
+            calls.append(user_answer)
+            return grade_writing_response_uncached(user_answer, question)
+        return grade, calls
+
+    def test_equivalent_answers_share_a_result(self):
+        cache = GradingCache(10)
+        grade, calls = self.counting_grader()
+        first = cache.get_or_grade(self.question, 'goes, are, a', grade)
+        second = cache.get_or_grade(self.question, ' Goes,are,  A ', grade)
+        self.assertEqual(first, second)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_results_are_copies(self):
+        cache = GradingCache(10)
+        grade, _ = self.counting_grader()
+        cache.get_or_grade(self.question, 'goes, is, a', grade)['feedback'].append('changed')
+        self.assertEqual(len(cache.get_or_grade(self.question, 'goes, is, a', grade)['feedback']), 1)
+
+    def test_least_recently_used_is_evicted(self):
+        cache = GradingCache(2)
+        grade, calls = self.counting_grader()
+        for answer in ('a', 'b', 'a', 'c', 'a', 'b'):
+            cache.get_or_grade(self.question, answer, grade)
+        self.assertEqual(calls, ['a', 'b', 'c', 'b'])
+        self.assertEqual(cache.evictions, 2)
+
+    def test_size_zero_disables_caching(self):
+        cache = GradingCache(0)
+        grade, calls = self.counting_grader()
+        cache.get_or_grade(self.question, 'a', grade)
+        cache.get_or_grade(self.question, 'a', grade)
+        self.assertEqual(len(calls), 2)
+
+    def test_editing_a_question_invalidates_its_grades(self):
+        self.assertEqual(grade_writing_response('goes, is, a', self.question)['score'], 66.67)
+        self.assertEqual(grading_cache.stats()['entries'], 1)
+
+        self.question.correct_answer = 'goes, is, a'
+        self.question.save()
+        self.assertEqual(grading_cache.stats()['entries'], 0)
+        self.assertEqual(grade_writing_response('goes, is, a', self.question)['score'], 100)
+
+    def test_an_edit_from_another_process_is_not_served_old_grades(self):
+        grade_writing_response('goes, is, a', self.question)
+        # A queryset update sends no signals, like a save in another worker
+        WritingQuestion.objects.filter(pk=self.question.pk).update(
+            correct_answer='goes, is, a', updated_at=timezone.now()
+        )
+        self.question.refresh_from_db()
+        self.assertEqual(grade_writing_response('goes, is, a', self.question)['score'], 100)
+
+    def test_deleting_a_question_invalidates_its_grades(self):
+        grade_writing_response('goes, is, a', self.question)
+        self.question.delete()
+        self.assertEqual(grading_cache.stats()['entries'], 0)
+
+
+class DraftAndSubmitTests(TestCase):
+    def setUp(self):
+        grading_cache.clear()
+        self.user = User.objects.create_user('student', password='secret')
+        self.client.force_login(self.user)
+        self.test = WritingTest.objects.create(title='Writing')
+        WritingQuestion.objects.create(
+            test=self.test, order=1, question_type='fill_blanks', prompt='Fill in', correct_answer='goes, are, a'
+        )
+
+    def save_draft(self, answer):
+        return self.client.post(reverse('writing:save_draft', args=[self.test.id, 1]), {'user_answer': answer})
+
+    def test_draft_is_saved_ungraded(self):
+        self.assertEqual(self.save_draft('goes, is, a').json(), {'success': True, 'saved': True})
+        response = WritingResponse.objects.get()
+        self.assertEqual(response.user_answer, 'goes, is, a')
+        self.assertIsNone(response.graded_at)
+
+        # Unchanged text is not written again
+        self.assertEqual(self.save_draft('goes, is, a').json(), {'success': True, 'saved': False})
+        self.save_draft('goes, are, a')
+        self.assertEqual(WritingResponse.objects.get().user_answer, 'goes, are, a')
+
+    def test_empty_draft_is_rejected(self):
+        self.assertEqual(self.save_draft('  ').status_code, 400)
+        self.assertFalse(WritingResponse.objects.exists())
+
+    def test_submit_grades_the_drafts(self):
+        self.save_draft('goes, is, a')
+        self.client.post(reverse('writing:submit_writing_test', args=[self.test.id]))
+        response = WritingResponse.objects.get()
+        self.assertIsNotNone(response.graded_at)
+        self.assertAlmostEqual(response.score, 66.67)
+        self.assertEqual(len(response.feedback), 1)
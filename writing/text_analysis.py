@@ -0,0 +1,111 @@
+"""
+One shared pass over a written answer.
+
+The rewrite and paragraph graders used to split, lowercase and strip each
+answer several times over, and looked every word up in the dictionary
+twice (once for the gibberish check, once for the spelling rubric).
+analyze_text() does that work once and every rubric reads the result:
+
+- ``text`` / ``lower``: the stripped answer and its lowercase form
+- ``tokens``: whitespace-separated words as written
+- ``normalized``: the same words lowercased with punctuation removed
+- ``known``: spell-status bitmap, ``known[i]`` is 1 if ``normalized[i]``
+  is in the lexicon (see lexicon.py)
+- ``sentence_spans`` / ``sentences``: Punkt sentence boundaries, computed
+  on first use
+- ``words``: lowercase (word, offset) pairs for phrase matching (see
+  phrase_matcher.py), computed on first use
+
+Results are cached per answer text, so saving an answer and re-grading it
+on submit does not repeat the pass.
+"""
+import re
+import string
+from functools import cached_property, lru_cache
+from .lexicon import get_lexicon
+
+PUNCTUATION = str.maketrans('', '', string.punctuation)
+
+# Words for phrase matching: letters/digits, keeping inner apostrophes ("don't")
+WORD_RE = re.compile(r"\w+(?:'\w+)*")
+
+# Same split as the graders' old fallback: runs of text between . ! ?
+FALLBACK_SENTENCE_RE = re.compile(r'[^.!?]+')
+
+# Lazy loading for the Punkt sentence tokenizer behind nltk's sent_tokenize
+_sentence_tokenizer = None
+def get_sentence_tokenizer():
+    global _sentence_tokenizer
+    if _sentence_tokenizer is None:
+        try:
+            from nltk.tokenize import PunktTokenizer
+            _sentence_tokenizer = PunktTokenizer('english')
+        except ImportError:
+            # nltk < 3.8.2 ships the pickled tokenizer instead
+            import nltk
+            _sentence_tokenizer = nltk.data.load('tokenizers/punkt/english.pickle')
+    return _sentence_tokenizer
+
+
+class TextAnalysis:
+    """Tokens, spell status and sentences of one answer; treat as read-only"""
+    def __init__(self, text, lexicon=None):
+        lexicon = lexicon if lexicon is not None else get_lexicon()
+        self.text = text.strip()
+        self.lower = self.text.lower()
+        self.lower_tokens = tuple(self.lower.split())
+        self.tokens = tuple(self.text.split())
+        self.normalized = tuple(token.translate(PUNCTUATION) for token in self.lower_tokens)
+
+        # One batch lookup, once per distinct word
+        self.known = bytes(lexicon.contains_many(self.normalized))
+
+    @property
+    def word_count(self):
+        return len(self.tokens)
+
+    @property
+    def unique_word_count(self):
+        return len(set(self.lower_tokens))
+
+    def recognizable_count(self):
+        """Dictionary words longer than two letters"""
+        return sum(1 for word, known in zip(self.normalized, self.known) if known and len(word) > 2)
+
+    def misspelled(self, skip=()):
+        """Words (as written) not in the dictionary, ignoring ``skip`` and single letters"""
+        return [
+            token for token, word, known in zip(self.tokens, self.normalized, self.known)
+            if not known and len(word) > 1 and word not in skip
+        ]
+
+    @cached_property
+    def sentence_spans(self):
+        """(start, end) offsets into ``text`` of each sentence"""
+        try:
+            return tuple(get_sentence_tokenizer().span_tokenize(self.text))
+        except Exception:
+            # Fallback: split by punctuation
+            spans = []
+            for match in FALLBACK_SENTENCE_RE.finditer(self.text):
+                sentence = match.group()
+                if sentence.strip():
+                    start = match.start() + len(sentence) - len(sentence.lstrip())
+                    end = match.end() - len(sentence) + len(sentence.rstrip())
+                    spans.append((start, end))
+            return tuple(spans)
+
+    @cached_property
+    def words(self):
+        """(lowercase word, offset into ``text``) pairs, without punctuation"""
+        return tuple((match.group().lower(), match.start()) for match in WORD_RE.finditer(self.text))
+
+    @cached_property
+    def sentences(self):
+        return tuple(self.text[start:end] for start, end in self.sentence_spans)
+
+
+@lru_cache(maxsize=256)
+def analyze_text(text):
+    """The (shared, cached) TextAnalysis of ``text``"""
+    return TextAnalysis(text)
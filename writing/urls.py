@@ -7,8 +7,9 @@ urlpatterns = [
     path('test/<int:test_id>/', views.writing_test_home, name='writing_test_home'),
     path('test/<int:test_id>/start/', views.start_writing_test, name='start_writing_test'),
     path('test/<int:test_id>/question/<int:question_number>/', views.writing_question, name='writing_question'),
-    path('test/<int:test_id>/save/<int:question_number>/', views.save_answer, name='save_answer'),
+    path('test/<int:test_id>/draft/<int:question_number>/', views.save_draft, name='save_draft'),
     path('test/<int:test_id>/submit/', views.submit_writing_test, name='submit_writing_test'),
     path('results/<int:result_id>/', views.writing_results, name='writing_results'),
     path('log-activity/', views.log_suspicious_activity, name='log_activity'),
+    path('diagnostics/grading-cache/', views.grading_cache_diagnostics, name='grading_cache_diagnostics'),
 ]
\ No newline at end of file